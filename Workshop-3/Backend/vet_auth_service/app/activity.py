@@ -0,0 +1,176 @@
+# ============================================================================
+# activity.py - Write-Behind Activity Timestamps (Singleton Pattern)
+# ============================================================================
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy.orm import Session
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityRecorder:
+    """
+    Singleton that coalesces last_login_at (per user) and last_seen_at (per
+    session) in memory and writes them in one multi-row UPDATE per table every
+    flush_interval_seconds, so logins and /me reads do not each commit a write.
+    Timestamps in the database lag by at most the flush interval; a worker that
+    dies without a clean shutdown loses its unflushed timestamps.
+    """
+    _instance: Optional['ActivityRecorder'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.enabled = config.ACTIVITY_WRITE_BEHIND_ENABLED
+        self.flush_interval_seconds = config.ACTIVITY_FLUSH_INTERVAL_SECONDS
+        self.max_pending = config.ACTIVITY_MAX_PENDING
+
+        # user_id -> latest login; (session_id, expires_at) -> latest request.
+        # expires_at is the partition key, so each session update hits one partition
+        self._logins: Dict[UUID, datetime] = {}
+        self._seen: Dict[Tuple[UUID, datetime], datetime] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        self.failures = 0
+        self._initialized = True
+
+    def record_login(self, user_id: UUID, at: Optional[datetime] = None) -> None:
+        """Note a successful login; written at the next flush"""
+        self._record("_logins", user_id, at)
+
+    def record_seen(self, session_id: UUID, expires_at: datetime, at: Optional[datetime] = None) -> None:
+        """Note a request on a session; written at the next flush"""
+        self._record("_seen", (session_id, expires_at), at)
+
+    def flush(self, db: Optional[Session] = None) -> int:
+        """Write everything recorded so far, returns rows updated"""
+        from .repositories import ActivityRepository
+
+        # One flush at a time, so a batch put back after a failure is not overtaken
+        with self._flush_lock:
+            with self._lock:
+                logins, self._logins = self._logins, {}
+                seen, self._seen = self._seen, {}
+            if not logins and not seen:
+                return 0
+
+            session = db if db is not None else self._session()
+            try:
+                repository = ActivityRepository(session)
+                rows = repository.touch_users(logins) + repository.touch_sessions(seen)
+            except Exception as e:
+                self._restore(logins, seen)
+                with self._lock:
+                    self.failures += 1
+                logger.error("Activity flush failed, keeping %s timestamps for the next one: %s", len(logins) + len(seen), e)
+                return 0
+            finally:
+                if db is None:
+                    session.close()
+
+        with self._lock:
+            self.flushes += 1
+            self.rows_written += rows
+        return rows
+
+    def start(self) -> None:
+        """Start flushing in a daemon thread"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="activity-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the flusher and write what is still pending"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def clear(self) -> None:
+        """Forget pending timestamps and reset counters (used by tests)"""
+        with self._lock:
+            self._logins.clear()
+            self._seen.clear()
+            self.flushes = 0
+            self.rows_written = 0
+            self.dropped = 0
+            self.failures = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "flush_interval_seconds": self.flush_interval_seconds,
+                "pending_logins": len(self._logins),
+                "pending_sessions": len(self._seen),
+                "flushes": self.flushes,
+                "rows_written": self.rows_written,
+                "dropped": self.dropped,
+                "failures": self.failures,
+            }
+
+    def _record(self, attribute: str, key, at: Optional[datetime]) -> None:
+        if not self.enabled:
+            return
+        at = at or datetime.now(timezone.utc)
+        with self._lock:
+            # Looked up under the lock: flush swaps in fresh maps
+            pending = getattr(self, attribute)
+            previous = pending.get(key)
+            if previous is None:
+                if len(self._logins) + len(self._seen) >= self.max_pending:
+                    # The database is not keeping up; losing a timestamp beats unbounded memory
+                    self.dropped += 1
+                    return
+                if len(self._logins) + len(self._seen) + 1 >= self.max_pending // 2:
+                    self._wake.set()
+            elif previous >= at:
+                return
+            pending[key] = at
+
+    def _restore(self, logins: dict, seen: dict) -> None:
+        with self._lock:
+            for pending, batch in ((self._logins, logins), (self._seen, seen)):
+                for key, at in batch.items():
+                    if key not in pending or pending[key] < at:
+                        pending[key] = at
+
+    def _session(self) -> Session:
+        from .database import DatabaseManager
+        return DatabaseManager().get_session()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Woken early when half of max_pending is reached
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Activity flusher error: %s", e)
@@ -0,0 +1,291 @@
+# ============================================================================
+# cache.py - Session Validation Cache (Singleton Pattern)
+# ============================================================================
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set, Tuple
+from uuid import UUID
+from .config import Config
+from .principal import AuthenticatedUser
+
+# Rough per-entry bookkeeping cost (OrderedDict node, entry tuple, user index)
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+class SessionCache:
+    """Singleton LRU cache of validated sessions keyed by token hash"""
+    _instance: Optional['SessionCache'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.enabled = config.SESSION_CACHE_ENABLED
+        self.max_entries = config.SESSION_CACHE_MAX_ENTRIES
+        self.max_bytes = config.SESSION_CACHE_MAX_BYTES
+        self.ttl_seconds = config.SESSION_CACHE_TTL_SECONDS
+        # A replica may still serve a user's revoked sessions for up to its lag;
+        # don't cache that user again until it has caught up
+        self.invalidation_fence_seconds = (
+            config.DATABASE_REPLICA_MAX_LAG_SECONDS if config.DATABASE_REPLICA_URLS else 0
+        )
+
+        # token_hash -> (principal, monotonic deadline, accounted size)
+        self._entries: "OrderedDict[str, Tuple[AuthenticatedUser, float, int]]" = OrderedDict()
+        self._by_user: Dict[UUID, Set[str]] = {}
+        # user_id -> monotonic time before which the user's principals are not cached
+        self._fenced_users: Dict[UUID, float] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._initialized = True
+
+    def get(self, token_hash: str) -> Optional[AuthenticatedUser]:
+        """Return the cached principal for a token hash, if still fresh"""
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            principal, deadline, _ = entry
+            if deadline <= now:
+                self._remove(token_hash)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return principal
+
+    def put(self, token_hash: str, principal: AuthenticatedUser, max_ttl_seconds: Optional[float] = None) -> None:
+        """Cache a principal; the TTL never outlives the session itself, nor max_ttl_seconds"""
+        if not self.enabled:
+            return
+
+        remaining = (principal.expires_at - datetime.now(timezone.utc)).total_seconds()
+        ttl = min(self.ttl_seconds, remaining)
+        if max_ttl_seconds is not None:
+            ttl = min(ttl, max_ttl_seconds)
+        if ttl <= 0:
+            return
+
+        now = time.monotonic()
+        deadline = now + ttl
+        size = self._estimate_size(token_hash, principal)
+
+        with self._lock:
+            fence = self._fenced_users.get(principal.id)
+            if fence is not None:
+                if fence > now:
+                    return
+                del self._fenced_users[principal.id]
+
+            if token_hash in self._entries:
+                self._remove(token_hash)
+
+            self._entries[token_hash] = (principal, deadline, size)
+            self._by_user.setdefault(principal.id, set()).add(token_hash)
+            self._bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, token_hash: str) -> bool:
+        """Drop a single session from the cache"""
+        with self._lock:
+            if token_hash not in self._entries:
+                return False
+            self._remove(token_hash)
+            self.invalidations += 1
+            return True
+
+    def invalidate_user(self, user_id: UUID) -> int:
+        """Drop every cached session belonging to a user"""
+        with self._lock:
+            if self.invalidation_fence_seconds > 0:
+                now = time.monotonic()
+                if len(self._fenced_users) >= self.max_entries:
+                    self._fenced_users = {
+                        fenced: until for fenced, until in self._fenced_users.items() if until > now
+                    }
+                self._fenced_users[user_id] = now + self.invalidation_fence_seconds
+            token_hashes = list(self._by_user.get(user_id, ()))
+            for token_hash in token_hashes:
+                self._remove(token_hash)
+            self.invalidations += len(token_hashes)
+            return len(token_hashes)
+
+    def recently_revoked(self, user_id: UUID) -> bool:
+        """True while a replica may still serve sessions revoked by a user-wide revocation"""
+        with self._lock:
+            until = self._fenced_users.get(user_id)
+            return until is not None and until > time.monotonic()
+
+    def invalidate_all(self) -> int:
+        """Drop every entry, keeping counters"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._by_user.clear()
+            self._bytes = 0
+            self.invalidations += count
+            return count
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._fenced_users.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        """Snapshot of cache size and counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _remove(self, token_hash: str) -> None:
+        """Remove an entry; caller must hold the lock"""
+        principal, _, size = self._entries.pop(token_hash)
+        self._bytes -= size
+        user_tokens = self._by_user.get(principal.id)
+        if user_tokens is not None:
+            user_tokens.discard(token_hash)
+            if not user_tokens:
+                del self._by_user[principal.id]
+
+    @staticmethod
+    def _estimate_size(token_hash: str, principal: AuthenticatedUser) -> int:
+        """Approximate memory held by one entry"""
+        return (
+            sys.getsizeof(token_hash)
+            + sys.getsizeof(principal)
+            + sum(sys.getsizeof(value) for value in principal)
+            + _ENTRY_OVERHEAD_BYTES
+        )
+
+
+class RejectedTokenCache:
+    """
+    Singleton LRU of token hashes that recently failed validation, so clients
+    retrying a dead token are answered without a database round trip. Only exact
+    hashes are stored: a newly issued token can never match an entry, and an
+    invalid token never becomes valid again, so the TTL only bounds memory.
+    """
+    _instance: Optional['RejectedTokenCache'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.enabled = config.REJECTED_TOKEN_CACHE_ENABLED
+        self.max_entries = config.REJECTED_TOKEN_CACHE_MAX_ENTRIES
+        self.ttl_seconds = config.REJECTED_TOKEN_CACHE_TTL_SECONDS
+
+        # token_hash -> monotonic deadline
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.evictions = 0
+        self._initialized = True
+
+    def contains(self, token_hash: str) -> bool:
+        """True if the token hash was rejected within the TTL"""
+        if not self.enabled:
+            return False
+
+        now = time.monotonic()
+        with self._lock:
+            deadline = self._entries.get(token_hash)
+            if deadline is None:
+                return False
+            if deadline <= now:
+                del self._entries[token_hash]
+                return False
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return True
+
+    def add(self, token_hash: str) -> None:
+        """Remember a rejected token hash"""
+        if not self.enabled:
+            return
+
+        deadline = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[token_hash] = deadline
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        """Snapshot of cache size and counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,185 @@
+# ============================================================================
+# cli.py - Operational Commands
+# ============================================================================
+"""
+Operational commands for the auth service.
+
+  calibrate   Time password verification on this host and recommend the
+              strongest PASSWORD_* cost settings whose median verify stays
+              within --target-ms. Run it on the production instance type:
+              cost that takes 100 ms on a laptop may take 300 ms there.
+
+  provision   Create the users listed in a CSV (name,email,password header)
+              or NDJSON file against DATABASE_URL, like POST /admin/users:bulk.
+              Passwords are hashed across PASSWORD_HASH_WORKERS processes and
+              the users inserted in one batch. Emails that already exist are
+              reported and skipped, so a partly applied file can be re-run.
+
+Usage (from the vet_auth_service directory):
+
+    python -m app.cli calibrate --target-ms 100
+    python -m app.cli calibrate --scheme argon2 --memory-kib 65536 --target-ms 100
+    python -m app.cli provision clinic_group.csv
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from passlib.context import CryptContext
+from sqlalchemy.orm import Session
+from .security import build_context
+
+CALIBRATION_PASSWORD = "calibration-Password-123!"
+
+BCRYPT_ROUNDS = range(10, 17)
+ARGON2_TIME_COSTS = range(1, 11)
+
+
+def measure_verify(context: CryptContext, samples: int) -> float:
+    """Median milliseconds to verify one password with context's default settings"""
+    password_hash = context.hash(CALIBRATION_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(CALIBRATION_PASSWORD, password_hash)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def _sweep(costs, make_context: Callable[[int], CryptContext], target_ms: float, samples: int) -> Dict:
+    # Each step up costs more, so stop at the first one past the target
+    measured: List[Dict] = []
+    chosen: Optional[Dict] = None
+    for cost in costs:
+        verify_ms = measure_verify(make_context(cost), samples)
+        measured.append({"cost": cost, "verify_ms": round(verify_ms, 1)})
+        if verify_ms > target_ms:
+            break
+        chosen = measured[-1]
+    return {"measured": measured, "chosen": chosen}
+
+
+def calibrate(
+    scheme: str,
+    target_ms: float,
+    samples: int = 5,
+    memory_kib: int = 65536,
+    parallelism: int = 1,
+) -> Dict:
+    """Recommend the highest cost for scheme whose median verify fits target_ms"""
+    if scheme == "bcrypt":
+        sweep = _sweep(
+            BCRYPT_ROUNDS,
+            lambda rounds: build_context("bcrypt", bcrypt_rounds=rounds),
+            target_ms, samples,
+        )
+        settings = {"PASSWORD_SCHEME": "bcrypt"}
+        if sweep["chosen"]:
+            settings["PASSWORD_BCRYPT_ROUNDS"] = sweep["chosen"]["cost"]
+    elif scheme == "argon2":
+        sweep = _sweep(
+            ARGON2_TIME_COSTS,
+            lambda time_cost: build_context(
+                "argon2",
+                argon2_time_cost=time_cost,
+                argon2_memory_kib=memory_kib,
+                argon2_parallelism=parallelism,
+            ),
+            target_ms, samples,
+        )
+        settings = {
+            "PASSWORD_SCHEME": "argon2",
+            "PASSWORD_ARGON2_MEMORY_KIB": memory_kib,
+            "PASSWORD_ARGON2_PARALLELISM": parallelism,
+        }
+        if sweep["chosen"]:
+            settings["PASSWORD_ARGON2_TIME_COST"] = sweep["chosen"]["cost"]
+    else:
+        raise ValueError(f"Unknown password scheme {scheme!r}")
+
+    result = {"scheme": scheme, "target_ms": target_ms, "measured": sweep["measured"]}
+    if sweep["chosen"] is None:
+        result["recommendation"] = None
+        result["note"] = "Even the lowest cost exceeds the target; raise --target-ms" + (
+            " or lower --memory-kib" if scheme == "argon2" else ""
+        )
+        return result
+
+    verify_ms = sweep["chosen"]["verify_ms"]
+    result["recommendation"] = settings
+    # One verify occupies one hashing worker for its whole duration
+    result["verifies_per_second_per_worker"] = round(1000 / verify_ms, 1) if verify_ms else None
+    return result
+
+
+# File extension -> provisioning input format
+PROVISION_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def provision(path: str, content_format: Optional[str] = None, db: Optional[Session] = None) -> Dict:
+    """Provision the users in path; returns counts plus every row that was not created"""
+    from .database import DatabaseManager
+    from .dependencies import get_auth_service
+    from .hashing import PasswordHasher
+    from .provisioning import parse_users
+
+    if content_format is None:
+        content_format = PROVISION_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if content_format is None:
+            raise ValueError(f"Cannot tell the format of {path}; pass --format")
+    with open(path, encoding="utf-8", newline="") as handle:
+        rows = parse_users(handle.read(), content_format)
+
+    session = db if db is not None else DatabaseManager().get_session()
+    hasher = PasswordHasher()
+    hasher.start()
+    try:
+        results = get_auth_service(session).provision_users(rows)
+    finally:
+        hasher.shutdown()
+        if db is None:
+            session.close()
+
+    return {
+        "rows": len(results),
+        "created": sum(result.status == "created" for result in results),
+        "duplicates": sum(result.status == "duplicate" for result in results),
+        "invalid": sum(result.status == "invalid" for result in results),
+        "problems": [
+            {"line": result.line, "email": result.email, "status": result.status, "error": result.error}
+            for result in results if result.status != "created"
+        ],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    calibrate_parser = commands.add_parser("calibrate", help="recommend password hashing cost for this host")
+    calibrate_parser.add_argument("--scheme", choices=("bcrypt", "argon2"), default="bcrypt")
+    calibrate_parser.add_argument("--target-ms", type=float, default=100.0)
+    calibrate_parser.add_argument("--samples", type=int, default=5)
+    calibrate_parser.add_argument("--memory-kib", type=int, default=65536, help="argon2 memory cost")
+    calibrate_parser.add_argument("--parallelism", type=int, default=1, help="argon2 lanes")
+    provision_parser = commands.add_parser("provision", help="create the users listed in a CSV or NDJSON file")
+    provision_parser.add_argument("path")
+    provision_parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file extension")
+    args = parser.parse_args(argv)
+
+    if args.command == "provision":
+        summary = provision(args.path, args.format)
+        print(json.dumps(summary, indent=2))
+        return 1 if summary["invalid"] else 0
+
+    result = calibrate(args.scheme, args.target_ms, args.samples, args.memory_kib, args.parallelism)
+    print(json.dumps(result, indent=2))
+    return 0 if result["recommendation"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,8 +23,114 @@ class Config:
         self.DATABASE_URL = os.getenv("DATABASE_URL")
         self.SESSION_EXPIRY_HOURS = int(os.getenv("SESSION_EXPIRY_HOURS", "8"))
         self.TOKEN_LENGTH = int(os.getenv("TOKEN_LENGTH", "32"))
+        self.SESSION_VALIDATE_BATCH_MAX = int(os.getenv("SESSION_VALIDATE_BATCH_MAX", "500"))
+        self.SESSION_LIST_PAGE_MAX = int(os.getenv("SESSION_LIST_PAGE_MAX", "100"))
+        self.PROVISION_BATCH_MAX = int(os.getenv("PROVISION_BATCH_MAX", "5000"))
+        self.ME_CACHE_MAX_AGE_SECONDS = int(os.getenv("ME_CACHE_MAX_AGE_SECONDS", "60"))
+        # "compact" stores the token digest as bytea and the client agent as a lookup id;
+        # "legacy" keeps writing hex token_hash and free-text user_agent (for rolling deploys)
+        self.SESSION_ROW_FORMAT = os.getenv("SESSION_ROW_FORMAT", "compact").lower()
+        # Also look sessions up by hex token_hash; disable once legacy rows have expired
+        self.SESSION_LEGACY_READS = os.getenv("SESSION_LEGACY_READS", "true").lower() == "true"
+        # Serve the validation path over asyncpg; "false" runs it on the sync engine in the threadpool
+        self.DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "true").lower() == "true"
+        # Connection pools (per engine, per worker process)
+        self.DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+        self.DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "20"))
+        self.DATABASE_POOL_TIMEOUT_SECONDS = float(os.getenv("DATABASE_POOL_TIMEOUT_SECONDS", "30"))
+        # Replace connections older than this; -1 keeps them forever
+        self.DATABASE_POOL_RECYCLE_SECONDS = int(os.getenv("DATABASE_POOL_RECYCLE_SECONDS", "1800"))
+        # "always" pings on every checkout, "idle" only after DATABASE_POOL_PRE_PING_IDLE_SECONDS unused, "never"
+        self.DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "idle").lower()
+        self.DATABASE_POOL_PRE_PING_IDLE_SECONDS = float(os.getenv("DATABASE_POOL_PRE_PING_IDLE_SECONDS", "30"))
+        # DATABASE_URL points at PgBouncer in transaction mode: no client-side pool, no prepared statements
+        self.DATABASE_PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "false").lower() == "true"
+        # Direct Postgres URL for the revocation listener and reaper, which need session state
+        self.DATABASE_DIRECT_URL = os.getenv("DATABASE_DIRECT_URL")
+        # Comma-separated read replica URLs for session validation; empty reads from the primary
+        self.DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+        # Replicas replaying more than this far behind the primary are skipped
+        self.DATABASE_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "2"))
+        self.DATABASE_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DATABASE_REPLICA_LAG_CHECK_SECONDS", "1"))
+        
+        # Session validation cache
+        self.SESSION_CACHE_ENABLED = os.getenv("SESSION_CACHE_ENABLED", "true").lower() == "true"
+        self.SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+        self.SESSION_CACHE_MAX_BYTES = int(os.getenv("SESSION_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+        self.SESSION_CACHE_TTL_SECONDS = int(os.getenv("SESSION_CACHE_TTL_SECONDS", "60"))
+        # Recently rejected token hashes, answered without a database lookup
+        self.REJECTED_TOKEN_CACHE_ENABLED = os.getenv("REJECTED_TOKEN_CACHE_ENABLED", "true").lower() == "true"
+        self.REJECTED_TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("REJECTED_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+        self.REJECTED_TOKEN_CACHE_TTL_SECONDS = int(os.getenv("REJECTED_TOKEN_CACHE_TTL_SECONDS", "60"))
+        
+        # Cross-worker revocation broadcast (Postgres LISTEN/NOTIFY)
+        self.REVOCATION_CHANNEL = os.getenv("REVOCATION_CHANNEL", "vettrack_session_revocation")
+        self.REVOCATION_LISTENER_ENABLED = os.getenv("REVOCATION_LISTENER_ENABLED", "true").lower() == "true"
+        
+        # Access tokens: "opaque" (session token on every request) or "signed" (short-lived JWT + session-backed refresh)
+        self.ACCESS_TOKEN_MODE = os.getenv("ACCESS_TOKEN_MODE", "opaque").lower()
+        self.ACCESS_TOKEN_ALGORITHM = os.getenv("ACCESS_TOKEN_ALGORITHM", "HS256")
+        self.ACCESS_TOKEN_TTL_SECONDS = int(os.getenv("ACCESS_TOKEN_TTL_SECONDS", "300"))
+        self.ACCESS_TOKEN_SECRET = os.getenv("ACCESS_TOKEN_SECRET")
+        self.ACCESS_TOKEN_PRIVATE_KEY_FILE = os.getenv("ACCESS_TOKEN_PRIVATE_KEY_FILE")
+        self.ACCESS_TOKEN_KEY_ID = os.getenv("ACCESS_TOKEN_KEY_ID", "v1")
+        self.ACCESS_TOKEN_ISSUER = os.getenv("ACCESS_TOKEN_ISSUER", "vettrack-auth")
+        
+        # Password hashing pool; 0 workers hashes inline on the request thread
+        self.PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+        # Kept below the request threadpool size (40) so bcrypt waiters cannot starve it
+        self.PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "16"))
+        self.PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "5"))
+        # Scheme for new hashes ("bcrypt" or "argon2"); hashes in the other scheme still verify
+        self.PASSWORD_SCHEME = os.getenv("PASSWORD_SCHEME", "bcrypt").lower()
+        self.PASSWORD_BCRYPT_ROUNDS = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+        self.PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+        self.PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv("PASSWORD_ARGON2_MEMORY_KIB", "65536"))
+        self.PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "1"))
+        # Replace a stored hash on successful login when it uses an outdated scheme or cost
+        self.PASSWORD_REHASH_ON_LOGIN = os.getenv("PASSWORD_REHASH_ON_LOGIN", "true").lower() == "true"
+        
+        # Login throttling (GCRA token buckets, checked before any bcrypt work)
+        self.LOGIN_THROTTLE_ENABLED = os.getenv("LOGIN_THROTTLE_ENABLED", "true").lower() == "true"
+        self.LOGIN_THROTTLE_EMAIL_BURST = int(os.getenv("LOGIN_THROTTLE_EMAIL_BURST", "10"))
+        self.LOGIN_THROTTLE_EMAIL_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_EMAIL_PER_MINUTE", "5"))
+        self.LOGIN_THROTTLE_IP_BURST = int(os.getenv("LOGIN_THROTTLE_IP_BURST", "50"))
+        self.LOGIN_THROTTLE_IP_PER_MINUTE = float(os.getenv("LOGIN_THROTTLE_IP_PER_MINUTE", "60"))
+        # Keys tracked in memory per limiter before the least recently used are evicted
+        self.LOGIN_THROTTLE_MAX_KEYS = int(os.getenv("LOGIN_THROTTLE_MAX_KEYS", "100000"))
+        # Also enforce the limits across replicas through the login_throttle table
+        self.LOGIN_THROTTLE_SHARED = os.getenv("LOGIN_THROTTLE_SHARED", "false").lower() == "true"
+        
+        # Write-behind last_login_at / last_seen_at; the flush interval bounds how stale they get
+        self.ACTIVITY_WRITE_BEHIND_ENABLED = os.getenv("ACTIVITY_WRITE_BEHIND_ENABLED", "true").lower() == "true"
+        self.ACTIVITY_FLUSH_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_FLUSH_INTERVAL_SECONDS", "30"))
+        # Timestamps held in memory before new ones are dropped (an early flush starts at half)
+        self.ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "100000"))
+        
+        # Background session reaper
+        self.SESSION_REAPER_ENABLED = os.getenv("SESSION_REAPER_ENABLED", "true").lower() == "true"
+        self.SESSION_REAPER_INTERVAL_SECONDS = float(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "300"))
+        # Expired/revoked sessions are kept this long before being deleted
+        self.SESSION_RETENTION_HOURS = float(os.getenv("SESSION_RETENTION_HOURS", "24"))
+        self.SESSION_REAPER_BATCH_SIZE = int(os.getenv("SESSION_REAPER_BATCH_SIZE", "1000"))
+        # 0 disables pacing between batches
+        self.SESSION_REAPER_MAX_ROWS_PER_SECOND = int(os.getenv("SESSION_REAPER_MAX_ROWS_PER_SECOND", "5000"))
+        # Daily user_session partitions the reaper keeps created ahead of today
+        self.SESSION_PARTITION_DAYS_AHEAD = int(os.getenv("SESSION_PARTITION_DAYS_AHEAD", "7"))
+        # Catch-all partition for expiries outside the daily ones; while it exists Postgres
+        # cannot DETACH ... CONCURRENTLY, so aged-out partitions are detached with a brief parent lock
+        self.SESSION_DEFAULT_PARTITION = os.getenv("SESSION_DEFAULT_PARTITION", "true").lower() == "true"
+        
+        # Logging pipeline
+        self.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+        # INFO/DEBUG lines per message template per second; 0 disables sampling
+        self.LOG_RATE_LIMIT_PER_SECOND = int(os.getenv("LOG_RATE_LIMIT_PER_SECOND", "20"))
+        self.LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
         
         if not self.DATABASE_URL:
             raise RuntimeError("DATABASE_URL is not set in environment")
+        if self.DATABASE_POOL_PRE_PING not in ("always", "idle", "never"):
+            raise RuntimeError("DATABASE_POOL_PRE_PING must be one of: always, idle, never")
         
         self._initialized = True
@@ -1,11 +1,16 @@
 # ============================================================================
 # database.py - Database Connection (Singleton Pattern)
 # ============================================================================
-from typing import Optional
-from sqlalchemy import create_engine
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import Pool
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from starlette.concurrency import run_in_threadpool
 from contextlib import contextmanager
 from .config import Config
+from .pooling import create_pooled_async_engine, create_pooled_engine
+from .replicas import ReplicaRouter
 Base = declarative_base()
 
 class DatabaseManager:
@@ -23,23 +28,73 @@ class DatabaseManager:
             return
             
         config = Config()
-        self.engine = create_engine(
-            config.DATABASE_URL,
-            pool_pre_ping=True,
-            pool_size=10,
-            max_overflow=20,
-        )
+        self.engine = create_pooled_engine(config.DATABASE_URL, "sync")
         self.SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
             bind=self.engine
         )
+        self.async_enabled = config.DATABASE_ASYNC
+        self._async_engine: Optional[AsyncEngine] = None
+        self._AsyncSessionLocal: Optional[async_sessionmaker] = None
+        self._direct_engine: Optional[Engine] = None
+        self.replicas = ReplicaRouter(
+            config.DATABASE_REPLICA_URLS,
+            config.DATABASE_REPLICA_MAX_LAG_SECONDS,
+            config.DATABASE_REPLICA_LAG_CHECK_SECONDS,
+        )
         self._initialized = True
     
+    @property
+    def async_engine(self) -> AsyncEngine:
+        """asyncpg engine, created on first use so sync-only processes never load the driver"""
+        if self._async_engine is None:
+            self._init_async()
+        return self._async_engine
+    
+    def _init_async(self) -> None:
+        self._async_engine = create_pooled_async_engine(Config().DATABASE_URL, "async")
+        # Objects stay usable after commit; lazy refreshes are not allowed under asyncio
+        self._AsyncSessionLocal = async_sessionmaker(
+            bind=self._async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    
+    @property
+    def direct_engine(self) -> Engine:
+        """
+        Engine for work that needs a real server session (LISTEN, session advisory
+        locks): DATABASE_DIRECT_URL when set, which bypasses PgBouncer, else the main engine.
+        """
+        config = Config()
+        if not config.DATABASE_DIRECT_URL:
+            return self.engine
+        if self._direct_engine is None:
+            # This URL bypasses PgBouncer, so it always gets a real pool
+            self._direct_engine = create_pooled_engine(config.DATABASE_DIRECT_URL, "direct", pgbouncer=False)
+        return self._direct_engine
+    
+    def pools(self) -> Dict[str, Pool]:
+        """Every pool this process has created, by metrics label"""
+        pools = {"sync": self.engine.pool}
+        if self._async_engine is not None:
+            pools["async"] = self._async_engine.pool
+        if self._direct_engine is not None:
+            pools["direct"] = self._direct_engine.pool
+        pools.update(self.replicas.pools())
+        return pools
+    
     def get_session(self) -> Session:
         """Get a new database session"""
         return self.SessionLocal()
     
+    def get_async_session(self) -> AsyncSession:
+        """Get a new async database session"""
+        if self._AsyncSessionLocal is None:
+            self._init_async()
+        return self._AsyncSessionLocal()
+    
     @contextmanager
     def session_scope(self):
         """Provide a transactional scope around operations"""
@@ -54,6 +109,26 @@ class DatabaseManager:
             session.close()
 
 
+class SyncSessionAdapter:
+    """Exposes a sync Session through the AsyncSession calls used by async repositories,
+    running each blocking call in the threadpool"""
+    
+    def __init__(self, session: Session):
+        self.sync_session = session
+    
+    async def execute(self, statement, params: Optional[dict] = None, **kwargs) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, statement, params, **kwargs)
+    
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+    
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+    
+    async def close(self) -> None:
+        await run_in_threadpool(self.sync_session.close)
+
+
 def get_db():
     """FastAPI dependency for database sessions"""
     db_manager = DatabaseManager()
@@ -61,4 +136,38 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    """FastAPI dependency for async database sessions"""
+    db_manager = DatabaseManager()
+    if db_manager.async_enabled:
+        async with db_manager.get_async_session() as db:
+            yield db
+    else:
+        db = SyncSessionAdapter(db_manager.get_session())
+        try:
+            yield db
+        finally:
+            await db.close()
+
+
+async def get_async_read_db():
+    """
+    FastAPI dependency for a read-only async session on a replica within the lag
+    budget; yields None when there is none and reads should use the primary.
+    """
+    db_manager = DatabaseManager()
+    index = db_manager.replicas.pick()
+    if index is None:
+        yield None
+    elif db_manager.async_enabled:
+        async with db_manager.replicas.get_async_session(index) as db:
+            yield db
+    else:
+        db = SyncSessionAdapter(db_manager.replicas.get_session(index))
+        try:
+            yield db
+        finally:
+            await db.close()
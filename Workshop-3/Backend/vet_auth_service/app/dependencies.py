@@ -2,13 +2,15 @@
 # dependencies.py - FastAPI Dependencies
 # ============================================================================
 from fastapi import Depends, Header, HTTPException, status, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import TYPE_CHECKING, Optional
 import logging
-from .database import get_db
-from .services import AuthService
-from .repositories import UserRepository, SessionRepository
+from .database import get_db, get_async_db, get_async_read_db
+from .services import AuthService, AsyncAuthService
+from .repositories import UserRepository, SessionRepository, AsyncUserRepository, AsyncSessionRepository, LoginThrottleRepository
 from .exceptions import InvalidSessionError
+from .principal import AuthenticatedUser
 
 if TYPE_CHECKING:
     from .models import AppUser
@@ -20,9 +22,19 @@ def get_auth_service(db: Session = Depends(get_db)) -> AuthService:
     """Dependency to get AuthService instance"""
     user_repo = UserRepository(db)
     session_repo = SessionRepository(db)
-    return AuthService(user_repo, session_repo)
+    return AuthService(user_repo, session_repo, throttle_repo=LoginThrottleRepository(db))
 
-def extract_bearer_token(
+async def get_async_auth_service(
+    db: AsyncSession = Depends(get_async_db),
+    read_db: Optional[AsyncSession] = Depends(get_async_read_db),
+) -> AsyncAuthService:
+    """Dependency to get AsyncAuthService instance"""
+    user_repo = AsyncUserRepository(db)
+    session_repo = AsyncSessionRepository(db)
+    replica_session_repo = AsyncSessionRepository(read_db) if read_db is not None else None
+    return AsyncAuthService(user_repo, session_repo, replica_session_repo=replica_session_repo)
+
+async def extract_bearer_token(
     authorization: Optional[str] = Header(default=None, alias="Authorization")
 ) -> str:
     """Extract and validate bearer token from Authorization header"""
@@ -53,13 +65,13 @@ def extract_bearer_token(
     
     return raw_token
 
-def get_current_user(
+async def get_current_user(
     raw_token: str = Depends(extract_bearer_token),
-    auth_service: AuthService = Depends(get_auth_service),
-):
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
+) -> AuthenticatedUser:
     """Dependency to get current authenticated user"""
     try:
-        return auth_service.validate_session(raw_token)
+        return await auth_service.validate_session(raw_token)
     except InvalidSessionError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -67,12 +79,21 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     except Exception as e:
-        logger.error(f"Unexpected error during authentication: {e}")
+        logger.error("Unexpected error during authentication: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request",
         )
 
+async def require_admin(current_user: AuthenticatedUser = Depends(get_current_user)) -> AuthenticatedUser:
+    """Dependency that only lets administrators through"""
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Administrator privileges required",
+        )
+    return current_user
+
 def get_client_info(request: Request) -> dict:
     """Extract client information from request"""
     return {
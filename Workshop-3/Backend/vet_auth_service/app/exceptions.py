@@ -25,6 +25,28 @@ class InvalidSessionError(AuthServiceException):
     """Session is invalid or expired"""
     pass
 
+class InvalidCursorError(AuthServiceException):
+    """Pagination cursor is malformed"""
+    pass
+
 class PasswordHashingError(AuthServiceException):
     """Error during password hashing"""
-    pass
\ No newline at end of file
+    pass
+
+class PasswordHasherUnavailableError(AuthServiceException):
+    """Password hashing pool cannot take the job right now"""
+    pass
+
+class PasswordHasherBusyError(PasswordHasherUnavailableError):
+    """Too many password hashing jobs already pending"""
+    pass
+
+class PasswordHashingTimeoutError(PasswordHasherUnavailableError):
+    """Password hashing job did not finish in time"""
+    pass
+
+class LoginThrottledError(AuthServiceException):
+    """Too many login attempts for this email or client address"""
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
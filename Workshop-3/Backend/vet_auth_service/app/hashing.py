@@ -0,0 +1,188 @@
+# ============================================================================
+# hashing.py - Password Hashing Worker Pool (Singleton Pattern)
+# ============================================================================
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, List, Optional, Sequence, Tuple
+from .config import Config
+from .metrics import PASSWORD_HASH_LATENCY
+from .exceptions import PasswordHasherBusyError, PasswordHashingError, PasswordHashingTimeoutError
+from .security import hash_password, verify_and_update_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """Singleton that runs bcrypt in a bounded pool of worker processes"""
+    _instance: Optional['PasswordHasher'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.workers = config.PASSWORD_HASH_WORKERS
+        self.max_pending = config.PASSWORD_HASH_MAX_PENDING
+        self.timeout_seconds = config.PASSWORD_HASH_TIMEOUT_SECONDS
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._initialized = True
+
+    def hash(self, password: str) -> str:
+        """Hash a password off the request thread"""
+        return self._timed("hash", hash_password, password)
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password off the request thread"""
+        return self._timed("verify", verify_password, password, password_hash)
+
+    def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Verify off the request thread, also returning a new hash when the stored one is outdated"""
+        return self._timed("verify", verify_and_update_password, password, password_hash)
+
+    def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch (bulk provisioning) across the worker processes, in order.
+        At most `workers` jobs of the batch are queued at a time, so a login
+        waits behind one batch job per worker rather than the whole batch; the
+        batch waits for its own jobs instead of being shed at max_pending.
+        """
+        if self.workers <= 0:
+            return [self.hash(password) for password in passwords]
+
+        hashes: List[Optional[str]] = [None] * len(passwords)
+        window: Deque[Tuple[int, float, ProcessPoolExecutor, Future]] = deque()
+        try:
+            for index, password in enumerate(passwords):
+                if len(window) >= self.workers:
+                    self._collect(window, hashes)
+                with self._lock:
+                    executor = self._ensure_executor()
+                    self.pending += 1
+                window.append((index, time.perf_counter(), executor, self._submit(executor, hash_password, password)))
+            while window:
+                self._collect(window, hashes)
+        finally:
+            for _, _, _, future in window:
+                future.cancel()
+        return hashes
+
+    def start(self) -> None:
+        """Create the worker pool ahead of the first request"""
+        if self.workers > 0:
+            with self._lock:
+                self._ensure_executor()
+
+    def shutdown(self) -> None:
+        """Stop the worker processes; queued jobs are cancelled"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """Pool counters for the admin stats endpoint"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts,
+            }
+
+    def _timed(self, operation: str, fn, *args):
+        start = time.perf_counter()
+        try:
+            return self._run(fn, *args)
+        finally:
+            PASSWORD_HASH_LATENCY.observe(time.perf_counter() - start, operation)
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(*args)
+
+        with self._lock:
+            # Shed load instead of queueing: a waiting caller still holds a request thread
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusyError("Password hashing capacity exhausted, retry shortly")
+            executor = self._ensure_executor()
+            self.pending += 1
+
+        return self._result(executor, self._submit(executor, fn, *args))
+
+    def _submit(self, executor: ProcessPoolExecutor, fn, *args) -> Future:
+        # The caller has already counted the job in pending
+        try:
+            future = executor.submit(fn, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            self._job_done(None)
+            self._discard(executor)
+            logger.error("Password hashing pool unavailable: %s", e)
+            raise PasswordHashingError("Failed to process password")
+
+        # The slot is freed when the job finishes, not when the caller gives up
+        future.add_done_callback(self._job_done)
+        return future
+
+    def _collect(self, window: Deque, hashes: List[Optional[str]]) -> None:
+        index, submitted, executor, future = window.popleft()
+        try:
+            hashes[index] = self._result(executor, future)
+        finally:
+            PASSWORD_HASH_LATENCY.observe(time.perf_counter() - submitted, "hash")
+
+    def _result(self, executor: ProcessPoolExecutor, future: Future):
+        try:
+            return future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timeouts += 1
+            logger.warning("Password hashing timed out after %ss", self.timeout_seconds)
+            raise PasswordHashingTimeoutError("Password hashing timed out, retry shortly")
+        except BrokenProcessPool as e:
+            self._discard(executor)
+            logger.error("Password hashing worker died: %s", e)
+            raise PasswordHashingError("Failed to process password")
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that holds DB connections and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info("Started password hashing pool with %s workers", self.workers)
+        return self._executor
+
+    def _job_done(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self.pending -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
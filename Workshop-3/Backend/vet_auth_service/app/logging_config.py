@@ -0,0 +1,149 @@
+# ============================================================================
+# logging_config.py - Non-blocking Logging Pipeline
+# ============================================================================
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from .config import Config
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "sampled_out"}
+
+# Distinct templates tracked by the rate limiter before its table is reset
+_MAX_TEMPLATES = 10000
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional['DeferredQueueHandler'] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        suppressed = getattr(record, "sampled_out", 0)
+        if suppressed:
+            entry["sampled_out"] = suppressed
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The original human-readable format, noting how many lines sampling dropped"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        suppressed = getattr(record, "sampled_out", 0)
+        return f"{line} [{suppressed} similar suppressed]" if suppressed else line
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Per-template rate limit for INFO and below.
+    Records are keyed by logger and unformatted message template, so
+    "Authentication successful: User %s" is one event however many users log in.
+    WARNING and above always pass.
+    """
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        # (logger, template) -> [window start, emitted in window, suppressed since last emit]
+        self._windows: Dict[tuple, List] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_second <= 0 or record.levelno >= logging.WARNING:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                if len(self._windows) >= _MAX_TEMPLATES:
+                    self._windows.clear()
+                window = self._windows[key] = [now, 0, 0]
+            if now - window[0] >= 1.0:
+                window[0], window[1] = now, 0
+            if window[1] >= self.per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.sampled_out = window[2]
+                window[2] = 0
+            return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread and drops
+    records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats on the caller's thread; the queue is in-process,
+        # so the record can cross it untouched
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging() -> None:
+    """Route the root logger through a background QueueListener (idempotent)"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+
+    config = Config()
+    log_queue: queue.Queue = queue.Queue(maxsize=config.LOG_QUEUE_SIZE)
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if config.LOG_FORMAT == "json" else TextFormatter())
+
+    _queue_handler = DeferredQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(config.LOG_RATE_LIMIT_PER_SECOND))
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(config.LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    _listener, _queue_handler = None, None
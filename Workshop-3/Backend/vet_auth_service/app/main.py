@@ -6,13 +6,17 @@ from contextlib import asynccontextmanager
 import logging
 from .routes import router
 from .config import Config
+from .database import DatabaseManager
+from .revocation import RevocationListener
+from .reaper import SessionReaper
+from .hashing import PasswordHasher
+from .activity import ActivityRecorder
+from .tokens import AccessTokenSigner
+from .security import check_password_backend
+from .metrics import MetricsMiddleware
+from .logging_config import configure_logging, shutdown_logging
 from fastapi.middleware.cors import CORSMiddleware
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-
 app_logger = logging.getLogger(__name__)
 
 @asynccontextmanager
@@ -23,14 +27,55 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     config = Config()
+    configure_logging()
     app_logger.info("Application starting...")
-    app_logger.info(f"Database URL configured: {bool(config.DATABASE_URL)}")
-    app_logger.info(f"Session expiry: {config.SESSION_EXPIRY_HOURS} hours")
+    app_logger.info("Database URL configured: %s", bool(config.DATABASE_URL))
+    app_logger.info("Session expiry: %s hours", config.SESSION_EXPIRY_HOURS)
+    
+    # Fail fast on missing signing keys or password backends rather than on the first login
+    AccessTokenSigner()
+    check_password_backend()
+    
+    password_hasher = PasswordHasher()
+    password_hasher.start()
+    
+    if config.DATABASE_PGBOUNCER and not config.DATABASE_DIRECT_URL and (
+        config.REVOCATION_LISTENER_ENABLED or config.SESSION_REAPER_ENABLED
+    ):
+        app_logger.warning(
+            "DATABASE_PGBOUNCER is set without DATABASE_DIRECT_URL: the revocation listener (LISTEN) "
+            "and the reaper lock need a session-mode connection and will not work in transaction mode"
+        )
+    
+    revocation_listener = None
+    if config.REVOCATION_LISTENER_ENABLED:
+        revocation_listener = RevocationListener()
+        revocation_listener.start()
+    
+    replicas = DatabaseManager().replicas
+    replicas.start()
+    
+    activity = ActivityRecorder()
+    activity.start()
+    
+    session_reaper = None
+    if config.SESSION_REAPER_ENABLED:
+        session_reaper = SessionReaper()
+        session_reaper.start()
     
     yield
     
-    # Shutdown (if you need cleanup logic)
+    # Shutdown
     app_logger.info("Application shutting down...")
+    if session_reaper is not None:
+        session_reaper.stop()
+    if revocation_listener is not None:
+        revocation_listener.stop()
+    replicas.stop()
+    # Final flush, so timestamps recorded since the last interval are not lost
+    activity.stop()
+    password_hasher.shutdown()
+    shutdown_logging()
 
 # Create FastAPI app with lifespan
 app = FastAPI(
@@ -48,5 +93,7 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 # Include routes
 app.include_router(router, tags=["auth"])
\ No newline at end of file
@@ -0,0 +1,386 @@
+# ============================================================================
+# metrics.py - Prometheus Metrics (Singleton Registry)
+# ============================================================================
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+ROW_COUNT_BUCKETS = (0, 10, 100, 1000, 10000, 100000, 1000000)
+BCRYPT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0, 5.0)
+
+# Distinct X-Client-Type values tracked before the rest are folded into "other"
+MAX_CLIENT_TYPES = 20
+# Any other request method is caller-controlled and is recorded as "other"
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "DELETE", "CONNECT", "OPTIONS", "TRACE", "PATCH"))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter, one series per label tuple"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect plus two adds under a lock"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last slot is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                le_label = f'le="{le}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le_label)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class RecentSamples:
+    """The last `size` observations per label, for percentiles over recent traffic only"""
+
+    def __init__(self, size: int = 1024):
+        self.size = size
+        self._series: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, label: str, value: float) -> None:
+        with self._lock:
+            series = self._series.get(label)
+            if series is None:
+                series = self._series[label] = deque(maxlen=self.size)
+            series.append(value)
+
+    def percentiles(self, label: str, quantiles: Tuple[float, ...] = (0.5, 0.95, 0.99)) -> Dict[str, float]:
+        """Nearest-rank percentiles plus max and sample count; empty if nothing was observed"""
+        with self._lock:
+            values = sorted(self._series.get(label, ()))
+        if not values:
+            return {"samples": 0}
+        result = {f"p{round(q * 100)}": values[min(int(q * len(values)), len(values) - 1)] for q in quantiles}
+        result["max"] = values[-1]
+        result["samples"] = len(values)
+        return result
+
+
+class GaugeCallback:
+    """Gauge read at scrape time from a callback returning {label tuple: value}"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...],
+        callback: Callable[[], Dict[Tuple[str, ...], float]],
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.callback().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """Singleton collection of this process's metrics"""
+    _instance: Optional['MetricsRegistry'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._metrics = []
+        self._initialized = True
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _pool_stats() -> Dict[str, Dict[Tuple[str, ...], float]]:
+    from .database import DatabaseManager
+
+    stats = {"checked_out": {}, "overflow": {}, "size": {}}
+    for label, pool in DatabaseManager().pools().items():
+        if isinstance(pool, QueuePool):
+            stats["checked_out"][(label,)] = pool.checkedout()
+            stats["overflow"][(label,)] = max(pool.overflow(), 0)
+            stats["size"][(label,)] = pool.size()
+    return stats
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    "vettrack_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+REPOSITORY_LATENCY = registry.register(Histogram(
+    "vettrack_repository_call_duration_seconds",
+    "Repository method latency",
+    ("repository", "method"),
+))
+PASSWORD_HASH_LATENCY = registry.register(Histogram(
+    "vettrack_password_hash_duration_seconds",
+    "bcrypt hash/verify latency as seen by the caller, including pool queueing",
+    ("operation",),
+    buckets=BCRYPT_BUCKETS,
+))
+POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "vettrack_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    ("engine",),
+))
+# Recent checkout waits per engine for GET /admin/pool percentiles
+POOL_CHECKOUT_SAMPLES = RecentSamples()
+LOGIN_ATTEMPTS = registry.register(Counter(
+    "vettrack_login_attempts_total",
+    "Login attempts by client type and outcome",
+    ("client_type", "outcome"),
+))
+LOGIN_THROTTLED = registry.register(Counter(
+    "vettrack_login_throttled_total",
+    "Login attempts rejected before password verification, by limiter",
+    ("scope",),
+))
+SESSION_REAPER_RUNS = registry.register(Counter(
+    "vettrack_session_reaper_runs_total",
+    "Session reaper runs by outcome",
+    ("outcome",),
+))
+SESSION_REAPER_ROWS = registry.register(Histogram(
+    "vettrack_session_reaper_rows_per_run",
+    "Expired or revoked sessions deleted per reaper run",
+    buckets=ROW_COUNT_BUCKETS,
+))
+SESSION_PARTITIONS_DROPPED = registry.register(Counter(
+    "vettrack_session_partitions_dropped_total",
+    "Daily user_session partitions dropped after passing retention",
+))
+registry.register(GaugeCallback(
+    "vettrack_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ("engine",),
+    lambda: _pool_stats()["checked_out"],
+))
+registry.register(GaugeCallback(
+    "vettrack_db_pool_overflow",
+    "Connections open beyond pool_size",
+    ("engine",),
+    lambda: _pool_stats()["overflow"],
+))
+registry.register(GaugeCallback(
+    "vettrack_db_pool_size",
+    "Configured pool_size",
+    ("engine",),
+    lambda: _pool_stats()["size"],
+))
+
+_client_types: set = set()
+_client_types_lock = threading.Lock()
+
+
+def client_type_label(client_type: Optional[str]) -> str:
+    """Bound label cardinality: X-Client-Type is caller-controlled"""
+    client_type = client_type or "unknown"
+    if client_type in _client_types:
+        return client_type
+    with _client_types_lock:
+        if len(_client_types) < MAX_CLIENT_TYPES and len(client_type) <= 32:
+            _client_types.add(client_type)
+            return client_type
+    return "other"
+
+
+def method_label(method: str) -> str:
+    """Bound label cardinality: any token is a valid HTTP method"""
+    return method if method in HTTP_METHODS else "other"
+
+
+def instrument_repository(cls):
+    """Class decorator timing every public method into REPOSITORY_LATENCY"""
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not callable(method):
+            continue
+        setattr(cls, name, _timed(method, cls.__name__, name))
+    return cls
+
+
+def _timed(method, repository: str, name: str):
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                REPOSITORY_LATENCY.observe(time.perf_counter() - start, repository, name)
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            REPOSITORY_LATENCY.observe(time.perf_counter() - start, repository, name)
+    return wrapper
+
+
+def _record_checkout_wait(engine_label: str, start: float) -> None:
+    waited = time.perf_counter() - start
+    POOL_CHECKOUT_WAIT.observe(waited, engine_label)
+    POOL_CHECKOUT_SAMPLES.add(engine_label, waited)
+
+
+class _InstrumentedPool:
+    """Records how long each checkout waited, labelled by engine"""
+    engine_label = "sync"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            _record_checkout_wait(self.engine_label, start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the label set on this one
+        pool = super().recreate()
+        pool.engine_label = self.engine_label
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+
+class InstrumentedAsyncAdaptedQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+    engine_label = "async"
+
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    """NullPool (PgBouncer mode); every checkout opens a connection, which is what it waits on"""
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware timing each request against its route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; templates keep label cardinality bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method_label(scope["method"]),
+                route.path if route is not None else "unmatched",
+                str(status_code),
+            )
@@ -3,10 +3,15 @@ from uuid import uuid4
 
 from sqlalchemy import (
     Boolean,
+    CheckConstraint,
     Column,
     DateTime,
+    Enum,
     ForeignKey,
-    String,
+    Identity,
+    Index,
+    Integer,
+    LargeBinary,
     Text,
     func,
     text,
@@ -26,7 +31,7 @@ class AppUser(Base):
     )
     name = Column(Text, nullable=False)
     email = Column(CITEXT, unique=True, nullable=False)
-    role = Column(String, nullable=False, server_default=text("'vet'"))
+    role = Column(Enum("vet", "admin", name="user_role"), nullable=False, server_default=text("'vet'"))
     password_hash = Column(Text, nullable=False)
     status = Column(Boolean, nullable=False, server_default=text("TRUE"))
     last_login_at = Column(DateTime(timezone=True))
@@ -47,6 +52,45 @@ class AppUser(Base):
 
 class UserSession(Base):
     __tablename__ = "user_session"
+    # Daily partitions are managed by app.partitions; expires_at is part of the
+    # primary key because Postgres requires the partition key in unique constraints.
+    # Keep the indexes in step with migrations/versions.
+    __table_args__ = (
+        Index("idx_user_session_user_id", "user_id"),
+        Index(
+            "uq_user_session_active_digest",
+            "token_digest",
+            "expires_at",
+            unique=True,
+            postgresql_include=["id", "user_id"],
+            postgresql_where=text("revoked_at IS NULL AND token_digest IS NOT NULL"),
+        ),
+        Index(
+            "uq_user_session_active_token",
+            "token_hash",
+            "expires_at",
+            unique=True,
+            postgresql_include=["id", "user_id"],
+            postgresql_where=text("revoked_at IS NULL AND token_hash IS NOT NULL"),
+        ),
+        Index(
+            "idx_user_session_active_by_user",
+            "user_id",
+            "expires_at",
+            postgresql_where=text("revoked_at IS NULL"),
+        ),
+        Index(
+            "idx_user_session_active_listing",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_include=["expires_at", "client_agent_id", "ip_address", "user_agent"],
+            postgresql_where=text("revoked_at IS NULL"),
+        ),
+        CheckConstraint("token_digest IS NOT NULL OR token_hash IS NOT NULL", name="ck_user_session_token_present"),
+        CheckConstraint("octet_length(token_digest) = 32", name="ck_user_session_token_digest_length"),
+        {"postgresql_partition_by": "RANGE (expires_at)"},
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -58,15 +102,49 @@ class UserSession(Base):
         ForeignKey("app_user.id", ondelete="CASCADE"),
         nullable=False,
     )
-    token_hash = Column(Text, nullable=False)
+    # SHA-256 of the raw token: 32 raw bytes in compact rows, 64 hex chars in legacy rows
+    token_digest = Column(LargeBinary)
+    token_hash = Column(Text)
     created_at = Column(
         DateTime(timezone=True),
         nullable=False,
         server_default=func.now(),
     )
-    expires_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), primary_key=True)
     revoked_at = Column(DateTime(timezone=True))
-    user_agent = Column(Text)
+    # Written behind by app.activity, so it trails the latest request by up to the flush interval
+    last_seen_at = Column(DateTime(timezone=True))
+    client_agent_id = Column(Integer, ForeignKey("client_agent.id"))
+    legacy_user_agent = Column("user_agent", Text)
     ip_address = Column(INET)
 
     user = relationship("AppUser", back_populates="sessions")
+    # Joined eagerly: the table is tiny and lazy loads are not allowed under asyncio
+    client_agent = relationship("ClientAgent", lazy="joined")
+
+    @property
+    def token_hash_hex(self) -> str:
+        """Hex token hash whichever format the row was written in (cache and revocation key)"""
+        return self.token_digest.hex() if self.token_digest is not None else self.token_hash
+
+    @property
+    def user_agent(self):
+        return self.client_agent.user_agent if self.client_agent is not None else self.legacy_user_agent
+
+
+# Dictionary of client agent strings, so compact session rows carry a 4-byte id
+class ClientAgent(Base):
+    __tablename__ = "client_agent"
+
+    id = Column(Integer, Identity(always=True), primary_key=True)
+    user_agent = Column(Text, nullable=False, unique=True)
+
+
+# Shared login throttle state: one theoretical arrival time per key. UNLOGGED
+# because losing it in a crash only resets the limits.
+class LoginThrottleState(Base):
+    __tablename__ = "login_throttle"
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key = Column(Text, primary_key=True)
+    tat = Column(DateTime(timezone=True), nullable=False)
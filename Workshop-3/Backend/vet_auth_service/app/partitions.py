@@ -0,0 +1,193 @@
+# ============================================================================
+# partitions.py - Daily user_session Partitions
+# ============================================================================
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Set
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "user_session"
+DEFAULT_PARTITION = "user_session_default"
+_PARTITION_NAME = re.compile(r"^user_session_p(\d{8})$")
+_CHECK_VIOLATION = "23514"
+
+# DDL on a partition briefly locks the parent; give up rather than queue behind a long transaction
+DDL_LOCK_TIMEOUT = "2s"
+
+# Days whose partition is blocked by rows in the default partition, already logged by this worker
+_reported_conflicts: Set[date] = set()
+
+_IS_PARTITIONED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table))"
+)
+_CHILDREN = text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = to_regclass(:table)"
+)
+_HAS_DEFAULT = text(
+    "SELECT partdefid <> 0 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"
+)
+_PENDING_DETACH = text(
+    "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = to_regclass(:table) AND i.inhdetachpending"
+)
+# Daily partitions detached by a run that stopped before dropping them
+_DETACHED = text(
+    "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' AND NOT c.relispartition "
+    "AND c.relname LIKE 'user\\_session\\_p%' AND pg_table_is_visible(c.oid)"
+)
+_COUNT_DEFAULT_ROWS = text(
+    f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE expires_at >= :lower AND expires_at < :upper"
+)
+
+
+def partition_name(day: date) -> str:
+    return f"user_session_p{day:%Y%m%d}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """False for databases still on the unpartitioned schema"""
+    return bool(connection.execute(_IS_PARTITIONED, {"table": PARENT_TABLE}).scalar())
+
+
+def existing_partitions(connection: Connection) -> Dict[date, str]:
+    """Daily partitions by the UTC day they cover"""
+    partitions = {}
+    for name in connection.execute(_CHILDREN, {"table": PARENT_TABLE}).scalars():
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions[datetime.strptime(match.group(1), "%Y%m%d").date()] = name
+    return partitions
+
+
+def ensure_default_partition(connection: Connection) -> None:
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT"
+    ))
+    connection.commit()
+
+
+def create_partitions(connection: Connection, first_day: date, last_day: date) -> List[str]:
+    """Create the missing daily partitions covering [first_day, last_day], returns names created"""
+    existing = existing_partitions(connection)
+    created = []
+    day = first_day
+    while day <= last_day:
+        if day not in existing:
+            lower = datetime.combine(day, time.min, tzinfo=timezone.utc)
+            upper = lower + timedelta(days=1)
+            name = partition_name(day)
+            try:
+                _execute_ddl(connection, (
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+                ))
+                created.append(name)
+                _reported_conflicts.discard(day)
+            except DBAPIError as e:
+                connection.rollback()
+                if getattr(e.orig, "pgcode", None) == _CHECK_VIOLATION:
+                    _report_default_conflict(connection, day, lower, upper)
+                else:
+                    logger.warning("Partition maintenance skipped, will retry next run: %s", e)
+        day += timedelta(days=1)
+    return created
+
+
+def _report_default_conflict(connection: Connection, day: date, lower: datetime, upper: datetime) -> None:
+    """
+    The default partition already holds rows for this day, so the partition cannot be
+    attached until they are moved or expire. Retrying every run cannot fix that; say so once.
+    """
+    if day in _reported_conflicts:
+        return
+    rows = connection.execute(_COUNT_DEFAULT_ROWS, {"lower": lower, "upper": upper}).scalar()
+    connection.rollback()
+    _reported_conflicts.add(day)
+    logger.error(
+        "Cannot create partition %s: %s rows for that day are in %s. Move them out "
+        "(or wait for them to be reaped) and the next run will create it",
+        partition_name(day), rows, DEFAULT_PARTITION,
+    )
+
+
+def drop_partitions_before(connection: Connection, cutoff: datetime) -> List[str]:
+    """
+    Detach and drop every daily partition whose whole range ends at or before cutoff,
+    returns names dropped. Partitions an earlier run left half-detached or detached
+    but not dropped are finished first.
+    """
+    concurrently = not connection.execute(_HAS_DEFAULT, {"table": PARENT_TABLE}).scalar()
+    pending = set(connection.execute(_PENDING_DETACH, {"table": PARENT_TABLE}).scalars())
+    detached = {name for name in connection.execute(_DETACHED).scalars() if _before(name, cutoff)}
+    aged_out = sorted(
+        name for name in existing_partitions(connection).values()
+        if _before(name, cutoff) and name not in pending
+    )
+    connection.commit()
+
+    for name in sorted(pending):
+        if _run_autocommit_ddl(connection, f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name} FINALIZE"):
+            detached.add(name)
+    for name in aged_out:
+        # Postgres refuses CONCURRENTLY while the parent has a default partition; a plain
+        # DETACH then holds the parent lock only for the catalog update, not for the drop
+        statement = f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"
+        if concurrently:
+            done = _run_autocommit_ddl(connection, f"{statement} CONCURRENTLY")
+        else:
+            done = _run_ddl(connection, statement)
+        if done:
+            detached.add(name)
+
+    # Detached tables no longer share a lock with user_session
+    return [name for name in sorted(detached) if _run_ddl(connection, f"DROP TABLE IF EXISTS {name}")]
+
+
+def _before(name: str, cutoff: datetime) -> bool:
+    """True for a daily partition name whose whole day ends at or before cutoff"""
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return False
+    day = datetime.strptime(match.group(1), "%Y%m%d").date()
+    return datetime.combine(day, time.min, tzinfo=timezone.utc) + timedelta(days=1) <= cutoff
+
+
+def _run_autocommit_ddl(connection: Connection, statement: str) -> bool:
+    """
+    For DETACH ... CONCURRENTLY / FINALIZE, which cannot run inside a transaction block.
+    SET LOCAL has no effect outside one, so lock_timeout is set for the session and reset.
+    """
+    connection.execution_options(isolation_level="AUTOCOMMIT")
+    try:
+        connection.execute(text(f"SET lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+        connection.execute(text(statement))
+        return True
+    except DBAPIError as e:
+        logger.warning("Partition maintenance skipped, will retry next run: %s", e)
+        return False
+    finally:
+        connection.execute(text("RESET lock_timeout"))
+        connection.commit()
+        connection.execution_options(isolation_level=connection.default_isolation_level)
+
+
+def _execute_ddl(connection: Connection, statement: str) -> None:
+    connection.execute(text(f"SET LOCAL lock_timeout = '{DDL_LOCK_TIMEOUT}'"))
+    connection.execute(text(statement))
+    connection.commit()
+
+
+def _run_ddl(connection: Connection, statement: str) -> bool:
+    try:
+        _execute_ddl(connection, statement)
+        return True
+    except DBAPIError as e:
+        connection.rollback()
+        logger.warning("Partition maintenance skipped, will retry next run: %s", e)
+        return False
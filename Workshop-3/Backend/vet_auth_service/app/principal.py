@@ -0,0 +1,16 @@
+# ============================================================================
+# principal.py - Authenticated Principal (Value Object)
+# ============================================================================
+from datetime import datetime
+from typing import NamedTuple
+from uuid import UUID
+
+
+class AuthenticatedUser(NamedTuple):
+    """Immutable snapshot of the user behind a validated session"""
+    id: UUID
+    name: str
+    email: str
+    role: str
+    session_id: UUID
+    expires_at: datetime
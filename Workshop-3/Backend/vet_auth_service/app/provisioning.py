@@ -0,0 +1,84 @@
+# ============================================================================
+# provisioning.py - Bulk User Provisioning Input
+# ============================================================================
+import csv
+import io
+import json
+from typing import List, NamedTuple, Optional
+from uuid import UUID
+from pydantic import ValidationError
+from .schemas import UserRegisterRequest
+
+FORMATS = ("csv", "ndjson")
+CSV_COLUMNS = ("name", "email", "password")
+
+
+class ProvisionRow(NamedTuple):
+    """One input record: a validated registration, or why it could not be read"""
+    line: int
+    request: Optional[UserRegisterRequest]
+    error: Optional[str] = None
+
+
+class ProvisionResult(NamedTuple):
+    """Outcome for one input record: "created", "duplicate" or "invalid" """
+    line: int
+    email: Optional[str]
+    status: str
+    id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+def parse_users(body: str, content_format: str) -> List[ProvisionRow]:
+    """
+    Read CSV (header row with name,email,password) or NDJSON (one object per
+    line) into rows validated like POST /register. Blank lines are skipped;
+    a record that cannot be read becomes an error row instead of failing the
+    batch. Raises ValueError only when the input as a whole is unusable.
+    """
+    if content_format == "csv":
+        return _parse_csv(body)
+    if content_format == "ndjson":
+        return _parse_ndjson(body)
+    raise ValueError(f"Unknown format {content_format!r}; expected one of {', '.join(FORMATS)}")
+
+
+def _parse_csv(body: str) -> List[ProvisionRow]:
+    reader = csv.DictReader(io.StringIO(body))
+    missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"CSV header is missing {', '.join(missing)}")
+    # line_num counts physical lines, so quoted newlines still point at the right record
+    return [
+        _validate(reader.line_num, {column: record[column] for column in CSV_COLUMNS})
+        for record in reader
+        if any(record.values())
+    ]
+
+
+def _parse_ndjson(body: str) -> List[ProvisionRow]:
+    rows = []
+    for line, text in enumerate(body.splitlines(), start=1):
+        if not text.strip():
+            continue
+        try:
+            record = json.loads(text)
+        except json.JSONDecodeError as e:
+            rows.append(ProvisionRow(line, None, f"Invalid JSON: {e.msg}"))
+            continue
+        if not isinstance(record, dict):
+            rows.append(ProvisionRow(line, None, "Expected a JSON object"))
+            continue
+        rows.append(_validate(line, record))
+    return rows
+
+
+def _validate(line: int, record: dict) -> ProvisionRow:
+    try:
+        return ProvisionRow(line, UserRegisterRequest.model_validate(record))
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        )
+        return ProvisionRow(line, None, problems)
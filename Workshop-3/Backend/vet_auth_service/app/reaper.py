@@ -0,0 +1,140 @@
+# ============================================================================
+# reaper.py - Background Session Reaper
+# ============================================================================
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from .config import Config
+from .metrics import SESSION_PARTITIONS_DROPPED, SESSION_REAPER_ROWS, SESSION_REAPER_RUNS
+from . import partitions
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key; every worker competes for it, one reaps per interval
+REAPER_LOCK_KEY = 0x7665745F72656170
+
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+_UNLOCK = text("SELECT pg_advisory_unlock(:key)")
+
+
+class SessionReaper:
+    """
+    Background thread that deletes expired and revoked sessions past retention.
+    On a partitioned user_session it also creates upcoming daily partitions and
+    drops whole partitions that have aged out, leaving only revoked sessions and
+    stragglers in the default partition to the batched DELETE.
+    """
+
+    def __init__(self, engine: Optional[Engine] = None):
+        config = Config()
+        self.interval_seconds = config.SESSION_REAPER_INTERVAL_SECONDS
+        self.retention = timedelta(hours=config.SESSION_RETENTION_HOURS)
+        self.batch_size = config.SESSION_REAPER_BATCH_SIZE
+        self.max_rows_per_second = config.SESSION_REAPER_MAX_ROWS_PER_SECOND
+        self.partition_days_ahead = config.SESSION_PARTITION_DAYS_AHEAD
+        self.default_partition = config.SESSION_DEFAULT_PARTITION
+        self._engine = engine
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run_rows = 0
+
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            from .database import DatabaseManager
+            # The reaper lock is a session-level advisory lock; PgBouncer transaction mode would lose it
+            self._engine = DatabaseManager().direct_engine
+        return self._engine
+
+    def start(self) -> None:
+        """Start reaping in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="session-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the reaper; a run in progress stops after its current batch"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> Optional[int]:
+        """
+        Reap in batches until nothing is left, returns rows deleted.
+        Returns None when another worker holds the reaper lock.
+        """
+        from .repositories import LoginThrottleRepository, SessionRepository
+
+        cutoff = datetime.now(timezone.utc) - self.retention
+        # One connection for the whole run: the advisory lock is held by the connection,
+        # while every batch commits on its own so row locks are short-lived
+        with self.engine.connect() as connection:
+            if not connection.execute(_TRY_LOCK, {"key": REAPER_LOCK_KEY}).scalar():
+                connection.rollback()
+                SESSION_REAPER_RUNS.inc("skipped")
+                return None
+            partitioned = partitions.is_partitioned(connection)
+            connection.commit()
+
+            total = 0
+            if partitioned:
+                self._maintain_partitions(connection, cutoff)
+            db = Session(bind=connection, autoflush=False)
+            try:
+                repository = SessionRepository(db)
+                while not self._stop.is_set():
+                    started = time.monotonic()
+                    deleted = repository.delete_reapable(cutoff, self.batch_size)
+                    total += deleted
+                    if deleted < self.batch_size:
+                        break
+                    self._pace(deleted, time.monotonic() - started)
+                # Fully refilled login throttle buckets carry no state
+                LoginThrottleRepository(db).delete_expired()
+            finally:
+                db.close()
+                connection.execute(_UNLOCK, {"key": REAPER_LOCK_KEY})
+                connection.commit()
+
+        self.last_run_rows = total
+        SESSION_REAPER_RUNS.inc("completed")
+        SESSION_REAPER_ROWS.observe(total)
+        if total:
+            logger.info("Session reaper deleted %s sessions older than %s", total, cutoff.isoformat())
+        return total
+
+    def _maintain_partitions(self, connection, cutoff: datetime) -> None:
+        today = datetime.now(timezone.utc).date()
+        if self.default_partition:
+            partitions.ensure_default_partition(connection)
+        created = partitions.create_partitions(connection, today, today + timedelta(days=self.partition_days_ahead))
+        dropped = partitions.drop_partitions_before(connection, cutoff)
+        SESSION_PARTITIONS_DROPPED.inc(amount=len(dropped))
+        if created:
+            logger.info("Created session partitions: %s", ", ".join(created))
+        if dropped:
+            logger.info("Dropped session partitions: %s", ", ".join(dropped))
+
+    def _pace(self, deleted: int, elapsed: float) -> None:
+        """Sleep so the run stays under max_rows_per_second"""
+        if self.max_rows_per_second <= 0:
+            return
+        pause = deleted / self.max_rows_per_second - elapsed
+        if pause > 0:
+            self._stop.wait(pause)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                SESSION_REAPER_RUNS.inc("error")
+                logger.error("Session reaper run failed: %s", e)
+            self._stop.wait(self.interval_seconds)
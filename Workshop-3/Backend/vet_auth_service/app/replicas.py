@@ -0,0 +1,139 @@
+# ============================================================================
+# replicas.py - Lag-Aware Read Replica Routing
+# ============================================================================
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import Pool
+from .pooling import create_pooled_async_engine, create_pooled_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction; 0 when the replica has replayed everything it
+# received (an idle primary sends nothing) or is not a streaming standby at all
+_LAG = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaRouter:
+    """
+    Chooses a read replica for session validation. A background thread polls
+    each replica's replay lag; replicas that lag by more than max_lag_seconds or
+    cannot be reached are skipped, and with none left reads go to the primary.
+    Engines are created on first use, one sync and one async per replica.
+    """
+
+    def __init__(self, urls: Sequence[str], max_lag_seconds: float, check_interval_seconds: float):
+        self.urls = list(urls)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval_seconds = check_interval_seconds
+        # None until measured, and while a replica is unreachable
+        self.lag: List[Optional[float]] = [None] * len(self.urls)
+        self._engines: List[Optional[Engine]] = [None] * len(self.urls)
+        self._async_engines: List[Optional[AsyncEngine]] = [None] * len(self.urls)
+        self._async_sessions: List[Optional[async_sessionmaker]] = [None] * len(self.urls)
+        self._sessions: List[Optional[sessionmaker]] = [None] * len(self.urls)
+        self._round_robin = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.urls)
+
+    def pick(self) -> Optional[int]:
+        """Index of a replica within the lag budget, or None to read from the primary"""
+        healthy = [
+            index for index, lag in enumerate(self.lag)
+            if lag is not None and lag <= self.max_lag_seconds
+        ]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    def check_lag(self) -> List[Optional[float]]:
+        """Measure every replica's lag now"""
+        for index in range(len(self.urls)):
+            try:
+                with self.engine(index).connect() as connection:
+                    self.lag[index] = float(connection.execute(_LAG).scalar())
+            except SQLAlchemyError as e:
+                if self.lag[index] is not None:
+                    logger.warning("Read replica %s unreachable, reading from the primary: %s", index, e)
+                self.lag[index] = None
+        return list(self.lag)
+
+    def engine(self, index: int) -> Engine:
+        with self._lock:
+            if self._engines[index] is None:
+                self._engines[index] = create_pooled_engine(self.urls[index], f"replica{index}")
+                self._sessions[index] = sessionmaker(autocommit=False, autoflush=False, bind=self._engines[index])
+            return self._engines[index]
+
+    def get_session(self, index: int) -> Session:
+        self.engine(index)
+        return self._sessions[index]()
+
+    def get_async_session(self, index: int) -> AsyncSession:
+        with self._lock:
+            if self._async_sessions[index] is None:
+                self._async_engines[index] = create_pooled_async_engine(self.urls[index], f"async_replica{index}")
+                self._async_sessions[index] = async_sessionmaker(
+                    bind=self._async_engines[index],
+                    autoflush=False,
+                    expire_on_commit=False,
+                )
+            return self._async_sessions[index]()
+
+    def pools(self) -> Dict[str, Pool]:
+        """Pools created so far, by metrics label"""
+        pools = {}
+        for index, engine in enumerate(self._engines):
+            if engine is not None:
+                pools[f"replica{index}"] = engine.pool
+        for index, async_engine in enumerate(self._async_engines):
+            if async_engine is not None:
+                pools[f"async_replica{index}"] = async_engine.pool
+        return pools
+
+    def start(self) -> None:
+        """Start polling replica lag in a daemon thread"""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.urls),
+            "max_lag_seconds": self.max_lag_seconds,
+            "lag_seconds": list(self.lag),
+        }
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.check_lag()
+            except Exception as e:
+                logger.error("Replica lag check failed: %s", e)
+            self._stop.wait(max(self.check_interval_seconds - (time.monotonic() - started), 0))
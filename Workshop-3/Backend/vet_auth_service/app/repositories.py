@@ -1,16 +1,152 @@
 # ============================================================================
 # repositories.py - Data Access Layer (Repository Pattern)
 # ============================================================================
-from sqlalchemy.orm import Session
+from sqlalchemy import any_, bindparam, cast, column, delete, false, func, or_, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import ARRAY, CIDR
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.types import LargeBinary, Text
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from typing import Optional, List
-from datetime import datetime, timezone
+from typing import Dict, Optional, List, Sequence, Set, Tuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from uuid import UUID
 import logging
+from .config import Config
 from .exceptions import UserAlreadyExistsError
+from .principal import AuthenticatedUser
+from .metrics import instrument_repository
+from .revocation import (
+    publish_token_revocation,
+    publish_token_revocations,
+    publish_user_revocation,
+    publish_token_revocation_async,
+    publish_user_revocation_async,
+)
 
 logger = logging.getLogger(__name__)
 
+
+def _principal_columns():
+    from .models import AppUser, UserSession
+    # Same order as the AuthenticatedUser fields, so rows map straight onto it
+    return (AppUser.id, AppUser.name, AppUser.email, AppUser.role, UserSession.id, UserSession.expires_at)
+
+
+def _valid_session_filter():
+    from .models import AppUser, UserSession
+    return (
+        UserSession.expires_at > bindparam("now"),
+        UserSession.revoked_at.is_(None),
+        AppUser.status.is_(True),
+    )
+
+
+@lru_cache(maxsize=None)
+def _principal_by_token(column: str):
+    """
+    Core SELECT of just the principal columns, keyed by "token_digest" (compact rows)
+    or "token_hash" (legacy rows); built once so its cache key is computed once
+    """
+    from .models import AppUser, UserSession
+    return (
+        select(*_principal_columns())
+        .join_from(UserSession, AppUser, UserSession.user_id == AppUser.id)
+        .where(getattr(UserSession, column) == bindparam("token"), *_valid_session_filter())
+        .limit(1)
+    )
+
+
+@lru_cache(maxsize=None)
+def _principals_by_tokens(column: str):
+    """Batch variant; one array parameter keeps the statement text identical for every batch size"""
+    from .models import AppUser, UserSession
+    key = getattr(UserSession, column)
+    element_type = LargeBinary if column == "token_digest" else Text
+    return (
+        select(key, *_principal_columns())
+        .join_from(UserSession, AppUser, UserSession.user_id == AppUser.id)
+        .where(
+            key == any_(bindparam("tokens", type_=ARRAY(element_type))),
+            *_valid_session_filter(),
+        )
+    )
+
+
+@lru_cache(maxsize=None)
+def _active_sessions_page(after: bool):
+    """
+    One page of a user's active sessions, newest first. The keyset bound on
+    (created_at, id) replaces OFFSET, so every page costs the same index range
+    scan; id breaks ties between sessions created in the same transaction.
+    """
+    from .models import ClientAgent, UserSession
+    query = (
+        select(
+            UserSession.id,
+            UserSession.created_at,
+            UserSession.expires_at,
+            func.coalesce(ClientAgent.user_agent, UserSession.legacy_user_agent).label("user_agent"),
+            UserSession.ip_address,
+        )
+        .outerjoin(ClientAgent, UserSession.client_agent_id == ClientAgent.id)
+        .where(
+            UserSession.user_id == bindparam("user_id"),
+            UserSession.revoked_at.is_(None),
+            UserSession.expires_at > bindparam("now"),
+        )
+        .order_by(UserSession.created_at.desc(), UserSession.id.desc())
+        .limit(bindparam("limit"))
+    )
+    if after:
+        query = query.where(
+            tuple_(UserSession.created_at, UserSession.id)
+            < tuple_(
+                bindparam("after_created_at", type_=UserSession.created_at.type),
+                bindparam("after_id", type_=UserSession.id.type),
+            )
+        )
+    return query
+
+
+def _digest(token_hash: str) -> Optional[bytes]:
+    """Raw SHA-256 bytes of a hex token hash; None for anything that is not one"""
+    try:
+        return bytes.fromhex(token_hash)
+    except ValueError:
+        return None
+
+
+def _token_filter(token_hash: str, legacy_reads: bool):
+    """ORM filter matching a session in either row format"""
+    from .models import UserSession
+    digest = _digest(token_hash)
+    # Comparing with None would render IS NULL and match every legacy row
+    digest_match = UserSession.token_digest == digest if digest is not None else false()
+    return or_(digest_match, UserSession.token_hash == token_hash) if legacy_reads else digest_match
+
+
+# Client agent string -> client_agent.id, shared by every repository in the process
+_client_agent_ids: Dict[str, int] = {}
+MAX_CACHED_CLIENT_AGENTS = 1024
+MAX_CLIENT_AGENT_LENGTH = 256
+
+
+def _remember_client_agent(agent: Optional[Tuple[str, int]]) -> None:
+    # Only once committed: a rolled-back insert must not leave a dangling id behind
+    if agent is None:
+        return
+    if len(_client_agent_ids) >= MAX_CACHED_CLIENT_AGENTS:
+        _client_agent_ids.clear()
+    _client_agent_ids[agent[0]] = agent[1]
+
+
+# Rows per multi-row INSERT/UPDATE in bulk statements (3 parameters each)
+INSERT_CHUNK_ROWS = 1000
+
+@instrument_repository
 class UserRepository:
     """Repository for User data access"""
     
@@ -23,7 +159,7 @@ class UserRepository:
             from .models import AppUser
             return self.db.query(AppUser).filter(AppUser.email == email).first()
         except SQLAlchemyError as e:
-            logger.error(f"Database error finding user by email: {e}")
+            logger.error("Database error finding user by email: %s", e)
             raise
     
     def find_by_id(self, user_id: UUID) -> Optional['AppUser']:
@@ -32,7 +168,7 @@ class UserRepository:
             from .models import AppUser
             return self.db.query(AppUser).filter(AppUser.id == user_id).first()
         except SQLAlchemyError as e:
-            logger.error(f"Database error finding user by ID: {e}")
+            logger.error("Database error finding user by ID: %s", e)
             raise
     
     def create(self, name: str, email: str, password_hash: str) -> 'AppUser':
@@ -53,7 +189,44 @@ class UserRepository:
             raise UserAlreadyExistsError("User with this email already exists")
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error creating user: {e}")
+            logger.error("Database error creating user: %s", e)
+            raise
+    
+    def find_existing_emails(self, emails: Sequence[str]) -> Set[str]:
+        """The given emails that already have an account, lowercased"""
+        try:
+            from .models import AppUser
+            if not emails:
+                return set()
+            rows = self.db.execute(select(AppUser.email).where(AppUser.email.in_(emails)))
+            return {email.lower() for email in rows.scalars()}
+        except SQLAlchemyError as e:
+            logger.error("Database error finding existing emails: %s", e)
+            raise
+    
+    def create_many(self, users: Sequence[Dict[str, str]]) -> Dict[str, UUID]:
+        """
+        Insert users (name, email, password_hash) with multi-row
+        INSERT ... ON CONFLICT (email) DO NOTHING and a single commit.
+        Returns: lowercased email -> id of every user inserted; emails that
+        were taken in the meantime are skipped rather than failing the batch
+        """
+        try:
+            from .models import AppUser
+            created: Dict[str, UUID] = {}
+            for start in range(0, len(users), INSERT_CHUNK_ROWS):
+                result = self.db.execute(
+                    pg_insert(AppUser)
+                    .values(list(users[start:start + INSERT_CHUNK_ROWS]))
+                    .on_conflict_do_nothing(index_elements=[AppUser.email])
+                    .returning(AppUser.id, AppUser.email)
+                )
+                created.update((email.lower(), user_id) for user_id, email in result)
+            self.db.commit()
+            return created
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error creating users: %s", e)
             raise
     
     def update_last_login(self, user: 'AppUser') -> None:
@@ -63,7 +236,7 @@ class UserRepository:
             self.db.commit()
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error updating last login: {e}")
+            logger.error("Database error updating last login: %s", e)
             raise
     
     def update_password(self, user: 'AppUser', new_password_hash: str) -> None:
@@ -73,15 +246,48 @@ class UserRepository:
             self.db.commit()
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error updating password: {e}")
+            logger.error("Database error updating password: %s", e)
+            raise
+
+    def replace_password_hash(self, user: 'AppUser', new_password_hash: str) -> bool:
+        """Swap in an upgraded hash, unless the password changed since user was loaded"""
+        try:
+            from .models import AppUser
+            result = self.db.execute(
+                update(AppUser)
+                .where(AppUser.id == user.id, AppUser.password_hash == user.password_hash)
+                .values(password_hash=new_password_hash)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            return result.rowcount == 1
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error replacing password hash: %s", e)
+            raise
+
+    def update_status(self, user: 'AppUser', active: bool) -> None:
+        """Activate or deactivate a user account"""
+        try:
+            user.status = active
+            if not active:
+                publish_user_revocation(self.db, user.id)
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error updating user status: %s", e)
             raise
 
 
+@instrument_repository
 class SessionRepository:
     """Repository for Session data access"""
     
     def __init__(self, db: Session):
         self.db = db
+        config = Config()
+        self.compact_rows = config.SESSION_ROW_FORMAT == "compact"
+        self.legacy_reads = config.SESSION_LEGACY_READS
     
     def create(
         self,
@@ -94,22 +300,85 @@ class SessionRepository:
         """Create a new session"""
         try:
             from .models import UserSession
-            session = UserSession(
-                user_id=user_id,
-                token_hash=token_hash,
-                expires_at=expires_at,
-                user_agent=user_agent,
-                ip_address=ip_address,
-            )
+            values, agent = self._new_session_values(token_hash, user_agent)
+            session = UserSession(user_id=user_id, expires_at=expires_at, ip_address=ip_address, **values)
             self.db.add(session)
             self.db.commit()
+            _remember_client_agent(agent)
             self.db.refresh(session)
             return session
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error creating session: {e}")
+            logger.error("Database error creating session: %s", e)
+            raise
+    
+    def create_for_login(
+        self,
+        user_id: UUID,
+        token_hash: str,
+        expires_at: datetime,
+        user_agent: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        last_login_at: Optional[datetime] = None,
+    ) -> Tuple[UUID, datetime]:
+        """
+        Insert a login's session and, when last_login_at is given, stamp the user
+        in the same statement (a data-modifying CTE) and the same commit.
+        Returns (session_id, expires_at) instead of a refreshed ORM object.
+        """
+        try:
+            from .models import AppUser, UserSession
+            values, agent = self._new_session_values(token_hash, user_agent)
+            statement = (
+                pg_insert(UserSession)
+                .values(user_id=user_id, expires_at=expires_at, ip_address=ip_address, **values)
+                .returning(UserSession.id, UserSession.expires_at)
+            )
+            if last_login_at is not None:
+                new_session = statement.cte("new_session")
+                statement = select(new_session.c.id, new_session.c.expires_at).add_cte(
+                    update(AppUser)
+                    .where(AppUser.id == user_id)
+                    .values(last_login_at=func.greatest(AppUser.last_login_at, last_login_at))
+                    .cte("touched_user")
+                )
+            session_id, expires_at = self.db.execute(statement).one()
+            self.db.commit()
+            _remember_client_agent(agent)
+            return session_id, expires_at
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error creating login session: %s", e)
             raise
     
+    def _new_session_values(self, token_hash: str, user_agent: Optional[str]) -> Tuple[dict, Optional[Tuple[str, int]]]:
+        """Token and client columns for a new row, plus the client agent to cache once committed"""
+        if not self.compact_rows:
+            return {"token_hash": token_hash, "legacy_user_agent": user_agent}, None
+        agent = None
+        if user_agent:
+            user_agent = user_agent[:MAX_CLIENT_AGENT_LENGTH]
+            agent = (user_agent, self._client_agent_id(user_agent))
+        return {"token_digest": _digest(token_hash), "client_agent_id": agent[1] if agent else None}, agent
+    
+    def _client_agent_id(self, user_agent: str) -> int:
+        """Id of the client_agent row for this string, inserting it on first sight"""
+        from .models import ClientAgent
+        agent_id = _client_agent_ids.get(user_agent)
+        if agent_id is not None:
+            return agent_id
+        agent_id = self.db.execute(
+            pg_insert(ClientAgent)
+            .values(user_agent=user_agent)
+            .on_conflict_do_nothing(index_elements=[ClientAgent.user_agent])
+            .returning(ClientAgent.id)
+        ).scalar()
+        if agent_id is None:
+            agent_id = self.db.execute(
+                select(ClientAgent.id).where(ClientAgent.user_agent == user_agent)
+            ).scalar_one()
+        return agent_id
+    
     def find_valid_session(self, token_hash: str) -> Optional['UserSession']:
         """Find a valid (non-expired, non-revoked) session with active user"""
         try:
@@ -119,7 +388,7 @@ class SessionRepository:
                 self.db.query(UserSession)
                 .join(AppUser)
                 .filter(
-                    UserSession.token_hash == token_hash,
+                    _token_filter(token_hash, self.legacy_reads),
                     UserSession.expires_at > now,
                     UserSession.revoked_at.is_(None),
                     AppUser.status.is_(True),
@@ -127,17 +396,39 @@ class SessionRepository:
                 .first()
             )
         except SQLAlchemyError as e:
-            logger.error(f"Database error finding valid session: {e}")
+            logger.error("Database error finding valid session: %s", e)
+            raise
+    
+    def find_principal(self, token_hash: str) -> Optional[AuthenticatedUser]:
+        """Resolve a valid session straight to its principal in one query, without ORM objects"""
+        try:
+            now = datetime.now(timezone.utc)
+            digest = _digest(token_hash)
+            row = None
+            if digest is not None:
+                row = self.db.execute(
+                    _principal_by_token("token_digest"),
+                    {"token": digest, "now": now},
+                ).first()
+            if row is None and self.legacy_reads:
+                row = self.db.execute(
+                    _principal_by_token("token_hash"),
+                    {"token": token_hash, "now": now},
+                ).first()
+            return AuthenticatedUser._make(row) if row else None
+        except SQLAlchemyError as e:
+            logger.error("Database error finding principal: %s", e)
             raise
     
     def revoke(self, session: 'UserSession') -> None:
         """Revoke a session"""
         try:
             session.revoked_at = datetime.now(timezone.utc)
+            publish_token_revocation(self.db, session.token_hash_hex)
             self.db.commit()
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error revoking session: {e}")
+            logger.error("Database error revoking session: %s", e)
             raise
     
     def revoke_all_user_sessions(self, user_id: UUID) -> int:
@@ -154,9 +445,349 @@ class SessionRepository:
                 )
                 .update({"revoked_at": now}, synchronize_session=False)
             )
+            publish_user_revocation(self.db, user_id)
             self.db.commit()
             return count
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Database error revoking all sessions: {e}")
+            logger.error("Database error revoking all sessions: %s", e)
+            raise
+    
+    def revoke_matching(
+        self,
+        user_ids: Optional[Sequence[UUID]] = None,
+        networks: Optional[Sequence[str]] = None,
+        client_types: Optional[Sequence[str]] = None,
+        created_before: Optional[datetime] = None,
+    ) -> List[Tuple[str, UUID]]:
+        """
+        Revoke every active session matching all of the given criteria in one
+        UPDATE ... RETURNING, publishing the revocations in the same transaction.
+        networks are CIDRs matched against ip_address; client_types against the
+        client agent recorded at login.
+        Returns: (token hash, user id) of each revoked session
+        """
+        try:
+            from .models import ClientAgent, UserSession
+            criteria = []
+            if user_ids is not None:
+                criteria.append(UserSession.user_id == any_(bindparam("user_ids", list(user_ids), type_=ARRAY(UserSession.user_id.type))))
+            if networks is not None:
+                criteria.append(UserSession.ip_address.op("<<=")(any_(cast(bindparam("networks", list(networks)), ARRAY(CIDR)))))
+            if client_types is not None:
+                agents = bindparam("client_types", list(client_types), type_=ARRAY(Text))
+                criteria.append(or_(
+                    UserSession.client_agent_id.in_(select(ClientAgent.id).where(ClientAgent.user_agent == any_(agents))),
+                    UserSession.legacy_user_agent == any_(agents),
+                ))
+            if created_before is not None:
+                criteria.append(UserSession.created_at < created_before)
+            if not criteria:
+                raise ValueError("At least one revocation criterion is required")
+            
+            now = datetime.now(timezone.utc)
+            result = self.db.execute(
+                update(UserSession)
+                .where(UserSession.revoked_at.is_(None), UserSession.expires_at > now, *criteria)
+                .values(revoked_at=now)
+                .returning(UserSession.token_digest, UserSession.token_hash, UserSession.user_id)
+                .execution_options(synchronize_session=False)
+            )
+            revoked = [
+                (bytes(digest).hex() if digest is not None else token_hash, user_id)
+                for digest, token_hash, user_id in result
+            ]
+            publish_token_revocations(self.db, [token_hash for token_hash, _ in revoked])
+            self.db.commit()
+            return revoked
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error revoking matching sessions: %s", e)
+            raise
+    
+    def delete_reapable(self, cutoff: datetime, batch_size: int) -> int:
+        """Delete up to batch_size sessions that expired or were revoked before cutoff"""
+        try:
+            from .models import UserSession
+            # SKIP LOCKED: rows a request is touching are left for the next batch
+            doomed = (
+                select(UserSession.id, UserSession.expires_at)
+                .where(or_(UserSession.expires_at < cutoff, UserSession.revoked_at < cutoff))
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            result = self.db.execute(
+                delete(UserSession)
+                .where(tuple_(UserSession.id, UserSession.expires_at).in_(doomed))
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error reaping sessions: %s", e)
+            raise
+
+
+@instrument_repository
+class LoginThrottleRepository:
+    """Repository for login throttle state shared across replicas"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def hit(self, key: str, interval: timedelta, tolerance: timedelta) -> float:
+        """
+        Spend one attempt from key's bucket (GCRA) in a single upsert.
+        Returns 0 when allowed, otherwise seconds until the next attempt is allowed.
+        """
+        try:
+            from .models import LoginThrottleState
+            # On conflict, login_throttle.tat is the stored row; the WHERE leaves it untouched when over the limit
+            next_tat = func.greatest(LoginThrottleState.tat, func.now()) + interval
+            allowed = self.db.execute(
+                pg_insert(LoginThrottleState)
+                .values(key=key, tat=func.now() + interval)
+                .on_conflict_do_update(
+                    index_elements=[LoginThrottleState.key],
+                    set_={"tat": next_tat},
+                    where=next_tat <= func.now() + tolerance,
+                )
+                .returning(LoginThrottleState.tat)
+            ).first()
+            retry_after = 0.0
+            if allowed is None:
+                retry_after = self.db.execute(
+                    select(func.extract("epoch", LoginThrottleState.tat + interval - tolerance - func.now()))
+                    .where(LoginThrottleState.key == key)
+                ).scalar() or 0.0
+            self.db.commit()
+            return max(float(retry_after), 0.0)
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error updating login throttle: %s", e)
+            raise
+    
+    def delete_expired(self) -> int:
+        """Delete keys whose bucket has refilled completely"""
+        try:
+            from .models import LoginThrottleState
+            result = self.db.execute(
+                delete(LoginThrottleState)
+                .where(LoginThrottleState.tat <= func.now())
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error purging login throttle: %s", e)
+            raise
+
+
+@instrument_repository
+class ActivityRepository:
+    """Repository for the write-behind activity timestamps"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def touch_users(self, logins: Dict[UUID, datetime]) -> int:
+        """Set last_login_at for many users with one UPDATE ... FROM (VALUES ...) per chunk"""
+        from .models import AppUser
+        rows = [(user_id, at) for user_id, at in logins.items()]
+        return self._update_from_values(
+            rows,
+            (column("id", AppUser.id.type), column("at", AppUser.last_login_at.type)),
+            lambda batch: update(AppUser)
+            .where(AppUser.id == batch.c.id)
+            # GREATEST ignores NULL; another worker may have flushed a later login
+            .values(last_login_at=func.greatest(AppUser.last_login_at, batch.c.at)),
+        )
+    
+    def touch_sessions(self, seen: Dict[Tuple[UUID, datetime], datetime]) -> int:
+        """Set last_seen_at for many sessions with one UPDATE ... FROM (VALUES ...) per chunk"""
+        from .models import UserSession
+        rows = [(session_id, expires_at, at) for (session_id, expires_at), at in seen.items()]
+        return self._update_from_values(
+            rows,
+            (
+                column("id", UserSession.id.type),
+                column("expires_at", UserSession.expires_at.type),
+                column("at", UserSession.last_seen_at.type),
+            ),
+            lambda batch: update(UserSession)
+            .where(UserSession.id == batch.c.id, UserSession.expires_at == batch.c.expires_at)
+            .values(last_seen_at=func.greatest(UserSession.last_seen_at, batch.c.at)),
+        )
+    
+    def _update_from_values(self, rows: List[tuple], columns: tuple, make_update) -> int:
+        try:
+            updated = 0
+            for start in range(0, len(rows), INSERT_CHUNK_ROWS):
+                batch = values(*columns, name="batch").data(rows[start:start + INSERT_CHUNK_ROWS])
+                result = self.db.execute(make_update(batch).execution_options(synchronize_session=False))
+                updated += result.rowcount
+            self.db.commit()
+            return updated
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            logger.error("Database error writing activity timestamps: %s", e)
+            raise
+
+
+@instrument_repository
+class AsyncUserRepository:
+    """Async repository for User data access"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def find_by_email(self, email: str) -> Optional['AppUser']:
+        """Find user by email"""
+        try:
+            from .models import AppUser
+            result = await self.db.execute(select(AppUser).where(AppUser.email == email))
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.error("Database error finding user by email: %s", e)
+            raise
+    
+    async def find_by_id(self, user_id: UUID) -> Optional['AppUser']:
+        """Find user by ID"""
+        try:
+            from .models import AppUser
+            result = await self.db.execute(select(AppUser).where(AppUser.id == user_id))
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.error("Database error finding user by ID: %s", e)
+            raise
+
+
+@instrument_repository
+class AsyncSessionRepository:
+    """Async repository for Session data access"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.legacy_reads = Config().SESSION_LEGACY_READS
+    
+    async def find_valid_session(self, token_hash: str) -> Optional['UserSession']:
+        """Find a valid (non-expired, non-revoked) session with active user, user loaded"""
+        try:
+            from .models import UserSession, AppUser
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                select(UserSession)
+                .join(UserSession.user)
+                .options(contains_eager(UserSession.user))
+                .where(
+                    _token_filter(token_hash, self.legacy_reads),
+                    UserSession.expires_at > now,
+                    UserSession.revoked_at.is_(None),
+                    AppUser.status.is_(True),
+                )
+                .limit(1)
+            )
+            return result.scalars().first()
+        except SQLAlchemyError as e:
+            logger.error("Database error finding valid session: %s", e)
+            raise
+    
+    async def find_principal(self, token_hash: str) -> Optional[AuthenticatedUser]:
+        """Resolve a valid session straight to its principal in one query, without ORM objects"""
+        try:
+            now = datetime.now(timezone.utc)
+            digest = _digest(token_hash)
+            row = None
+            if digest is not None:
+                result = await self.db.execute(
+                    _principal_by_token("token_digest"),
+                    {"token": digest, "now": now},
+                )
+                row = result.first()
+            if row is None and self.legacy_reads:
+                result = await self.db.execute(
+                    _principal_by_token("token_hash"),
+                    {"token": token_hash, "now": now},
+                )
+                row = result.first()
+            return AuthenticatedUser._make(row) if row else None
+        except SQLAlchemyError as e:
+            logger.error("Database error finding principal: %s", e)
+            raise
+    
+    async def find_principals(self, token_hashes: Sequence[str]) -> Dict[str, AuthenticatedUser]:
+        """Resolve many token hashes to principals in one round trip; invalid ones are absent"""
+        try:
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                _principals_by_tokens("token_digest"),
+                {"tokens": [digest for digest in map(_digest, token_hashes) if digest is not None], "now": now},
+            )
+            principals = {bytes(row[0]).hex(): AuthenticatedUser._make(row[1:]) for row in result}
+            missing = [token_hash for token_hash in token_hashes if token_hash not in principals]
+            if missing and self.legacy_reads:
+                result = await self.db.execute(
+                    _principals_by_tokens("token_hash"),
+                    {"tokens": missing, "now": now},
+                )
+                principals.update((row[0], AuthenticatedUser._make(row[1:])) for row in result)
+            return principals
+        except SQLAlchemyError as e:
+            logger.error("Database error finding principals: %s", e)
+            raise
+    
+    async def list_active(
+        self,
+        user_id: UUID,
+        limit: int,
+        after: Optional[Tuple[datetime, UUID]] = None,
+    ) -> List[Row]:
+        """
+        Up to `limit` active sessions of a user, newest first, starting after the
+        (created_at, id) keyset of the previous page; rows, not ORM objects
+        """
+        try:
+            params = {"user_id": user_id, "now": datetime.now(timezone.utc), "limit": limit}
+            if after is not None:
+                params["after_created_at"], params["after_id"] = after
+            result = await self.db.execute(_active_sessions_page(after is not None), params)
+            return list(result)
+        except SQLAlchemyError as e:
+            logger.error("Database error listing sessions: %s", e)
+            raise
+    
+    async def revoke(self, session: 'UserSession') -> None:
+        """Revoke a session"""
+        try:
+            session.revoked_at = datetime.now(timezone.utc)
+            await publish_token_revocation_async(self.db, session.token_hash_hex)
+            await self.db.commit()
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Database error revoking session: %s", e)
+            raise
+    
+    async def revoke_all_user_sessions(self, user_id: UUID) -> int:
+        """Revoke all active sessions for a user"""
+        try:
+            from .models import UserSession
+            now = datetime.now(timezone.utc)
+            result = await self.db.execute(
+                update(UserSession)
+                .where(
+                    UserSession.user_id == user_id,
+                    UserSession.revoked_at.is_(None),
+                    UserSession.expires_at > now,
+                )
+                .values(revoked_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await publish_user_revocation_async(self.db, user_id)
+            await self.db.commit()
+            return result.rowcount
+        except SQLAlchemyError as e:
+            await self.db.rollback()
+            logger.error("Database error revoking all sessions: %s", e)
             raise
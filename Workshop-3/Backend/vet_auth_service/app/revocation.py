@@ -0,0 +1,173 @@
+# ============================================================================
+# revocation.py - Cross-Worker Revocation Broadcast (Observer Pattern)
+# ============================================================================
+import json
+import logging
+import os
+import select
+import threading
+from typing import Optional, Sequence
+from uuid import UUID
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .config import Config
+from .cache import RejectedTokenCache, SessionCache
+
+logger = logging.getLogger(__name__)
+
+_NOTIFY = text("SELECT pg_notify(:channel, :payload)")
+# Token hashes per "tokens" event; keeps each payload well under the 8000 byte NOTIFY limit
+TOKENS_PER_EVENT = 100
+
+
+def publish_token_revocation(db: Session, token_hash: str) -> None:
+    """Queue a revocation event for one session; delivered when db commits"""
+    db.execute(_NOTIFY, _token_event(token_hash))
+
+
+def publish_user_revocation(db: Session, user_id: UUID) -> None:
+    """Queue a revocation event for every session of a user; delivered when db commits"""
+    db.execute(_NOTIFY, _user_event(user_id))
+
+
+def publish_token_revocations(db: Session, token_hashes: Sequence[str]) -> None:
+    """Queue revocation events for many sessions at once; delivered when db commits"""
+    events = [
+        _tokens_event(token_hashes[start:start + TOKENS_PER_EVENT])
+        for start in range(0, len(token_hashes), TOKENS_PER_EVENT)
+    ]
+    if events:
+        db.execute(_NOTIFY, events)
+
+
+async def publish_token_revocation_async(db: AsyncSession, token_hash: str) -> None:
+    """Async variant of publish_token_revocation"""
+    await db.execute(_NOTIFY, _token_event(token_hash))
+
+
+async def publish_user_revocation_async(db: AsyncSession, user_id: UUID) -> None:
+    """Async variant of publish_user_revocation"""
+    await db.execute(_NOTIFY, _user_event(user_id))
+
+
+def _token_event(token_hash: str) -> dict:
+    return _notify_params({"type": "token", "token_hash": token_hash})
+
+
+def _tokens_event(token_hashes: Sequence[str]) -> dict:
+    return _notify_params({"type": "tokens", "token_hashes": list(token_hashes)})
+
+
+def _user_event(user_id: UUID) -> dict:
+    return _notify_params({"type": "user", "user_id": str(user_id)})
+
+
+def _notify_params(event: dict) -> dict:
+    return {"channel": Config().REVOCATION_CHANNEL, "payload": json.dumps(event)}
+
+
+def apply_revocation_event(payload: str, cache: Optional[SessionCache] = None) -> int:
+    """Drop the cached state named by a revocation event, returns entries removed"""
+    cache = cache or SessionCache()
+    try:
+        event = json.loads(payload)
+        if event["type"] == "token":
+            # Also covers read replicas that have not replayed the revocation yet
+            RejectedTokenCache().add(event["token_hash"])
+            return int(cache.invalidate(event["token_hash"]))
+        if event["type"] == "tokens":
+            rejected = RejectedTokenCache()
+            for token_hash in event["token_hashes"]:
+                rejected.add(token_hash)
+            return sum(cache.invalidate(token_hash) for token_hash in event["token_hashes"])
+        if event["type"] == "user":
+            return cache.invalidate_user(UUID(event["user_id"]))
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring malformed revocation event %r: %s", payload, e)
+        return 0
+
+    logger.warning("Ignoring unknown revocation event type: %s", event.get('type'))
+    return 0
+
+
+class RevocationListener:
+    """Background thread that applies revocations published by any worker"""
+
+    RECONNECT_DELAY_SECONDS = 1.0
+    MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+    def __init__(self, cache: Optional[SessionCache] = None):
+        config = Config()
+        self.channel = config.REVOCATION_CHANNEL
+        self.cache = cache or SessionCache()
+        self.events_received = 0
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+        self._listening = threading.Event()
+
+    def start(self) -> None:
+        """Start listening in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="revocation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the listener thread and release its connection"""
+        self._stop.set()
+        os.write(self._wake_w, b"x")
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def wait_until_listening(self, timeout: float) -> bool:
+        """Block until LISTEN has been issued (used by tests and startup checks)"""
+        return self._listening.wait(timeout)
+
+    def _run(self) -> None:
+        delay = self.RECONNECT_DELAY_SECONDS
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                delay = self.RECONNECT_DELAY_SECONDS
+            except Exception as e:
+                self._listening.clear()
+                logger.error("Revocation listener error, reconnecting in %.0fs: %s", delay, e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, self.MAX_RECONNECT_DELAY_SECONDS)
+
+    def _listen(self) -> None:
+        from .database import DatabaseManager
+
+        # A dedicated connection, detached so it does not hold a pool slot. LISTEN is
+        # session state, so this bypasses PgBouncer when DATABASE_DIRECT_URL is set
+        raw = DatabaseManager().direct_engine.raw_connection()
+        conn = raw.driver_connection
+        raw.detach()
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+            # Events published while we were disconnected are lost; start clean
+            self.cache.invalidate_all()
+            self._listening.set()
+            logger.info("Listening for session revocations on channel %s", self.channel)
+
+            while not self._stop.is_set():
+                ready, _, _ = select.select([conn, self._wake_r], [], [], 60)
+                if self._wake_r in ready:
+                    return
+                conn.poll()
+                while conn.notifies:
+                    notify = conn.notifies.pop(0)
+                    self.events_received += 1
+                    apply_revocation_event(notify.payload, self.cache)
+        finally:
+            conn.close()
@@ -1,15 +1,23 @@
 # ============================================================================
 # routes.py - API Routes
 # ============================================================================
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+import hashlib
+import math
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional, Tuple
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Header, Request, Response
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import logging
 from .exceptions import InvalidCredentialsError
-from .database import get_db
-from .dependencies import get_auth_service, extract_bearer_token, get_current_user
-from .services import AuthService
+from .database import DatabaseManager, get_async_db
+from .dependencies import get_auth_service, get_async_auth_service, extract_bearer_token, get_current_user, require_admin
+from .services import AuthService, AsyncAuthService
 from .schemas import (
     UserRegisterRequest,
     UserRegisterResponse,
@@ -18,6 +26,16 @@ from .schemas import (
     UserInfo,
     MessageResponse,
     ChangePasswordRequest,
+    BatchValidateRequest,
+    BatchValidateResponse,
+    TokenValidationResult,
+    AccessTokenResponse,
+    SessionInfo,
+    SessionsListResponse,
+    BulkProvisionResponse,
+    ProvisionedUserResult,
+    SessionRevokeRequest,
+    SessionRevokeResponse,
 )
 from .exceptions import (
     InvalidCredentialsError,
@@ -25,17 +43,31 @@ from .exceptions import (
     PasswordHashingError,
     AccountDeactivatedError,
     InvalidSessionError,
+    UserNotFoundError,
+    PasswordHasherUnavailableError,
+    LoginThrottledError,
+    InvalidCursorError,
 )
 from .models import AppUser
+from .cache import RejectedTokenCache, SessionCache
+from .throttle import LoginThrottle
+from .activity import ActivityRecorder
+from .pooling import pool_report
+from .provisioning import parse_users
+from .hashing import PasswordHasher
+from .config import Config
+from .tokens import AccessTokenSigner
+from .metrics import LOGIN_ATTEMPTS, MetricsRegistry, client_type_label
+from .principal import AuthenticatedUser
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/health")
-def health_check(db: Session = Depends(get_db)):
+async def health_check(db: AsyncSession = Depends(get_async_db)):
     """Health check endpoint"""
-    db.execute(text("SELECT 1"))
+    await db.execute(text("SELECT 1"))
     return {"status": "ok"}
 
 @router.post("/register", response_model=UserRegisterResponse, status_code=status.HTTP_200_OK)
@@ -68,8 +100,14 @@ def register(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e),
         )
+    except PasswordHasherUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.error(f"Unexpected error during registration: {e}")
+        logger.error("Unexpected error during registration: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred",
@@ -85,6 +123,7 @@ def login(
     """Authenticate user and create session"""
     client_ip = request.client.host if request.client else None
     client_type = client_type.lower() if client_type else "unknown"
+    client_label = client_type_label(client_type)
     
     try:
         user, session_token = auth_service.authenticate(
@@ -94,6 +133,11 @@ def login(
             client_ip=client_ip,
         )
         
+        access_token, expires_in = None, None
+        if auth_service.access_token_signer.enabled:
+            access_token, expires_in = auth_service.create_access_token(session_token)
+        
+        LOGIN_ATTEMPTS.inc(client_label, "success")
         return LoginResponse(
             session_token=session_token,
             user=UserInfo(
@@ -102,33 +146,52 @@ def login(
                 email=user.email,
                 role=user.role,
             ),
+            access_token=access_token,
+            expires_in=expires_in,
         )
     
     except InvalidCredentialsError as e:
+        LOGIN_ATTEMPTS.inc(client_label, "invalid_credentials")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
         )
     except AccountDeactivatedError as e:
+        LOGIN_ATTEMPTS.inc(client_label, "deactivated")
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e),
         )
+    except LoginThrottledError as e:
+        LOGIN_ATTEMPTS.inc(client_label, "throttled")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except PasswordHasherUnavailableError as e:
+        LOGIN_ATTEMPTS.inc(client_label, "unavailable")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     except Exception as e:
-        logger.error(f"Unexpected error during login: {e}")
+        LOGIN_ATTEMPTS.inc(client_label, "error")
+        logger.error("Unexpected error during login: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred",
         )
 
 @router.post("/logout", response_model=MessageResponse)
-def logout(
+async def logout(
     raw_token: str = Depends(extract_bearer_token),
-    auth_service: AuthService = Depends(get_auth_service),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
 ):
     """Logout and revoke session"""
     try:
-        auth_service.logout(raw_token)
+        await auth_service.logout(raw_token)
         
         return MessageResponse(message="Logged out successfully")
     
@@ -138,26 +201,176 @@ def logout(
             detail=str(e),
         )
     except Exception as e:
-        logger.error(f"Unexpected error during logout: {e}")
+        logger.error("Unexpected error during logout: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred",
         )
 
+@router.post("/token/refresh", response_model=AccessTokenResponse)
+async def refresh_access_token(
+    raw_token: str = Depends(extract_bearer_token),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
+):
+    """Exchange a session token for a short-lived signed access token"""
+    if not auth_service.access_token_signer.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Signed access tokens are not enabled",
+        )
+    
+    try:
+        access_token, expires_in = await auth_service.refresh_access_token(raw_token)
+        
+        return AccessTokenResponse(access_token=access_token, expires_in=expires_in)
+    
+    except InvalidSessionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    except Exception as e:
+        logger.error("Unexpected error refreshing access token: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+
+@router.get("/.well-known/jwks.json")
+async def jwks():
+    """Public keys for verifying access tokens offline"""
+    return AccessTokenSigner().jwks()
+
+@lru_cache(maxsize=4096)
+def _me_representation(user_id: UUID, name: str, email: str, role: str) -> Tuple[bytes, str]:
+    """
+    Serialized /me body and its strong ETag. Keyed by every field in the body,
+    so a renamed or re-roled user is a new entry and no entry is ever stale
+    """
+    body = UserInfo(id=user_id, name=name, email=email, role=role).model_dump_json().encode()
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
 @router.get("/me", response_model=UserInfo)
-def get_me(current_user = Depends(get_current_user)):
-    """Get current user information"""
-    return UserInfo(
-        id=current_user.id,
-        name=current_user.name,
-        email=current_user.email,
-        role=current_user.role,
+async def get_me(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """Get current user information; answers If-None-Match with 304"""
+    body, etag = _me_representation(current_user.id, current_user.name, current_user.email, current_user.role)
+    # A client may reuse the answer, but never past the session it was given for
+    remaining = (current_user.expires_at - datetime.now(timezone.utc)).total_seconds()
+    max_age = max(0, min(Config().ME_CACHE_MAX_AGE_SECONDS, int(remaining)))
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Authorization",
+    }
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _check_page_limit(limit: int) -> None:
+    max_limit = Config().SESSION_LIST_PAGE_MAX
+    if limit > max_limit:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {max_limit} sessions can be listed per page",
+        )
+
+def _sessions_page(rows, next_cursor: Optional[str], current_session_id: UUID) -> SessionsListResponse:
+    return SessionsListResponse(
+        sessions=[
+            SessionInfo(
+                id=row.id,
+                created_at=row.created_at,
+                expires_at=row.expires_at,
+                user_agent=row.user_agent,
+                ip_address=str(row.ip_address) if row.ip_address is not None else None,
+                is_current=row.id == current_session_id,
+            )
+            for row in rows
+        ],
+        next_cursor=next_cursor,
     )
 
+@router.get("/sessions", response_model=SessionsListResponse)
+async def list_sessions(
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
+):
+    """List the current user's active sessions, newest first"""
+    _check_page_limit(limit)
+    try:
+        rows, next_cursor = await auth_service.list_sessions(current_user.id, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error("Unexpected error listing sessions: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+    
+    return _sessions_page(rows, next_cursor, current_user.session_id)
+
+@router.post("/sessions/validate:batch", response_model=BatchValidateResponse)
+async def validate_sessions_batch(
+    payload: BatchValidateRequest,
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
+):
+    """Validate many session tokens with a single database query"""
+    max_tokens = Config().SESSION_VALIDATE_BATCH_MAX
+    if len(payload.tokens) > max_tokens:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {max_tokens} tokens can be validated per request",
+        )
+    
+    try:
+        principals = await auth_service.validate_sessions(payload.tokens)
+    except Exception as e:
+        logger.error("Unexpected error during batch validation: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+    
+    results = []
+    for principal in principals:
+        if principal is None:
+            results.append(TokenValidationResult(valid=False, error="Invalid or expired session token"))
+            continue
+        results.append(TokenValidationResult(
+            valid=True,
+            user=UserInfo(
+                id=principal.id,
+                name=principal.name,
+                email=principal.email,
+                role=principal.role,
+            ),
+            session_id=principal.session_id,
+            expires_at=principal.expires_at,
+        ))
+    return BatchValidateResponse(results=results)
+
 @router.post("/password/change", response_model=MessageResponse)
 def change_password(
     payload: ChangePasswordRequest,
-    current_user = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     auth_service: AuthService = Depends(get_auth_service),
 ):
     """Change user password"""
@@ -177,9 +390,195 @@ def change_password(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e),
         )
+    except PasswordHasherUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except Exception as e:
+        logger.error("Unexpected error changing password: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+
+@router.post("/admin/users/{user_id}/deactivate", response_model=MessageResponse)
+def deactivate_user(
+    user_id: UUID,
+    admin: AuthenticatedUser = Depends(require_admin),
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    """Deactivate a user account and revoke its sessions (admin only)"""
+    try:
+        count = auth_service.deactivate_user(user_id)
+        
+        return MessageResponse(message=f"User deactivated, {count} sessions revoked")
+    
+    except UserNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error("Unexpected error deactivating user: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+
+# Content-Type -> provisioning input format
+PROVISION_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+@router.post("/admin/users:bulk", response_model=BulkProvisionResponse)
+async def provision_users(
+    request: Request,
+    admin: AuthenticatedUser = Depends(require_admin),
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    """Create many users from a CSV or NDJSON upload, reporting each record (admin only)"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    content_format = PROVISION_FORMATS.get(content_type)
+    if content_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send users as {' or '.join(PROVISION_FORMATS)}",
+        )
+    
+    try:
+        rows = parse_users((await request.body()).decode("utf-8"), content_format)
+    except (UnicodeDecodeError, ValueError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        )
+    
+    max_rows = Config().PROVISION_BATCH_MAX
+    if len(rows) > max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=f"At most {max_rows} users can be provisioned per request",
+        )
+    
+    try:
+        # Hashing and the insert block; keep them off the event loop
+        results = await run_in_threadpool(auth_service.provision_users, rows)
+    except PasswordHasherUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
+    except Exception as e:
+        logger.error("Unexpected error provisioning users: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+    
+    logger.info("Admin %s provisioned users from %s records", admin.id, len(rows))
+    return BulkProvisionResponse(
+        created=sum(result.status == "created" for result in results),
+        duplicates=sum(result.status == "duplicate" for result in results),
+        invalid=sum(result.status == "invalid" for result in results),
+        results=[ProvisionedUserResult(**result._asdict()) for result in results],
+    )
+
+@router.get("/admin/users/{user_id}/sessions", response_model=SessionsListResponse)
+async def list_user_sessions(
+    user_id: UUID,
+    limit: int = Query(default=20, ge=1),
+    cursor: Optional[str] = None,
+    admin: AuthenticatedUser = Depends(require_admin),
+    auth_service: AsyncAuthService = Depends(get_async_auth_service),
+):
+    """List any user's active sessions, newest first (admin only)"""
+    _check_page_limit(limit)
+    try:
+        rows, next_cursor = await auth_service.list_user_sessions(user_id, limit, cursor)
+    except UserNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(e),
+        )
     except Exception as e:
-        logger.error(f"Unexpected error changing password: {e}")
+        logger.error("Unexpected error listing user sessions: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred",
-        )
\ No newline at end of file
+        )
+    
+    return _sessions_page(rows, next_cursor, admin.session_id)
+
+@router.post("/admin/sessions:revoke", response_model=SessionRevokeResponse)
+def revoke_sessions(
+    payload: SessionRevokeRequest,
+    admin: AuthenticatedUser = Depends(require_admin),
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    """Revoke every active session matching all given criteria in one statement (admin only)"""
+    try:
+        revoked, users = auth_service.revoke_sessions(
+            user_ids=payload.user_ids,
+            networks=payload.networks,
+            client_types=payload.client_types,
+            created_before=payload.created_before,
+        )
+        
+        logger.info("Bulk revocation requested by admin %s", admin.id)
+        return SessionRevokeResponse(revoked=revoked, users=users)
+    
+    except Exception as e:
+        logger.error("Unexpected error revoking sessions: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
+
+@router.get("/admin/stats")
+async def admin_stats(admin: AuthenticatedUser = Depends(require_admin)):
+    """In-process cache and worker pool statistics (admin only)"""
+    return {
+        "session_cache": SessionCache().stats(),
+        "rejected_tokens": RejectedTokenCache().stats(),
+        "password_hasher": PasswordHasher().stats(),
+        "login_throttle": LoginThrottle().stats(),
+        "read_replicas": DatabaseManager().replicas.stats(),
+        "activity": ActivityRecorder().stats(),
+    }
+
+@router.get("/admin/pool")
+async def admin_pool(admin: AuthenticatedUser = Depends(require_admin)):
+    """Connection pool occupancy and recent checkout waits for this worker (admin only)"""
+    config = Config()
+    return {
+        "config": {
+            "pgbouncer": config.DATABASE_PGBOUNCER,
+            "pool_size": config.DATABASE_POOL_SIZE,
+            "max_overflow": config.DATABASE_MAX_OVERFLOW,
+            "pool_timeout_seconds": config.DATABASE_POOL_TIMEOUT_SECONDS,
+            "pool_recycle_seconds": config.DATABASE_POOL_RECYCLE_SECONDS,
+            "pre_ping": config.DATABASE_POOL_PRE_PING,
+        },
+        "pools": {
+            label: pool_report(label, pool)
+            for label, pool in DatabaseManager().pools().items()
+        },
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint for this worker process"""
+    return PlainTextResponse(
+        MetricsRegistry().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,6 +1,7 @@
+import ipaddress
 from uuid import UUID
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, constr, field_validator
+from pydantic import BaseModel, EmailStr, Field, constr, field_validator, model_validator
 
 class UserRegisterRequest(BaseModel):
     name: constr(strip_whitespace=True, min_length=1) # pyright: ignore[reportInvalidTypeForm]
@@ -35,6 +36,15 @@ class UserInfo(BaseModel):
 class LoginResponse(BaseModel):
     session_token: str
     user: UserInfo
+    # Only set when ACCESS_TOKEN_MODE=signed; session_token then acts as the refresh token
+    access_token: str | None = None
+    expires_in: int | None = None
+
+
+class AccessTokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "Bearer"
+    expires_in: int
 
 class MessageResponse(BaseModel):
     message: str
@@ -55,4 +65,67 @@ class SessionInfo(BaseModel):
 
 
 class SessionsListResponse(BaseModel):
-    sessions: list[SessionInfo]
\ No newline at end of file
+    sessions: list[SessionInfo]
+    next_cursor: str | None = None  # Pass as ?cursor= for the next page; None on the last page
+
+
+class BatchValidateRequest(BaseModel):
+    tokens: list[str] = Field(min_length=1)
+
+
+class TokenValidationResult(BaseModel):
+    valid: bool
+    user: UserInfo | None = None
+    session_id: UUID | None = None
+    expires_at: datetime | None = None
+    error: str | None = None
+
+
+class BatchValidateResponse(BaseModel):
+    results: list[TokenValidationResult]  # One per requested token, in request order
+
+class ProvisionedUserResult(BaseModel):
+    line: int  # Line of the record in the uploaded file
+    email: str | None = None
+    status: str  # "created", "duplicate" or "invalid"
+    id: UUID | None = None
+    error: str | None = None
+
+
+class BulkProvisionResponse(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: list[ProvisionedUserResult]  # One per record, in file order
+
+
+class SessionRevokeRequest(BaseModel):
+    """Sessions matching every given criterion are revoked; at least one is required"""
+    user_ids: list[UUID] | None = Field(default=None, min_length=1)
+    networks: list[str] | None = Field(default=None, min_length=1)  # CIDRs, e.g. "10.20.0.0/16"
+    client_types: list[str] | None = Field(default=None, min_length=1)  # X-Client-Type at login
+    created_before: datetime | None = None
+    
+    @field_validator('networks')
+    @classmethod
+    def validate_networks(cls, v: list[str] | None) -> list[str] | None:
+        if v is None:
+            return v
+        return [str(ipaddress.ip_network(network, strict=False)) for network in v]
+    
+    @field_validator('client_types')
+    @classmethod
+    def normalize_client_types(cls, v: list[str] | None) -> list[str] | None:
+        # Stored lowercased at login
+        return [client_type.lower() for client_type in v] if v is not None else v
+    
+    @model_validator(mode='after')
+    def require_criterion(self) -> 'SessionRevokeRequest':
+        if self.user_ids is None and self.networks is None and self.client_types is None and self.created_before is None:
+            raise ValueError('At least one of user_ids, networks, client_types or created_before is required')
+        return self
+
+
+class SessionRevokeResponse(BaseModel):
+    revoked: int
+    users: int
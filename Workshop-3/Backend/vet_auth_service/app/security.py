@@ -1,41 +1,101 @@
 from passlib.context import CryptContext
+from typing import Optional, Tuple
 import logging
+from .config import Config
 
 logger = logging.getLogger(__name__)
 
-pwd_context = CryptContext(
-    schemes=["bcrypt"],
-    deprecated="auto",
-    bcrypt__default_rounds=12,
-    bcrypt__ident="2b"
-)
+PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_context(
+    scheme: str = "bcrypt",
+    bcrypt_rounds: int = 12,
+    argon2_time_cost: int = 3,
+    argon2_memory_kib: int = 65536,
+    argon2_parallelism: int = 1,
+) -> CryptContext:
+    """
+    CryptContext hashing with `scheme` and still verifying the other one.
+    The other scheme is deprecated, and min_rounds equals the configured cost,
+    so needs_update() flags any hash that is weaker than what we'd issue today.
+    argon2 needs the 'argon2-cffi' package.
+    """
+    if scheme not in PASSWORD_SCHEMES:
+        raise ValueError(f"Unknown password scheme {scheme!r}, expected one of {PASSWORD_SCHEMES}")
+    return CryptContext(
+        schemes=[scheme] + [other for other in PASSWORD_SCHEMES if other != scheme],
+        default=scheme,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__ident="2b",
+        argon2__type="ID",
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_kib,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+def _configured_context() -> CryptContext:
+    config = Config()
+    return build_context(
+        config.PASSWORD_SCHEME,
+        config.PASSWORD_BCRYPT_ROUNDS,
+        config.PASSWORD_ARGON2_TIME_COST,
+        config.PASSWORD_ARGON2_MEMORY_KIB,
+        config.PASSWORD_ARGON2_PARALLELISM,
+    )
+
+
+pwd_context = _configured_context()
 
 def hash_password(password: str) -> str:
-    """Hash a password using bcrypt via passlib."""
-    logger.info("hash_password called")
-    logger.debug(f"Input password length (chars): {len(password)}")
-    logger.debug(f"Input password length (bytes): {len(password.encode('utf-8'))}")
+    """Hash a password with the configured scheme via passlib."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("hash_password called")
+        logger.debug("Input password length (chars): %s", len(password))
+        logger.debug("Input password length (bytes): %s", len(password.encode('utf-8')))
 
     try:
         # Truncate to 72 characters (which is usually safe for ASCII/UTF-8)
         truncated_password = password[:72]
-        logger.debug(f"Truncated password length: {len(truncated_password)}")
+        logger.debug("Truncated password length: %s", len(truncated_password))
         
         logger.debug("Hashing password with passlib...")
         hashed = pwd_context.hash(truncated_password)
-        logger.info("Password hashed successfully")
-        logger.debug(f"Hash generated, length: {len(hashed)}")
+        logger.debug("Password hashed successfully")
+        logger.debug("Hash generated, length: %s", len(hashed))
         
         return hashed
     except Exception as e:
-        logger.error(f"Error in hash_password: {type(e).__name__}: {str(e)}")
+        logger.error("Error in hash_password: %s: %s", type(e).__name__, e)
         logger.exception("Full traceback:")
         raise
 
+def check_password_backend() -> None:
+    """
+    Hash once with the configured settings, so a missing backend (argon2 without
+    argon2-cffi) or unusable cost parameters stop startup instead of failing logins.
+    """
+    pwd_context.hash("startup-check")
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
     try:
         return pwd_context.verify(plain_password[:72], hashed_password)
     except Exception as e:
-        logger.error(f"Error verifying password: {type(e).__name__}: {str(e)}")
+        logger.error("Error verifying password: %s: %s", type(e).__name__, e)
         return False
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, when its hash is outdated, rehash it with the current settings.
+    Returns: (verified, new_hash or None)
+    """
+    try:
+        return pwd_context.verify_and_update(plain_password[:72], hashed_password)
+    except Exception as e:
+        logger.error("Error verifying password: %s: %s", type(e).__name__, e)
+        return False, None
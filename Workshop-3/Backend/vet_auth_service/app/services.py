@@ -1,15 +1,27 @@
 # ============================================================================
 # services.py - Business Logic Layer (Service Pattern)
 # ============================================================================
+import base64
+import binascii
 import secrets
 import hashlib
 from datetime import datetime, timedelta, timezone
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional, List, Sequence, Set
 import logging
-from .exceptions import InvalidCredentialsError, UserAlreadyExistsError, PasswordHashingError, AccountDeactivatedError, InvalidSessionError
+from uuid import UUID
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import SQLAlchemyError
+from .exceptions import InvalidCredentialsError, UserAlreadyExistsError, UserNotFoundError, PasswordHashingError, AccountDeactivatedError, InvalidSessionError, PasswordHasherUnavailableError, InvalidCursorError
 from .config import Config
-from .repositories import UserRepository, SessionRepository
+from .repositories import UserRepository, SessionRepository, AsyncUserRepository, AsyncSessionRepository, LoginThrottleRepository
 from .models import AppUser
+from .activity import ActivityRecorder
+from .cache import RejectedTokenCache, SessionCache
+from .throttle import LoginThrottle
+from .hashing import PasswordHasher
+from .principal import AuthenticatedUser
+from .provisioning import ProvisionResult, ProvisionRow
+from .tokens import AccessTokenSigner, looks_like_access_token
 
 logger = logging.getLogger(__name__)
 
@@ -39,74 +51,173 @@ class TokenService:
         return datetime.now(timezone.utc) + timedelta(hours=config.SESSION_EXPIRY_HOURS)
 
 
+class SessionCursor:
+    """Opaque page cursor for session listings: the (created_at, id) of the last row served"""
+    
+    @staticmethod
+    def encode(created_at: datetime, session_id: UUID) -> str:
+        raw = f"{created_at.isoformat()}|{session_id}".encode("ascii")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def decode(cursor: str) -> Tuple[datetime, UUID]:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+            created_at, session_id = raw.split("|")
+            return datetime.fromisoformat(created_at), UUID(session_id)
+        except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+            raise InvalidCursorError("Invalid pagination cursor") from e
+
+
 class AuthService:
     """Service for authentication operations"""
     
-    def __init__(self, user_repo: UserRepository, session_repo: SessionRepository):
+    def __init__(
+        self,
+        user_repo: UserRepository,
+        session_repo: SessionRepository,
+        session_cache: Optional[SessionCache] = None,
+        rejected_tokens: Optional[RejectedTokenCache] = None,
+        password_hasher: Optional[PasswordHasher] = None,
+        access_token_signer: Optional[AccessTokenSigner] = None,
+        login_throttle: Optional[LoginThrottle] = None,
+        throttle_repo: Optional[LoginThrottleRepository] = None,
+        activity: Optional[ActivityRecorder] = None,
+    ):
         self.user_repo = user_repo
         self.session_repo = session_repo
+        self.session_cache = session_cache or SessionCache()
+        self.rejected_tokens = rejected_tokens or RejectedTokenCache()
+        self.password_hasher = password_hasher or PasswordHasher()
+        self.access_token_signer = access_token_signer or AccessTokenSigner()
+        self.login_throttle = login_throttle or LoginThrottle()
+        self.throttle_repo = throttle_repo
+        self.activity = activity or ActivityRecorder()
         self.token_service = TokenService()
     
     def register_user(self, name: str, email: str, password: str) -> 'AppUser':
         """Register a new user"""
-        logger.info(f"Registration attempt for email: {email}")
+        logger.info("Registration attempt for email: %s", email)
         
         # Check if user exists
         existing = self.user_repo.find_by_email(email)
         if existing:
-            logger.warning(f"Registration failed: Email {email} already exists")
+            logger.warning("Registration failed: Email %s already exists", email)
             raise UserAlreadyExistsError("A user with this email already exists")
         
         # Hash password
         try:
-            from .security import hash_password
-            password_hash = hash_password(password)
+            password_hash = self.password_hasher.hash(password)
+        except PasswordHasherUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Password hashing failed: {e}")
+            logger.error("Password hashing failed: %s", e)
             raise PasswordHashingError("Failed to process password")
         
         # Create user
         user = self.user_repo.create(name, email, password_hash)
-        logger.info(f"User successfully created with ID: {user.id}")
+        logger.info("User successfully created with ID: %s", user.id)
         return user
     
+    def provision_users(self, rows: Sequence[ProvisionRow]) -> List[ProvisionResult]:
+        """
+        Create many users at once (bulk onboarding). Emails already registered
+        or repeated within the batch are reported per row and never hashed;
+        the rest are hashed across the worker pool and inserted in one batch.
+        Returns one result per input row, in order.
+        """
+        results: List[Optional[ProvisionResult]] = [None] * len(rows)
+        # Lowercased email -> index of the row that will create it (emails are CITEXT)
+        to_create: Dict[str, int] = {}
+        for index, row in enumerate(rows):
+            if row.request is None:
+                results[index] = ProvisionResult(row.line, None, "invalid", error=row.error)
+                continue
+            email = row.request.email
+            if email.lower() in to_create:
+                results[index] = ProvisionResult(row.line, email, "duplicate", error="Email appears earlier in this batch")
+                continue
+            to_create[email.lower()] = index
+        
+        for email in self.user_repo.find_existing_emails([rows[index].request.email for index in to_create.values()]):
+            index = to_create.pop(email)
+            results[index] = ProvisionResult(rows[index].line, rows[index].request.email, "duplicate", error="A user with this email already exists")
+        
+        requests = [rows[index].request for index in to_create.values()]
+        try:
+            password_hashes = self.password_hasher.hash_many([request.password for request in requests])
+        except PasswordHasherUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Password hashing failed: %s", e)
+            raise PasswordHashingError("Failed to process password")
+        
+        created = self.user_repo.create_many([
+            {"name": request.name, "email": request.email, "password_hash": password_hash}
+            for request, password_hash in zip(requests, password_hashes)
+        ])
+        
+        for email, index in to_create.items():
+            row = rows[index]
+            if email in created:
+                results[index] = ProvisionResult(row.line, row.request.email, "created", id=created[email])
+            else:
+                # Registered by someone else between the lookup and the insert
+                results[index] = ProvisionResult(row.line, row.request.email, "duplicate", error="A user with this email already exists")
+        
+        logger.info(
+            "Provisioned %s users from %s rows (%s duplicates, %s invalid)",
+            len(created),
+            len(rows),
+            sum(result.status == "duplicate" for result in results),
+            sum(result.status == "invalid" for result in results),
+        )
+        return results
+    
     def authenticate(
         self,
         email: str,
         password: str,
         client_type: Optional[str] = None,
         client_ip: Optional[str] = None,
-    ) -> Tuple['AppUser', str]:
+    ) -> Tuple[AuthenticatedUser, str]:
         """
         Authenticate user and create session.
-        Returns: (user, session_token)
+        Returns: (principal, session_token)
         """
-        logger.info(f"Login attempt for email: {email}")
+        logger.info("Login attempt for email: %s", email)
+        
+        # Admission control before any database lookup or bcrypt work
+        self.login_throttle.check(email, client_ip, self.throttle_repo)
         
         # Find user
         user = self.user_repo.find_by_email(email)
         if not user:
-            logger.warning(f"Login failed: User not found for email {email}")
+            logger.warning("Login failed: User not found for email %s", email)
             raise InvalidCredentialsError("Invalid email or password")
         
         # Check if user is active
         if not user.status:
-            logger.warning(f"Login failed: Account deactivated for user {user.id}")
+            logger.warning("Login failed: Account deactivated for user %s", user.id)
             raise AccountDeactivatedError("User account is deactivated")
         
         # Verify password
         try:
-            from .security import verify_password
-            if not verify_password(password, user.password_hash):
-                logger.warning(f"Login failed: Invalid password for user {user.id}")
+            verified, new_hash = self.password_hasher.verify_and_update(password, user.password_hash)
+            if not verified:
+                logger.warning("Login failed: Invalid password for user %s", user.id)
                 raise InvalidCredentialsError("Invalid email or password")
         except InvalidCredentialsError:
             raise
         except Exception as e:
-            logger.error(f"Error during password verification: {e}")
+            logger.error("Error during password verification: %s", e)
             raise
         
-        logger.info(f"Password verified successfully for user {user.id}")
+        logger.info("Password verified successfully for user %s", user.id)
+        
+        # The plaintext is only available now, so upgrade outdated hashes while we have it
+        if new_hash and Config().PASSWORD_REHASH_ON_LOGIN:
+            self._rehash(user, new_hash)
         
         # Generate session token
         raw_token, token_hash = self.token_service.generate_session_token()
@@ -122,41 +233,83 @@ class AuthService:
                 sanitized_ip = client_ip
             except ValueError:
                 # Not a valid IP, set to None
-                logger.debug(f"Invalid IP address format: {client_ip}, storing as NULL")
+                logger.debug("Invalid IP address format: %s, storing as NULL", client_ip)
                 sanitized_ip = None
         
-        # Create session
-        self.session_repo.create(
-            user_id=user.id,
+        # Read before the commit expires the loaded user
+        user_id, user_name, user_email, user_role = user.id, user.name, user.email, user.role
+        
+        # Session insert and, unless written behind, last_login_at: one statement, one commit
+        session_id, expires_at = self.session_repo.create_for_login(
+            user_id=user_id,
             token_hash=token_hash,
             expires_at=expires_at,
             user_agent=client_type,
             ip_address=sanitized_ip,
+            last_login_at=None if self.activity.enabled else datetime.now(timezone.utc),
         )
+        self.activity.record_login(user_id)  # no-op when write-behind is off
         
-        # Update last login
-        self.user_repo.update_last_login(user)
+        # Warm the cache: clients call /me or refresh right after logging in
+        principal = AuthenticatedUser(
+            id=user_id,
+            name=user_name,
+            email=user_email,
+            role=user_role,
+            session_id=session_id,
+            expires_at=expires_at,
+        )
+        self.session_cache.put(token_hash, principal)
         
-        logger.info(f"Login successful for user {user.id} ({user.email})")
-        return user, raw_token
+        logger.info("Login successful for user %s (%s)", user_id, user_email)
+        return principal, raw_token
     
-    def validate_session(self, raw_token: str) -> 'AppUser':
-        """Validate session token and return user"""
+    def _rehash(self, user: 'AppUser', new_hash: str) -> None:
+        try:
+            if self.user_repo.replace_password_hash(user, new_hash):
+                logger.info("Upgraded password hash for user %s", user.id)
+        except Exception as e:
+            # Not worth failing the login over; the next one retries
+            logger.warning("Password hash upgrade failed for user %s: %s", user.id, e)
+    
+    def validate_session(self, raw_token: str) -> AuthenticatedUser:
+        """Validate session token and return the authenticated principal"""
+        principal = self._resolve_session(raw_token)
+        self.activity.record_seen(principal.session_id, principal.expires_at)
+        return principal
+    
+    def _resolve_session(self, raw_token: str) -> AuthenticatedUser:
         logger.debug("Validating session token")
         
         token_hash = self.token_service.hash_token(raw_token)
-        session = self.session_repo.find_valid_session(token_hash)
+        cached = self.session_cache.get(token_hash)
+        if cached is not None:
+            logger.debug("Session cache hit for user %s", cached.id)
+            return cached
         
-        if not session:
+        if self.rejected_tokens.contains(token_hash):
+            logger.debug("Rejected token cache hit")
+            raise InvalidSessionError("Invalid or expired session token")
+        
+        principal = self.session_repo.find_principal(token_hash)
+        
+        if not principal:
+            self.rejected_tokens.add(token_hash)
             logger.info("Authentication rejected: Invalid or expired session token")
             raise InvalidSessionError("Invalid or expired session token")
         
-        if not session.user:
-            logger.error(f"Data integrity issue: Session {session.id} has no user")
-            raise InvalidSessionError("User associated with this session no longer exists")
+        self.session_cache.put(token_hash, principal)
         
-        logger.info(f"Authentication successful: User {session.user.id}")
-        return session.user
+        logger.info("Authentication successful: User %s", principal.id)
+        return principal
+    
+    def create_access_token(self, raw_token: str) -> Tuple[str, int]:
+        """
+        Issue a signed access token backed by a session token.
+        Returns: (access_token, expires_in_seconds)
+        """
+        principal = self.validate_session(raw_token)
+        return self.access_token_signer.issue(principal)
     
     def logout(self, raw_token: str) -> None:
         """Logout by revoking session"""
@@ -169,31 +322,281 @@ class AuthService:
             raise InvalidSessionError("Invalid or expired session token")
         
         self.session_repo.revoke(session)
-        logger.info(f"Session revoked for user {session.user_id}")
+        self.session_cache.invalidate(token_hash)
+        self.rejected_tokens.add(token_hash)
+        logger.info("Session revoked for user %s", session.user_id)
     
     def change_password(
         self,
-        user: 'AppUser',
+        user: 'AppUser | AuthenticatedUser',
         current_password: str,
         new_password: str,
     ) -> None:
         """Change user password and revoke all sessions"""
-        logger.info(f"Password change request for user {user.id}")
+        logger.info("Password change request for user %s", user.id)
+        
+        # Reload the account; the caller may only hold a cached principal
+        user = self.user_repo.find_by_id(user.id)
+        if not user:
+            raise UserNotFoundError("User not found")
         
         # Verify current password
-        from .security import verify_password, hash_password
-        if not verify_password(current_password, user.password_hash):
-            logger.warning(f"Password change failed: Invalid current password")
+        if not self.password_hasher.verify(current_password, user.password_hash):
+            logger.warning("Password change failed: Invalid current password")
             raise InvalidCredentialsError("Current password is incorrect")
         
         # Hash new password
-        new_hash = hash_password(new_password)
+        new_hash = self.password_hasher.hash(new_password)
         
         # Update password
         self.user_repo.update_password(user, new_hash)
         
         # Revoke all sessions
         count = self.session_repo.revoke_all_user_sessions(user.id)
+        self.session_cache.invalidate_user(user.id)
+        
+        logger.info("Password changed for user %s, revoked %s sessions", user.id, count)
+    
+    def deactivate_user(self, user_id: UUID) -> int:
+        """Deactivate a user account and revoke all of its sessions"""
+        logger.info("Deactivation request for user %s", user_id)
+        
+        user = self.user_repo.find_by_id(user_id)
+        if not user:
+            raise UserNotFoundError("User not found")
+        
+        self.user_repo.update_status(user, False)
+        count = self.session_repo.revoke_all_user_sessions(user.id)
+        self.session_cache.invalidate_user(user.id)
         
-        logger.info(f"Password changed for user {user.id}, revoked {count} sessions")
+        logger.info("User %s deactivated, revoked %s sessions", user.id, count)
+        return count
+    
+    def revoke_sessions(
+        self,
+        user_ids: Optional[Sequence[UUID]] = None,
+        networks: Optional[Sequence[str]] = None,
+        client_types: Optional[Sequence[str]] = None,
+        created_before: Optional[datetime] = None,
+    ) -> Tuple[int, int]:
+        """
+        Revoke every active session matching all given criteria (incident response).
+        Returns: (sessions revoked, distinct users affected)
+        """
+        revoked = self.session_repo.revoke_matching(user_ids, networks, client_types, created_before)
+        # Other workers drop these when the published events arrive; this one does not wait
+        for token_hash, _ in revoked:
+            self.session_cache.invalidate(token_hash)
+            self.rejected_tokens.add(token_hash)
+        
+        users = len({user_id for _, user_id in revoked})
+        logger.warning("Bulk revocation revoked %s sessions of %s users", len(revoked), users)
+        return len(revoked), users
+
 
+class AsyncAuthService:
+    """Service for the non-blocking session operations (validation and logout)"""
+    
+    def __init__(
+        self,
+        user_repo: AsyncUserRepository,
+        session_repo: AsyncSessionRepository,
+        session_cache: Optional[SessionCache] = None,
+        rejected_tokens: Optional[RejectedTokenCache] = None,
+        access_token_signer: Optional[AccessTokenSigner] = None,
+        replica_session_repo: Optional[AsyncSessionRepository] = None,
+        activity: Optional[ActivityRecorder] = None,
+    ):
+        self.user_repo = user_repo
+        self.session_repo = session_repo
+        self.session_cache = session_cache or SessionCache()
+        self.rejected_tokens = rejected_tokens or RejectedTokenCache()
+        self.replica_session_repo = replica_session_repo
+        self.activity = activity or ActivityRecorder()
+        self.access_token_signer = access_token_signer or AccessTokenSigner()
+        self.token_service = TokenService()
+    
+    async def validate_session(self, raw_token: str) -> AuthenticatedUser:
+        """Validate a signed access token locally, or a session token against the cache/database"""
+        if self.access_token_signer.enabled and looks_like_access_token(raw_token):
+            # Its expires_at is the token's, not the session's; activity shows up on refresh
+            return self.access_token_signer.verify(raw_token)
+        
+        principal = await self._resolve_session(raw_token)
+        self.activity.record_seen(principal.session_id, principal.expires_at)
+        return principal
+    
+    async def _resolve_session(self, raw_token: str) -> AuthenticatedUser:
+        logger.debug("Validating session token")
+        
+        token_hash = self.token_service.hash_token(raw_token)
+        cached = self.session_cache.get(token_hash)
+        if cached is not None:
+            logger.debug("Session cache hit for user %s", cached.id)
+            return cached
+        
+        if self.rejected_tokens.contains(token_hash):
+            logger.debug("Rejected token cache hit")
+            raise InvalidSessionError("Invalid or expired session token")
+        
+        principal, from_replica = await self._find_principal(token_hash)
+        
+        if not principal:
+            self.rejected_tokens.add(token_hash)
+            logger.info("Authentication rejected: Invalid or expired session token")
+            raise InvalidSessionError("Invalid or expired session token")
+        
+        self.session_cache.put(token_hash, principal, self._cache_ttl(from_replica))
+        
+        logger.info("Authentication successful: User %s", principal.id)
+        return principal
+    
+    async def validate_sessions(self, raw_tokens: Sequence[str]) -> List[Optional[AuthenticatedUser]]:
+        """
+        Validate many tokens at once.
+        Returns a principal (or None if rejected) per token, in input order.
+        Signed access tokens are verified locally, as in validate_session.
+        """
+        verified = {}
+        token_hashes = []
+        for raw_token in raw_tokens:
+            if self.access_token_signer.enabled and looks_like_access_token(raw_token):
+                if raw_token not in verified:
+                    verified[raw_token] = self._verify_access_token(raw_token)
+                token_hashes.append(None)
+            else:
+                token_hashes.append(self.token_service.hash_token(raw_token))
+        
+        resolved = {}
+        for token_hash in token_hashes:
+            if token_hash is not None and token_hash not in resolved:
+                resolved[token_hash] = self.session_cache.get(token_hash)
+        
+        missing = [
+            token_hash for token_hash, principal in resolved.items()
+            if principal is None and not self.rejected_tokens.contains(token_hash)
+        ]
+        if missing:
+            found, from_replica = await self._find_principals(missing)
+            for token_hash in missing:
+                principal = found.get(token_hash)
+                if principal is None:
+                    self.rejected_tokens.add(token_hash)
+                    continue
+                resolved[token_hash] = principal
+                self.session_cache.put(token_hash, principal, self._cache_ttl(token_hash in from_replica))
+        
+        for principal in resolved.values():
+            if principal is not None:
+                self.activity.record_seen(principal.session_id, principal.expires_at)
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Batch validation: %s tokens, %s looked up, %s valid",
+                len(raw_tokens),
+                len(missing),
+                sum(principal is not None for principal in (*resolved.values(), *verified.values())),
+            )
+        return [
+            verified[raw_token] if token_hash is None else resolved[token_hash]
+            for raw_token, token_hash in zip(raw_tokens, token_hashes)
+        ]
+    
+    def _verify_access_token(self, raw_token: str) -> Optional[AuthenticatedUser]:
+        try:
+            return self.access_token_signer.verify(raw_token)
+        except InvalidSessionError:
+            return None
+    
+    async def _find_principal(self, token_hash: str) -> Tuple[Optional[AuthenticatedUser], bool]:
+        """The principal, and whether it was read from a replica"""
+        if self.replica_session_repo is not None:
+            try:
+                principal = await self.replica_session_repo.find_principal(token_hash)
+                if principal is not None and not self.session_cache.recently_revoked(principal.id):
+                    return principal, True
+            except SQLAlchemyError as e:
+                logger.warning("Replica lookup failed, reading from the primary: %s", e)
+        # A replica miss may be a login it has not replayed yet, and a hit for a recently
+        # revoked user may be a revocation it has not replayed yet; only the primary can say
+        return await self.session_repo.find_principal(token_hash), False
+    
+    async def _find_principals(self, token_hashes: Sequence[str]) -> Tuple[Dict[str, AuthenticatedUser], Set[str]]:
+        """The principals found, and the token hashes whose principal was read from a replica"""
+        found: Dict[str, AuthenticatedUser] = {}
+        if self.replica_session_repo is not None:
+            try:
+                found = {
+                    token_hash: principal
+                    for token_hash, principal in (await self.replica_session_repo.find_principals(token_hashes)).items()
+                    if not self.session_cache.recently_revoked(principal.id)
+                }
+            except SQLAlchemyError as e:
+                logger.warning("Replica lookup failed, reading from the primary: %s", e)
+        from_replica = set(found)
+        remaining = [token_hash for token_hash in token_hashes if token_hash not in found]
+        if remaining:
+            found.update(await self.session_repo.find_principals(remaining))
+        return found, from_replica
+    
+    @staticmethod
+    def _cache_ttl(from_replica: bool) -> Optional[float]:
+        # A replica row may predate a revocation whose event this worker has not seen yet;
+        # keep it no longer than the lag a replica is allowed to have
+        return Config().DATABASE_REPLICA_MAX_LAG_SECONDS if from_replica else None
+    
+    async def refresh_access_token(self, raw_token: str) -> Tuple[str, int]:
+        """
+        Exchange a session (refresh) token for a new signed access token.
+        Returns: (access_token, expires_in_seconds)
+        """
+        if looks_like_access_token(raw_token):
+            # Otherwise an access token could renew itself without a session check
+            raise InvalidSessionError("A session token is required to refresh")
+        
+        principal = await self.validate_session(raw_token)
+        return self.access_token_signer.issue(principal)
+    
+    async def list_sessions(
+        self,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """
+        One page of a user's active sessions, newest first.
+        Returns: (rows, cursor for the next page or None on the last page)
+        """
+        after = SessionCursor.decode(cursor) if cursor else None
+        # One extra row tells whether another page exists without a COUNT
+        rows = await self.session_repo.list_active(user_id, limit + 1, after)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, SessionCursor.encode(rows[-1].created_at, rows[-1].id)
+    
+    async def list_user_sessions(
+        self,
+        user_id: UUID,
+        limit: int,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Row], Optional[str]]:
+        """list_sessions for any user (admin); unknown users are an error rather than an empty page"""
+        if not await self.user_repo.find_by_id(user_id):
+            raise UserNotFoundError("User not found")
+        return await self.list_sessions(user_id, limit, cursor)
+    
+    async def logout(self, raw_token: str) -> None:
+        """Logout by revoking session"""
+        logger.debug("Processing logout")
+        
+        token_hash = self.token_service.hash_token(raw_token)
+        session = await self.session_repo.find_valid_session(token_hash)
+        
+        if not session:
+            raise InvalidSessionError("Invalid or expired session token")
+        
+        await self.session_repo.revoke(session)
+        self.session_cache.invalidate(token_hash)
+        self.rejected_tokens.add(token_hash)
+        logger.info("Session revoked for user %s", session.user_id)
@@ -0,0 +1,152 @@
+# ============================================================================
+# throttle.py - Login Admission Control (Singleton Pattern)
+# ============================================================================
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import TYPE_CHECKING, Optional
+from sqlalchemy.exc import SQLAlchemyError
+from .config import Config
+from .exceptions import LoginThrottledError
+from .metrics import LOGIN_THROTTLED
+
+if TYPE_CHECKING:
+    from .repositories import LoginThrottleRepository
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Token bucket per key, stored as a single theoretical arrival time (GCRA).
+    A key allows `burst` attempts at once and regains one every 60/per_minute
+    seconds. Keys live in a bounded LRU; a key whose time has passed holds no
+    state, so evicting the least recently used ones loses nothing of value.
+    """
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int):
+        self.interval = 60.0 / per_minute
+        self.tolerance = self.interval * burst
+        self.max_keys = max_keys
+        # key -> theoretical arrival time on the monotonic clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejections = 0
+        self.evictions = 0
+
+    def hit(self, key: str) -> float:
+        """Spend one attempt, returns 0 when allowed or seconds until the next one is"""
+        now = time.monotonic()
+        with self._lock:
+            tat = max(self._tats.get(key, now), now) + self.interval
+            if tat - now > self.tolerance:
+                self._tats.move_to_end(key)
+                self.rejections += 1
+                return tat - now - self.tolerance
+
+            self._tats[key] = tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+                self.evictions += 1
+            return 0.0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tats.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "keys": len(self._tats),
+                "rejections": self.rejections,
+                "evictions": self.evictions,
+            }
+
+
+class LoginThrottle:
+    """
+    Singleton admission control for /login, consulted before the user lookup
+    and bcrypt. Attempts are limited per client address and per email; the
+    in-process buckets answer first, and with LOGIN_THROTTLE_SHARED the same
+    limits are then enforced across replicas through the login_throttle table.
+    """
+    _instance: Optional['LoginThrottle'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.enabled = config.LOGIN_THROTTLE_ENABLED
+        self.shared = config.LOGIN_THROTTLE_SHARED
+        self.by_ip = RateLimiter(
+            config.LOGIN_THROTTLE_IP_BURST,
+            config.LOGIN_THROTTLE_IP_PER_MINUTE,
+            config.LOGIN_THROTTLE_MAX_KEYS,
+        )
+        self.by_email = RateLimiter(
+            config.LOGIN_THROTTLE_EMAIL_BURST,
+            config.LOGIN_THROTTLE_EMAIL_PER_MINUTE,
+            config.LOGIN_THROTTLE_MAX_KEYS,
+        )
+        self._initialized = True
+
+    def check(
+        self,
+        email: str,
+        client_ip: Optional[str] = None,
+        shared_repo: Optional['LoginThrottleRepository'] = None,
+    ) -> None:
+        """Spend one login attempt, raises LoginThrottledError when over the limit"""
+        if not self.enabled:
+            return
+
+        email = email.strip().lower()
+        limits = [("email", self.by_email, f"email:{email}")]
+        if client_ip:
+            limits.insert(0, ("ip", self.by_ip, f"ip:{client_ip}"))
+
+        for scope, limiter, key in limits:
+            self._enforce(scope, limiter.hit(key))
+
+        if self.shared and shared_repo is not None:
+            for scope, limiter, key in limits:
+                try:
+                    retry_after = shared_repo.hit(
+                        key,
+                        timedelta(seconds=limiter.interval),
+                        timedelta(seconds=limiter.tolerance),
+                    )
+                except SQLAlchemyError as e:
+                    # The local buckets still hold; don't turn a throttle outage into a login outage
+                    logger.warning("Shared login throttle unavailable: %s", e)
+                    return
+                self._enforce(scope, retry_after)
+
+    def _enforce(self, scope: str, retry_after: float) -> None:
+        if retry_after > 0:
+            LOGIN_THROTTLED.inc(scope)
+            logger.info("Login throttled by %s limit, retry in %.1fs", scope, retry_after)
+            raise LoginThrottledError("Too many login attempts, try again later", retry_after)
+
+    def clear(self) -> None:
+        """Forget every bucket (tests, or after changing limits)"""
+        self.by_ip.clear()
+        self.by_email.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "shared": self.shared,
+            "ip": self.by_ip.stats(),
+            "email": self.by_email.stats(),
+        }
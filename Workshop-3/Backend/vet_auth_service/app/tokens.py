@@ -0,0 +1,182 @@
+# ============================================================================
+# tokens.py - Signed Access Tokens (Singleton Pattern)
+# ============================================================================
+import base64
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+from .config import Config
+from .exceptions import InvalidSessionError
+from .principal import AuthenticatedUser
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+except ImportError:  # EdDSA is optional; HS256 only needs the standard library
+    Ed25519PrivateKey = None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def looks_like_access_token(token: str) -> bool:
+    """Signed access tokens are compact JWS (three dot-separated parts); session tokens have no dots"""
+    return token.count(".") == 2
+
+
+class AccessTokenSigner:
+    """Singleton that issues and verifies short-lived JWT access tokens"""
+    _instance: Optional['AccessTokenSigner'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        config = Config()
+        self.enabled = config.ACCESS_TOKEN_MODE == "signed"
+        self.algorithm = config.ACCESS_TOKEN_ALGORITHM
+        self.ttl_seconds = config.ACCESS_TOKEN_TTL_SECONDS
+        self.issuer = config.ACCESS_TOKEN_ISSUER
+        self.key_id = config.ACCESS_TOKEN_KEY_ID
+
+        self._secret: Optional[bytes] = None
+        self._private_key = None
+        self._public_key = None
+        if self.enabled:
+            self._load_keys(config)
+        self._initialized = True
+
+    def _load_keys(self, config: Config) -> None:
+        if self.algorithm == "HS256":
+            if not config.ACCESS_TOKEN_SECRET:
+                raise RuntimeError("ACCESS_TOKEN_SECRET is required for HS256 access tokens")
+            self._secret = config.ACCESS_TOKEN_SECRET.encode("utf-8")
+        elif self.algorithm == "EdDSA":
+            if Ed25519PrivateKey is None:
+                raise RuntimeError("EdDSA access tokens require the 'cryptography' package (the 'eddsa' extra)")
+            if not config.ACCESS_TOKEN_PRIVATE_KEY_FILE:
+                raise RuntimeError("ACCESS_TOKEN_PRIVATE_KEY_FILE is required for EdDSA access tokens")
+            with open(config.ACCESS_TOKEN_PRIVATE_KEY_FILE, "rb") as key_file:
+                self._private_key = serialization.load_pem_private_key(key_file.read(), password=None)
+            if not isinstance(self._private_key, Ed25519PrivateKey):
+                raise RuntimeError("ACCESS_TOKEN_PRIVATE_KEY_FILE must hold an Ed25519 private key")
+            self._public_key = self._private_key.public_key()
+        else:
+            raise RuntimeError(f"Unsupported ACCESS_TOKEN_ALGORITHM: {self.algorithm}")
+        # Sign once, so a key or crypto backend that cannot sign fails startup, not the first login
+        probe = b"startup-check"
+        try:
+            usable = self._verify_signature(probe, self._sign(probe))
+        except Exception as e:
+            raise RuntimeError(f"{self.algorithm} access token signing does not work: {e}") from e
+        if not usable:
+            raise RuntimeError(f"{self.algorithm} access token key cannot verify its own signature")
+
+    def issue(self, principal: AuthenticatedUser) -> tuple[str, int]:
+        """
+        Sign an access token for a validated session.
+        Returns: (access_token, expires_in_seconds)
+        """
+        now = int(time.time())
+        # Never outlive the session that backs the token
+        expires_at = min(now + self.ttl_seconds, int(principal.expires_at.timestamp()))
+        header = {"alg": self.algorithm, "typ": "JWT", "kid": self.key_id}
+        claims = {
+            "iss": self.issuer,
+            "sub": str(principal.id),
+            "sid": str(principal.session_id),
+            "name": principal.name,
+            "email": principal.email,
+            "role": principal.role,
+            "iat": now,
+            "exp": expires_at,
+        }
+        signing_input = (
+            _b64encode(json.dumps(header, separators=(",", ":")).encode("utf-8"))
+            + "."
+            + _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        )
+        signature = self._sign(signing_input.encode("ascii"))
+        return f"{signing_input}.{_b64encode(signature)}", expires_at - now
+
+    def verify(self, token: str) -> AuthenticatedUser:
+        """Check signature and expiry locally and return the embedded principal"""
+        try:
+            encoded_header, encoded_claims, encoded_signature = token.split(".")
+            signing_input = f"{encoded_header}.{encoded_claims}".encode("ascii")
+            header = json.loads(_b64decode(encoded_header))
+            signature = _b64decode(encoded_signature)
+        except ValueError:
+            raise InvalidSessionError("Malformed access token")
+
+        # Pin the algorithm; never let the token pick how it is verified
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm or header.get("kid") != self.key_id:
+            raise InvalidSessionError("Access token was not issued by this service")
+        if not self._verify_signature(signing_input, signature):
+            raise InvalidSessionError("Invalid access token signature")
+
+        try:
+            claims = json.loads(_b64decode(encoded_claims))
+            if claims["iss"] != self.issuer:
+                raise InvalidSessionError("Access token was not issued by this service")
+            if claims["exp"] <= time.time():
+                raise InvalidSessionError("Access token expired")
+            return AuthenticatedUser(
+                id=UUID(claims["sub"]),
+                name=claims["name"],
+                email=claims["email"],
+                role=claims["role"],
+                session_id=UUID(claims["sid"]),
+                expires_at=datetime.fromtimestamp(claims["exp"], timezone.utc),
+            )
+        except (ValueError, KeyError, TypeError):
+            raise InvalidSessionError("Malformed access token")
+
+    def jwks(self) -> dict:
+        """Public verification keys; empty for HS256, whose secret is shared out of band"""
+        if self._public_key is None:
+            return {"keys": []}
+        raw = self._public_key.public_bytes(
+            encoding=serialization.Encoding.Raw,
+            format=serialization.PublicFormat.Raw,
+        )
+        return {
+            "keys": [{
+                "kty": "OKP",
+                "crv": "Ed25519",
+                "alg": "EdDSA",
+                "use": "sig",
+                "kid": self.key_id,
+                "x": _b64encode(raw),
+            }]
+        }
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self._secret is not None:
+            return hmac.new(self._secret, signing_input, hashlib.sha256).digest()
+        return self._private_key.sign(signing_input)
+
+    def _verify_signature(self, signing_input: bytes, signature: bytes) -> bool:
+        if self._secret is not None:
+            return hmac.compare_digest(self._sign(signing_input), signature)
+        try:
+            self._public_key.verify(signature, signing_input)
+            return True
+        except InvalidSignature:
+            return False
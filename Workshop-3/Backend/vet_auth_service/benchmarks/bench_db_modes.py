@@ -0,0 +1,145 @@
+# ============================================================================
+# bench_db_modes.py - /me throughput on the sync vs async database path
+# ============================================================================
+"""
+Drives concurrent GET /me requests through the ASGI app in-process and reports
+throughput and latency for each DATABASE_ASYNC mode. The session cache is
+disabled so every request reaches Postgres.
+
+Usage (from the vet_auth_service directory):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_db_modes --concurrency 50 --requests 1000
+
+Each mode runs in its own subprocess because Config and DatabaseManager are
+process-wide singletons.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_mode(concurrency: int, total: int, raw_token: str) -> dict:
+    import httpx
+    from app.main import app
+    from app.database import DatabaseManager
+
+    headers = {"Authorization": f"Bearer {raw_token}"}
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get("/me", headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        await asyncio.gather(*(one() for _ in range(min(concurrency, total))))  # warm-up
+        latencies.clear()
+        errors = 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+
+    db_manager = DatabaseManager()
+    if db_manager.async_enabled:
+        await db_manager.async_engine.dispose()
+
+    return {
+        "mode": "async" if db_manager.async_enabled else "sync",
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def seed_session():
+    """Commit a throwaway user and session; returns (user_id, raw_token)"""
+    from app.database import DatabaseManager
+    from app.models import AppUser, UserSession
+    from app.security import hash_password
+    from app.services import TokenService
+
+    with DatabaseManager().session_scope() as db:
+        user = AppUser(
+            name="Benchmark User",
+            email=f"bench-{time.time_ns()}@example.com",
+            password_hash=hash_password("BenchPass123!"),
+        )
+        db.add(user)
+        db.flush()
+        raw_token, token_hash = TokenService.generate_session_token()
+        db.add(UserSession(
+            user_id=user.id,
+            token_digest=bytes.fromhex(token_hash),
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+        ))
+        return user.id, raw_token
+
+
+def delete_user(user_id):
+    from app.database import DatabaseManager
+    from app.models import AppUser
+
+    with DatabaseManager().session_scope() as db:
+        db.query(AppUser).filter(AppUser.id == user_id).delete()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode != "both":
+        logging.getLogger("httpx").setLevel(logging.WARNING)
+        result = asyncio.run(run_mode(args.concurrency, args.requests, args.token))
+        print(json.dumps(result))
+        return
+
+    user_id, raw_token = seed_session()
+    try:
+        for mode in ("sync", "async"):
+            env = dict(
+                os.environ,
+                DATABASE_ASYNC="true" if mode == "async" else "false",
+                SESSION_CACHE_ENABLED="false",
+                REVOCATION_LISTENER_ENABLED="false",
+            )
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_db_modes",
+                 "--mode", mode,
+                 "--concurrency", str(args.concurrency),
+                 "--requests", str(args.requests),
+                 "--token", raw_token],
+                env=env,
+                check=True,
+            )
+    finally:
+        delete_user(user_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# ============================================================================
+# bench_login_writes.py - Database work per login, before and after the CTE
+# ============================================================================
+"""
+Times the database side of a successful login, everything except bcrypt:
+
+  before  find_by_email, SessionRepository.create (INSERT, commit, refresh
+          SELECT), reloading the expired user for the response, then
+          update_last_login (UPDATE, commit) -- the pre-CTE write path
+  after   find_by_email, SessionRepository.create_for_login: one INSERT ...
+          RETURNING that also stamps last_login_at in a data-modifying CTE,
+          one commit, nothing reloaded
+
+Both run with write-behind off, so last_login_at is written during the login
+as it was before; the "after_write_behind" row leaves it to ActivityRecorder.
+Each login gets a fresh Session and token, as a request would. Statement and
+commit counts come from engine events on one extra login per path.
+
+Usage (from the vet_auth_service directory):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_login_writes --iterations 2000
+"""
+import argparse
+import json
+import logging
+import time
+from datetime import datetime, timezone
+
+
+def login_before(db, email, client_type):
+    from app.repositories import SessionRepository, UserRepository
+    from app.services import TokenService
+
+    user = UserRepository(db).find_by_email(email)
+    _, token_hash = TokenService.generate_session_token()
+    session = SessionRepository(db).create(
+        user.id, token_hash, TokenService.calculate_expiry(), client_type, "127.0.0.1",
+    )
+    principal = (user.id, user.name, user.email, user.role, session.id, session.expires_at)
+    UserRepository(db).update_last_login(user)
+    return principal
+
+
+def login_after(db, email, client_type, touch_last_login=True):
+    from app.repositories import SessionRepository, UserRepository
+    from app.services import TokenService
+
+    user = UserRepository(db).find_by_email(email)
+    user_id, name, user_email, role = user.id, user.name, user.email, user.role
+    _, token_hash = TokenService.generate_session_token()
+    session_id, expires_at = SessionRepository(db).create_for_login(
+        user_id, token_hash, TokenService.calculate_expiry(), client_type, "127.0.0.1",
+        last_login_at=datetime.now(timezone.utc) if touch_last_login else None,
+    )
+    return user_id, name, user_email, role, session_id, expires_at
+
+
+def login_after_write_behind(db, email, client_type):
+    return login_after(db, email, client_type, touch_last_login=False)
+
+
+def count_round_trips(engine, login, email, client_type):
+    from sqlalchemy import event
+    from app.database import DatabaseManager
+
+    counts = {"statements": 0, "commits": 0}
+
+    def statement(*args):
+        counts["statements"] += 1
+
+    def commit(conn):
+        counts["commits"] += 1
+
+    event.listen(engine, "before_cursor_execute", statement)
+    event.listen(engine, "commit", commit)
+    try:
+        db = DatabaseManager().get_session()
+        try:
+            login(db, email, client_type)
+        finally:
+            db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", statement)
+        event.remove(engine, "commit", commit)
+    return counts
+
+
+def measure(login, email, client_type, iterations):
+    from app.database import DatabaseManager
+
+    db_manager = DatabaseManager()
+    for _ in range(min(100, iterations)):  # warm the pool, the statement cache and the client agent id
+        db = db_manager.get_session()
+        login(db, email, client_type)
+        db.close()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        db = db_manager.get_session()
+        login(db, email, client_type)
+        db.close()
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--client-type", default="web")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    from app.database import DatabaseManager
+    from app.models import AppUser
+    from benchmarks.bench_db_modes import seed_session, delete_user
+
+    user_id, _ = seed_session()
+    with DatabaseManager().session_scope() as db:
+        email = db.get(AppUser, user_id).email
+    engine = DatabaseManager().engine
+    try:
+        results = {}
+        for name, login in (
+            ("before", login_before),
+            ("after", login_after),
+            ("after_write_behind", login_after_write_behind),
+        ):
+            results[name] = measure(login, email, args.client_type, args.iterations)
+            results[name].update(count_round_trips(engine, login, email, args.client_type))
+        print(json.dumps(results, indent=2))
+    finally:
+        delete_user(user_id)
+
+
+if __name__ == "__main__":
+    main()
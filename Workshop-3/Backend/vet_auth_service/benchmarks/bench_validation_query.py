@@ -0,0 +1,134 @@
+# ============================================================================
+# bench_validation_query.py - ORM vs Core session validation lookup
+# ============================================================================
+"""
+Compares the two ways of turning a token hash into an AuthenticatedUser:
+
+  orm   SessionRepository.find_valid_session, then session.user (lazy load),
+        copied into an AuthenticatedUser -- the pre-fast-path behaviour
+  core  SessionRepository.find_principal, a single cached Core SELECT whose
+        row maps straight onto AuthenticatedUser
+
+Each call gets a fresh Session, as a request would. Latency is measured
+without tracing; allocation figures come from a separate tracemalloc pass.
+
+Usage (from the vet_auth_service directory):
+
+    DATABASE_URL=postgresql://... python -m benchmarks.bench_validation_query --iterations 2000
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+
+def orm_lookup(db, token_hash):
+    from app.principal import AuthenticatedUser
+    from app.repositories import SessionRepository
+
+    session = SessionRepository(db).find_valid_session(token_hash)
+    return AuthenticatedUser(
+        id=session.user.id,
+        name=session.user.name,
+        email=session.user.email,
+        role=session.user.role,
+        session_id=session.id,
+        expires_at=session.expires_at,
+    )
+
+
+def core_lookup(db, token_hash):
+    from app.repositories import SessionRepository
+
+    return SessionRepository(db).find_principal(token_hash)
+
+
+def count_queries(engine, lookup, token_hash):
+    from sqlalchemy import event
+    from app.database import DatabaseManager
+
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        db = DatabaseManager().get_session()
+        try:
+            lookup(db, token_hash)
+        finally:
+            db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return len(statements)
+
+
+def measure(lookup, token_hash, iterations):
+    from app.database import DatabaseManager
+
+    db_manager = DatabaseManager()
+    for _ in range(min(100, iterations)):  # warm the pool and the statement cache
+        db = db_manager.get_session()
+        lookup(db, token_hash)
+        db.close()
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        db = db_manager.get_session()
+        lookup(db, token_hash)
+        db.close()
+        latencies.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    peaks, allocated = [], []
+    for _ in range(min(200, iterations)):
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        db = db_manager.get_session()
+        lookup(db, token_hash)
+        db.close()
+        after = tracemalloc.take_snapshot()
+        stats = after.compare_to(before, "filename")
+        allocated.append(sum(stat.count_diff for stat in stats if stat.count_diff > 0))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "iterations": iterations,
+        "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+        "retained_blocks_per_call": round(sum(allocated) / len(allocated), 1),
+        "peak_traced_kib": round(sum(peaks) / len(peaks) / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    from app.database import DatabaseManager
+    from benchmarks.bench_db_modes import seed_session, delete_user
+    from app.services import TokenService
+
+    user_id, raw_token = seed_session()
+    token_hash = TokenService.hash_token(raw_token)
+    engine = DatabaseManager().engine
+    try:
+        results = {}
+        for name, lookup in (("orm", orm_lookup), ("core", core_lookup)):
+            results[name] = measure(lookup, token_hash, args.iterations)
+            results[name]["queries_per_call"] = count_queries(engine, lookup, token_hash)
+        print(json.dumps(results, indent=2))
+    finally:
+        delete_user(user_id)
+
+
+if __name__ == "__main__":
+    main()
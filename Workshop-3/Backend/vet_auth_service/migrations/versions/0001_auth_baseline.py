@@ -0,0 +1,69 @@
+"""Auth schema baseline
+
+Mirrors app_user and user_session as created by vettrack-db/sql/00-schema.sql.
+Every statement is IF NOT EXISTS, so upgrading a database initialised from
+that script only records the revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS citext")
+    op.execute("""
+        DO $$
+        BEGIN
+          IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = 'user_role') THEN
+            CREATE TYPE user_role AS ENUM ('vet', 'admin');
+          END IF;
+        END$$
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS app_user (
+          id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+          name             TEXT NOT NULL,
+          email            CITEXT UNIQUE NOT NULL,
+          role             user_role NOT NULL DEFAULT 'vet',
+          password_hash    TEXT NOT NULL,
+          status           BOOLEAN NOT NULL DEFAULT TRUE,
+          last_login_at    TIMESTAMPTZ,
+          created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+          updated_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS user_session (
+          id             UUID NOT NULL DEFAULT gen_random_uuid(),
+          user_id        UUID NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
+          token_hash     TEXT NOT NULL,
+          created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
+          expires_at     TIMESTAMPTZ NOT NULL,
+          revoked_at     TIMESTAMPTZ,
+          user_agent     TEXT,
+          ip_address     INET,
+          PRIMARY KEY (id, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.execute("CREATE TABLE IF NOT EXISTS user_session_default PARTITION OF user_session DEFAULT")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_user_session_user_id ON user_session (user_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_user_session_token_hash ON user_session (token_hash)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS user_session")
+    # Fails while business tables still reference app_user, which is intended
+    op.execute("DROP TABLE IF EXISTS app_user")
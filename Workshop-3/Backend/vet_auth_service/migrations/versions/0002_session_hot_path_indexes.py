@@ -0,0 +1,50 @@
+"""Partial indexes for session validation and revocation
+
+uq_user_session_active_token serves the validation lookup
+(token_hash = ? AND expires_at > ? AND revoked_at IS NULL) as an index-only
+scan: the partial predicate covers revoked_at and INCLUDE carries the id and
+user_id the query returns. A unique index on a partitioned table has to
+contain the partition key, hence (token_hash, expires_at) rather than
+token_hash alone. It replaces the plain idx_user_session_token_hash.
+
+idx_user_session_active_by_user serves revoke_all_user_sessions
+(user_id = ? AND expires_at > ? AND revoked_at IS NULL). idx_user_session_user_id
+stays for the ON DELETE CASCADE from app_user, which has to find revoked rows too.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY is not supported on partitioned tables; each partition is small
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_user_session_active_token
+          ON user_session (token_hash, expires_at) INCLUDE (id, user_id)
+          WHERE revoked_at IS NULL
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_session_active_by_user
+          ON user_session (user_id, expires_at)
+          WHERE revoked_at IS NULL
+    """)
+    op.execute("DROP INDEX IF EXISTS idx_user_session_token_hash")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("CREATE INDEX IF NOT EXISTS idx_user_session_token_hash ON user_session (token_hash)")
+    op.execute("DROP INDEX IF EXISTS idx_user_session_active_by_user")
+    op.execute("DROP INDEX IF EXISTS uq_user_session_active_token")
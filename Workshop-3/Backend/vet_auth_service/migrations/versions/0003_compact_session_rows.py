@@ -0,0 +1,84 @@
+"""Compact user_session rows
+
+Adds token_digest (the SHA-256 as 32 bytes instead of 64 hex characters) and
+client_agent_id (a lookup into the new client_agent dictionary instead of the
+free-text user_agent). Existing rows are left as they are: the service reads
+both formats while SESSION_LEGACY_READS is on, and legacy rows disappear with
+the reaper once they pass retention. A later revision can then drop
+token_hash, user_agent and uq_user_session_active_token.
+
+The legacy token index is rebuilt with "token_hash IS NOT NULL" so compact rows
+do not add NULL entries to it, and the new digest index mirrors it.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS client_agent (
+          id          INTEGER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+          user_agent  TEXT NOT NULL UNIQUE
+        )
+    """)
+    op.execute("""
+        ALTER TABLE user_session
+          ADD COLUMN IF NOT EXISTS token_digest BYTEA,
+          ADD COLUMN IF NOT EXISTS client_agent_id INTEGER REFERENCES client_agent(id),
+          ALTER COLUMN token_hash DROP NOT NULL,
+          ADD CONSTRAINT ck_user_session_token_present CHECK (token_digest IS NOT NULL OR token_hash IS NOT NULL),
+          ADD CONSTRAINT ck_user_session_token_digest_length CHECK (octet_length(token_digest) = 32)
+    """)
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_user_session_active_digest
+          ON user_session (token_digest, expires_at) INCLUDE (id, user_id)
+          WHERE revoked_at IS NULL AND token_digest IS NOT NULL
+    """)
+    op.execute("DROP INDEX IF EXISTS uq_user_session_active_token")
+    op.execute("""
+        CREATE UNIQUE INDEX uq_user_session_active_token
+          ON user_session (token_hash, expires_at) INCLUDE (id, user_id)
+          WHERE revoked_at IS NULL AND token_hash IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Rewrite compact rows in the legacy format so nothing is lost
+    op.execute("""
+        UPDATE user_session s
+           SET token_hash = COALESCE(s.token_hash, encode(s.token_digest, 'hex')),
+               user_agent = COALESCE(s.user_agent, c.user_agent)
+          FROM client_agent c
+         WHERE c.id = s.client_agent_id
+    """)
+    op.execute("UPDATE user_session SET token_hash = encode(token_digest, 'hex') WHERE token_hash IS NULL")
+    op.execute("DROP INDEX IF EXISTS uq_user_session_active_token")
+    op.execute("""
+        CREATE UNIQUE INDEX uq_user_session_active_token
+          ON user_session (token_hash, expires_at) INCLUDE (id, user_id)
+          WHERE revoked_at IS NULL
+    """)
+    op.execute("DROP INDEX IF EXISTS uq_user_session_active_digest")
+    op.execute("""
+        ALTER TABLE user_session
+          DROP CONSTRAINT IF EXISTS ck_user_session_token_digest_length,
+          DROP CONSTRAINT IF EXISTS ck_user_session_token_present,
+          ALTER COLUMN token_hash SET NOT NULL,
+          DROP COLUMN IF EXISTS client_agent_id,
+          DROP COLUMN IF EXISTS token_digest
+    """)
+    op.execute("DROP TABLE IF EXISTS client_agent")
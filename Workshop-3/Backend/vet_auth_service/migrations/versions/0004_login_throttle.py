@@ -0,0 +1,36 @@
+"""Shared login throttle state
+
+One row per throttled key (email or client address) holding its GCRA
+theoretical arrival time. UNLOGGED: it is rewritten on every login attempt and
+losing it in a crash only resets the limits. Rows whose time has passed carry
+no state and are deleted by the session reaper.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE UNLOGGED TABLE IF NOT EXISTS login_throttle (
+          key  TEXT PRIMARY KEY,
+          tat  TIMESTAMPTZ NOT NULL
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS login_throttle")
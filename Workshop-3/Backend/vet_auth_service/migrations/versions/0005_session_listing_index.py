@@ -0,0 +1,39 @@
+"""Covering index for the active sessions listing
+
+GET /sessions pages through a user's active sessions newest first with a
+keyset on (created_at, id). idx_user_session_active_listing serves it as a
+backward index-only scan per partition: the key gives the order and the
+keyset bound, the partial predicate covers revoked_at and INCLUDE carries
+every column the listing returns, so no heap page is read however many
+sessions the user has.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY is not supported on partitioned tables; each partition is small
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_session_active_listing
+          ON user_session (user_id, created_at, id)
+          INCLUDE (expires_at, client_agent_id, ip_address, user_agent)
+          WHERE revoked_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_user_session_active_listing")
@@ -0,0 +1,30 @@
+"""Per-session last_seen_at
+
+Written behind by app.activity: requests only update an in-memory map, and
+each worker flushes it with one UPDATE ... FROM (VALUES ...) per flush
+interval. The column is in no index, so those updates can stay HOT.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE user_session ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE user_session DROP COLUMN IF EXISTS last_seen_at")
@@ -0,0 +1,130 @@
+# ============================================================================
+# test_activity.py - Write-Behind Activity Timestamp Tests
+# ============================================================================
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from fastapi import status
+from app.repositories import ActivityRepository
+
+
+def at(minutes):
+    return datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc) + timedelta(minutes=minutes)
+
+
+class TestActivityRecorder:
+    """Test cases for coalescing timestamps in memory"""
+
+    def test_keeps_latest_per_key(self, activity_recorder):
+        """Test that repeated activity is one pending write holding the newest time"""
+        user_id, session_id = uuid4(), uuid4()
+        activity_recorder.record_login(user_id, at(2))
+        activity_recorder.record_login(user_id, at(1))
+        for minutes in range(5):
+            activity_recorder.record_seen(session_id, at(60), at(minutes))
+
+        stats = activity_recorder.stats()
+
+        assert (stats["pending_logins"], stats["pending_sessions"]) == (1, 1)
+        assert activity_recorder._logins[user_id] == at(2)
+        assert activity_recorder._seen[(session_id, at(60))] == at(4)
+
+    def test_drops_beyond_max_pending(self, activity_recorder, monkeypatch):
+        """Test that memory stays bounded when flushes cannot keep up"""
+        monkeypatch.setattr(activity_recorder, "max_pending", 2)
+        for _ in range(3):
+            activity_recorder.record_seen(uuid4(), at(60))
+
+        assert activity_recorder.stats()["pending_sessions"] == 2
+        assert activity_recorder.stats()["dropped"] == 1
+
+    def test_failed_flush_keeps_timestamps(self, activity_recorder, db_session, mocker):
+        """Test that a batch that could not be written is retried by the next flush"""
+        mocker.patch.object(ActivityRepository, "touch_users", side_effect=RuntimeError("down"))
+        user_id = uuid4()
+        activity_recorder.record_login(user_id, at(1))
+
+        assert activity_recorder.flush(db_session) == 0
+
+        assert activity_recorder._logins == {user_id: at(1)}
+        assert activity_recorder.stats()["failures"] == 1
+
+    def test_stop_flushes(self, activity_recorder, mocker):
+        """Test that shutdown writes what is still pending"""
+        flush = mocker.patch.object(activity_recorder, "flush")
+        activity_recorder.start()
+
+        activity_recorder.stop()
+
+        flush.assert_called_once_with()
+
+
+class TestActivityFlush:
+    """Test cases for the multi-row UPDATEs"""
+
+    def test_flush_writes_both_tables(self, activity_recorder, valid_session, db_session):
+        """Test that one flush sets last_login_at and last_seen_at"""
+        session = valid_session["session"]
+        activity_recorder.record_login(valid_session["user"].id, at(1))
+        activity_recorder.record_seen(session.id, session.expires_at, at(2))
+        activity_recorder.record_seen(uuid4(), session.expires_at, at(3))
+
+        assert activity_recorder.flush(db_session) == 2
+
+        db_session.refresh(valid_session["user"])
+        db_session.refresh(session)
+        assert valid_session["user"].last_login_at == at(1)
+        assert session.last_seen_at == at(2)
+        assert activity_recorder.stats()["pending_sessions"] == 0
+
+    def test_flush_never_moves_backwards(self, activity_recorder, valid_session, db_session):
+        """Test that an older timestamp from a slower worker does not overwrite a newer one"""
+        user = valid_session["user"]
+        activity_recorder.record_login(user.id, at(5))
+        activity_recorder.flush(db_session)
+        activity_recorder.record_login(user.id, at(1))
+        activity_recorder.flush(db_session)
+
+        db_session.refresh(user)
+        assert user.last_login_at == at(5)
+
+
+class TestActivityRecording:
+    """Test cases for what the routes record"""
+
+    def test_me_does_not_write(self, client, valid_session, activity_recorder, db_session):
+        """Test that /me only records in memory until the flush"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        for _ in range(3):
+            assert client.get("/me", headers=headers).status_code == status.HTTP_200_OK
+
+        db_session.refresh(valid_session["session"])
+        assert valid_session["session"].last_seen_at is None
+        assert activity_recorder.stats()["pending_sessions"] == 1
+
+        activity_recorder.flush(db_session)
+        db_session.refresh(valid_session["session"])
+        assert valid_session["session"].last_seen_at is not None
+
+    def test_login_is_written_behind(self, client, created_user, sample_user_data, activity_recorder, db_session):
+        """Test that a login records last_login_at without its own commit"""
+        response = client.post(
+            "/login",
+            json={"email": sample_user_data["email"], "password": sample_user_data["password"]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert activity_recorder.stats()["pending_logins"] == 1
+        activity_recorder.flush(db_session)
+        db_session.refresh(created_user)
+        assert created_user.last_login_at is not None
+
+    def test_disabled_writes_login_immediately(self, auth_service, created_user, sample_user_data, activity_recorder, monkeypatch, db_session):
+        """Test the synchronous fallback when write-behind is off"""
+        monkeypatch.setattr(activity_recorder, "enabled", False)
+
+        auth_service.authenticate(sample_user_data["email"], sample_user_data["password"])
+
+        db_session.refresh(created_user)
+        assert created_user.last_login_at is not None
+        assert activity_recorder.stats()["pending_logins"] == 0
@@ -160,6 +160,188 @@ class TestMeEndpoint:
         response = client.get("/me")
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_get_me_conditional(self, client, valid_session):
+        """Test that a matching If-None-Match gets 304 with the same validators"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        first = client.get("/me", headers=headers)
+        etag = first.headers["ETag"]
+        
+        second = client.get("/me", headers={**headers, "If-None-Match": f'"other", W/{etag}'})
+        
+        assert second.status_code == status.HTTP_304_NOT_MODIFIED
+        assert second.content == b""
+        assert second.headers["ETag"] == etag
+        assert second.headers["Cache-Control"] == first.headers["Cache-Control"]
+        assert client.get("/me", headers={**headers, "If-None-Match": '"other"'}).status_code == status.HTTP_200_OK
+    
+    def test_get_me_etag_follows_body(self, client, valid_session, admin_session):
+        """Test that different users get different ETags and the same user the same one"""
+        user_headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        admin_headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        
+        etags = [client.get("/me", headers=headers).headers["ETag"] for headers in (user_headers, user_headers, admin_headers)]
+        
+        assert etags[0] == etags[1] != etags[2]
+        assert client.get("/me", headers=user_headers).headers["Vary"] == "Authorization"
+    
+    def test_get_me_max_age_bounded_by_session(self, client, valid_session, db_session, session_cache):
+        """Test that Cache-Control never outlives the session"""
+        from datetime import datetime, timedelta, timezone
+        from app.config import Config
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        assert client.get("/me", headers=headers).headers["Cache-Control"] == f"private, max-age={Config().ME_CACHE_MAX_AGE_SECONDS}"
+        
+        valid_session["session"].expires_at = datetime.now(timezone.utc) + timedelta(seconds=10)
+        db_session.commit()
+        session_cache.clear()
+        
+        max_age = int(client.get("/me", headers=headers).headers["Cache-Control"].split("max-age=")[1])
+        assert 0 < max_age <= 10
+
+
+class TestBatchValidateEndpoint:
+    """Test cases for batch token validation"""
+    
+    def test_mixed_tokens(self, client, valid_session):
+        """Test that each token gets its own result, in request order"""
+        raw_token = valid_session["raw_token"]
+        response = client.post(
+            "/sessions/validate:batch",
+            json={"tokens": ["bogus", raw_token, raw_token]},
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [result["valid"] for result in results] == [False, True, True]
+        assert results[0]["error"] is not None
+        assert results[1]["user"]["email"] == valid_session["user"].email
+        assert results[1]["session_id"] == str(valid_session["session"].id)
+    
+    def test_served_from_cache(self, client, valid_session, session_cache):
+        """Test that a token validated via /me is not looked up again"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        client.get("/me", headers=headers)
+        
+        response = client.post("/sessions/validate:batch", json={"tokens": [valid_session["raw_token"]]})
+        
+        assert response.json()["results"][0]["valid"] is True
+        assert session_cache.stats()["hits"] == 1
+    
+    def test_too_many_tokens(self, client, monkeypatch):
+        """Test that batches above the configured limit are rejected"""
+        from app.config import Config
+        monkeypatch.setattr(Config(), "SESSION_VALIDATE_BATCH_MAX", 2)
+        
+        response = client.post("/sessions/validate:batch", json={"tokens": ["a", "b", "c"]})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    
+    def test_empty_batch(self, client):
+        """Test that an empty batch is rejected"""
+        response = client.post("/sessions/validate:batch", json={"tokens": []})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+
+class TestSessionsEndpoint:
+    """Test cases for listing active sessions"""
+    
+    @pytest.fixture
+    def many_sessions(self, db_session, valid_session):
+        """Four more sessions for the same user, all with the same created_at (one transaction)"""
+        from app.repositories import SessionRepository
+        from app.services import TokenService
+        repo = SessionRepository(db_session)
+        for index in range(4):
+            _, token_hash = TokenService.generate_session_token()
+            repo.create(
+                valid_session["user"].id,
+                token_hash,
+                TokenService.calculate_expiry(),
+                user_agent=f"Terminal {index}",
+                ip_address="10.0.0.1",
+            )
+        return valid_session
+    
+    def test_pages_cover_every_session_once(self, client, many_sessions):
+        """Test that following next_cursor returns each session exactly once"""
+        headers = {"Authorization": f"Bearer {many_sessions['raw_token']}"}
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/sessions", headers=headers, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            assert len(page["sessions"]) <= 2
+            seen.extend(page["sessions"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert len(seen) == 5
+        assert len({session["id"] for session in seen}) == 5
+        current = [session for session in seen if session["is_current"]]
+        assert [session["id"] for session in current] == [str(many_sessions["session"].id)]
+        assert {session["user_agent"] for session in seen} >= {"Terminal 0", "Terminal 3"}
+        assert "10.0.0.1" in {session["ip_address"] for session in seen}
+    
+    def test_revoked_sessions_are_not_listed(self, client, many_sessions, db_session):
+        """Test that only active sessions are returned"""
+        from app.repositories import SessionRepository
+        from app.services import TokenService
+        repo = SessionRepository(db_session)
+        repo.revoke(many_sessions["session"])
+        raw_token, token_hash = TokenService.generate_session_token()
+        repo.create(many_sessions["user"].id, token_hash, TokenService.calculate_expiry())
+        
+        response = client.get("/sessions", headers={"Authorization": f"Bearer {raw_token}"})
+        
+        ids = {session["id"] for session in response.json()["sessions"]}
+        assert len(ids) == 5
+        assert str(many_sessions["session"].id) not in ids
+    
+    def test_invalid_cursor(self, client, valid_session):
+        """Test that a malformed cursor is rejected"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        response = client.get("/sessions", headers=headers, params={"cursor": "not-a-cursor"})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    
+    def test_limit_above_maximum(self, client, valid_session, monkeypatch):
+        """Test that pages above the configured size are rejected"""
+        from app.config import Config
+        monkeypatch.setattr(Config(), "SESSION_LIST_PAGE_MAX", 10)
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        
+        response = client.get("/sessions", headers=headers, params={"limit": 11})
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    
+    def test_admin_lists_any_user(self, client, admin_session, many_sessions):
+        """Test the admin variant for another user's sessions"""
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        response = client.get(f"/admin/users/{many_sessions['user'].id}/sessions", headers=headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        sessions = response.json()["sessions"]
+        assert len(sessions) == 5
+        assert not any(session["is_current"] for session in sessions)
+    
+    def test_admin_variant_requires_admin(self, client, valid_session):
+        """Test that regular users cannot list other users' sessions"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        response = client.get(f"/admin/users/{valid_session['user'].id}/sessions", headers=headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_admin_unknown_user(self, client, admin_session):
+        """Test listing sessions of a user that does not exist"""
+        from uuid import uuid4
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        response = client.get(f"/admin/users/{uuid4()}/sessions", headers=headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 class TestChangePasswordEndpoint:
@@ -202,6 +384,78 @@ class TestChangePasswordEndpoint:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+class TestAdminEndpoints:
+    """Test cases for admin endpoints"""
+    
+    def test_deactivate_user(self, client, admin_session, valid_session):
+        """Test that an admin can deactivate a user"""
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        response = client.post(f"/admin/users/{valid_session['user'].id}/deactivate", headers=headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        
+        me = client.get("/me", headers={"Authorization": f"Bearer {valid_session['raw_token']}"})
+        assert me.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_deactivate_user_requires_admin(self, client, valid_session):
+        """Test that regular users cannot deactivate accounts"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        response = client.post(f"/admin/users/{valid_session['user'].id}/deactivate", headers=headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_deactivate_unknown_user(self, client, admin_session):
+        """Test deactivating a user that does not exist"""
+        from uuid import uuid4
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        response = client.post(f"/admin/users/{uuid4()}/deactivate", headers=headers)
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_revoke_sessions_by_network(self, client, admin_session, valid_session, db_session):
+        """Test that a bulk revocation takes effect even for a cached session"""
+        from app.models import UserSession
+        db_session.query(UserSession).filter(UserSession.id == valid_session["session"].id).update({"ip_address": "10.20.0.5"})
+        db_session.commit()
+        user_headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        assert client.get("/me", headers=user_headers).status_code == status.HTTP_200_OK
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        
+        response = client.post("/admin/sessions:revoke", json={"networks": ["10.20.0.0/16"]}, headers=headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"revoked": 1, "users": 1}
+        assert client.get("/me", headers=user_headers).status_code == status.HTTP_401_UNAUTHORIZED
+        assert client.get("/me", headers=headers).status_code == status.HTTP_200_OK
+    
+    def test_revoke_sessions_requires_criterion(self, client, admin_session):
+        """Test that a revocation without criteria or with a bad network is rejected"""
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        
+        assert client.post("/admin/sessions:revoke", json={}, headers=headers).status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+        response = client.post("/admin/sessions:revoke", json={"networks": ["10.20.0.0/99"]}, headers=headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+    
+    def test_revoke_sessions_requires_admin(self, client, valid_session):
+        """Test that regular users cannot revoke sessions in bulk"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        response = client.post("/admin/sessions:revoke", json={"client_types": ["web"]}, headers=headers)
+        
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_admin_stats(self, client, admin_session):
+        """Test cache statistics endpoint"""
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+        client.get("/me", headers=headers)
+        response = client.get("/admin/stats", headers=headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        cache_stats = response.json()["session_cache"]
+        assert cache_stats["hits"] >= 1
+        assert "evictions" in cache_stats
+        assert "pending" in response.json()["password_hasher"]
+
+
 class TestCORSMiddleware:
     """Test cases for CORS middleware"""
 
@@ -0,0 +1,141 @@
+# ============================================================================
+# test_cache.py - Session Cache Unit Tests
+# ============================================================================
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from app.principal import AuthenticatedUser
+
+
+def make_principal(user_id=None, expires_in=timedelta(hours=8)):
+    """Build a principal for cache tests"""
+    return AuthenticatedUser(
+        id=user_id or uuid4(),
+        name="Cached User",
+        email="cached@example.com",
+        role="vet",
+        session_id=uuid4(),
+        expires_at=datetime.now(timezone.utc) + expires_in,
+    )
+
+
+class TestSessionCache:
+    """Test cases for SessionCache"""
+
+    def test_miss_then_hit(self, session_cache):
+        """Test that a cached principal is served after a miss"""
+        principal = make_principal()
+
+        assert session_cache.get("hash-1") is None
+        session_cache.put("hash-1", principal)
+
+        assert session_cache.get("hash-1") == principal
+        stats = session_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["entries"] == 1
+        assert stats["bytes"] > 0
+
+    def test_ttl_capped_at_session_expiry(self, session_cache):
+        """Test that entries never outlive the session they describe"""
+        session_cache.put("expired", make_principal(expires_in=timedelta(seconds=-1)))
+
+        assert session_cache.get("expired") is None
+        assert session_cache.stats()["entries"] == 0
+
+    def test_expired_entry_is_dropped(self, session_cache, monkeypatch):
+        """Test that entries are dropped once their TTL elapses"""
+        monkeypatch.setattr(session_cache, "ttl_seconds", 0.01)
+        session_cache.put("short", make_principal())
+
+        import time
+        time.sleep(0.02)
+
+        assert session_cache.get("short") is None
+        assert session_cache.stats()["expirations"] == 1
+
+    def test_lru_eviction_by_entry_count(self, session_cache, monkeypatch):
+        """Test that the least recently used entry is evicted first"""
+        monkeypatch.setattr(session_cache, "max_entries", 2)
+        session_cache.put("a", make_principal())
+        session_cache.put("b", make_principal())
+        session_cache.get("a")
+        session_cache.put("c", make_principal())
+
+        assert session_cache.get("b") is None
+        assert session_cache.get("a") is not None
+        assert session_cache.get("c") is not None
+        assert session_cache.stats()["evictions"] == 1
+
+    def test_eviction_by_memory_budget(self, session_cache, monkeypatch):
+        """Test that the byte budget bounds the cache"""
+        session_cache.put("probe", make_principal())
+        entry_size = session_cache.stats()["bytes"]
+        session_cache.clear()
+
+        monkeypatch.setattr(session_cache, "max_bytes", entry_size * 3)
+        for i in range(10):
+            session_cache.put(f"hash-{i}", make_principal())
+
+        stats = session_cache.stats()
+        assert stats["entries"] <= 3
+        assert stats["bytes"] <= entry_size * 3
+        assert stats["evictions"] >= 7
+
+    def test_invalidate(self, session_cache):
+        """Test dropping a single entry"""
+        session_cache.put("hash-1", make_principal())
+
+        assert session_cache.invalidate("hash-1") is True
+        assert session_cache.invalidate("hash-1") is False
+        assert session_cache.get("hash-1") is None
+
+    def test_invalidate_user(self, session_cache):
+        """Test dropping every entry for one user"""
+        user_id = uuid4()
+        session_cache.put("a", make_principal(user_id))
+        session_cache.put("b", make_principal(user_id))
+        session_cache.put("c", make_principal())
+
+        assert session_cache.invalidate_user(user_id) == 2
+        assert session_cache.get("a") is None
+        assert session_cache.get("b") is None
+        assert session_cache.get("c") is not None
+
+    def test_disabled_cache(self, session_cache, monkeypatch):
+        """Test that a disabled cache never stores anything"""
+        monkeypatch.setattr(session_cache, "enabled", False)
+        session_cache.put("hash-1", make_principal())
+
+        assert session_cache.get("hash-1") is None
+        assert session_cache.stats()["entries"] == 0
+
+
+class TestRejectedTokenCache:
+    """Test cases for RejectedTokenCache"""
+
+    def test_remembers_rejections_until_ttl(self, rejected_tokens, monkeypatch):
+        """Test that a rejected hash is reported only within its TTL"""
+        monkeypatch.setattr(rejected_tokens, "ttl_seconds", 0.01)
+        rejected_tokens.add("dead")
+
+        assert rejected_tokens.contains("dead")
+        assert not rejected_tokens.contains("other")
+
+        import time
+        time.sleep(0.02)
+
+        assert not rejected_tokens.contains("dead")
+        assert rejected_tokens.stats()["entries"] == 0
+
+    def test_bounded_by_max_entries(self, rejected_tokens, monkeypatch):
+        """Test that the least recently seen hashes are evicted first"""
+        monkeypatch.setattr(rejected_tokens, "max_entries", 2)
+        rejected_tokens.add("a")
+        rejected_tokens.add("b")
+        rejected_tokens.contains("a")
+        rejected_tokens.add("c")
+
+        assert not rejected_tokens.contains("b")
+        assert rejected_tokens.contains("a")
+        assert rejected_tokens.stats()["evictions"] == 1
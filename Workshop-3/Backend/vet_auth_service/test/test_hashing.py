@@ -0,0 +1,200 @@
+# ============================================================================
+# test_hashing.py - Password Hashing Pool Tests
+# ============================================================================
+import time
+import pytest
+from fastapi import status
+from sqlalchemy import update
+from app import cli, security
+from app.config import Config
+from app.exceptions import PasswordHasherBusyError, PasswordHashingTimeoutError
+from app.hashing import PasswordHasher
+from app.models import AppUser
+from app.repositories import UserRepository
+from app.security import build_context
+
+
+@pytest.fixture
+def password_hasher(monkeypatch):
+    """The PasswordHasher singleton, shut down and reset after the test"""
+    hasher = PasswordHasher()
+    for counter in ("completed", "rejected", "timeouts"):
+        monkeypatch.setattr(hasher, counter, 0)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.fixture
+def weak_hash_user(db_session, sample_user_data, monkeypatch):
+    """A user whose bcrypt hash is cheaper than the (test-sized) configured cost"""
+    monkeypatch.setattr(security, "pwd_context", build_context("bcrypt", bcrypt_rounds=5))
+    user = AppUser(
+        name=sample_user_data["name"],
+        email=sample_user_data["email"],
+        password_hash=build_context("bcrypt", bcrypt_rounds=4).hash(sample_user_data["password"]),
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+def login(client, sample_user_data):
+    return client.post(
+        "/login",
+        json={"email": sample_user_data["email"], "password": sample_user_data["password"]},
+    )
+
+
+class TestPasswordHasher:
+    """Test cases for PasswordHasher"""
+
+    def test_inline_round_trip(self, password_hasher):
+        """Test hashing without worker processes"""
+        password_hash = password_hasher.hash("SecurePass123!")
+
+        assert password_hasher.verify("SecurePass123!", password_hash)
+        assert not password_hasher.verify("WrongPass123!", password_hash)
+        assert password_hasher.stats()["completed"] == 0
+
+    def test_pool_round_trip(self, password_hasher, monkeypatch):
+        """Test hashing in a worker process"""
+        monkeypatch.setattr(password_hasher, "workers", 1)
+        monkeypatch.setattr(password_hasher, "timeout_seconds", 30)
+
+        password_hash = password_hasher.hash("SecurePass123!")
+
+        assert password_hasher.verify("SecurePass123!", password_hash)
+        stats = password_hasher.stats()
+        assert stats["completed"] == 2
+        assert stats["pending"] == 0
+
+    def test_hash_many_in_pool(self, password_hasher, monkeypatch):
+        """Test that a batch is hashed in order and waits instead of being shed"""
+        monkeypatch.setattr(password_hasher, "workers", 2)
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+        monkeypatch.setattr(password_hasher, "timeout_seconds", 30)
+        passwords = [f"SecurePass{index}!" for index in range(5)]
+
+        hashes = password_hasher.hash_many(passwords)
+
+        assert all(security.verify_password(password, password_hash) for password, password_hash in zip(passwords, hashes))
+        stats = password_hasher.stats()
+        assert stats["completed"] == 5
+        assert stats["rejected"] == 0
+        assert stats["pending"] == 0
+
+    def test_rejects_when_queue_full(self, password_hasher, monkeypatch):
+        """Test that jobs beyond max_pending are shed instead of queued"""
+        monkeypatch.setattr(password_hasher, "workers", 1)
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+        with pytest.raises(PasswordHasherBusyError):
+            password_hasher.hash("SecurePass123!")
+
+        assert password_hasher.stats()["rejected"] == 1
+
+    def test_timeout_releases_slot_when_job_ends(self, password_hasher, monkeypatch):
+        """Test that a timed-out job keeps its slot until the worker finishes it"""
+        monkeypatch.setattr(password_hasher, "workers", 1)
+        monkeypatch.setattr(password_hasher, "timeout_seconds", 0.001)
+
+        with pytest.raises(PasswordHashingTimeoutError):
+            password_hasher.hash("SecurePass123!")
+
+        assert password_hasher.stats()["timeouts"] == 1
+        deadline = time.monotonic() + 30
+        while password_hasher.stats()["pending"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert password_hasher.stats()["pending"] == 0
+
+
+class TestPasswordBackendCheck:
+    """Test cases for checking the password backend at startup"""
+
+    def test_startup_fails_without_backend(self, mocker):
+        """Test that a scheme whose backend is missing stops the app from starting"""
+        from fastapi.testclient import TestClient
+        from passlib.exc import MissingBackendError
+        from app.main import app
+        mocker.patch.object(security.pwd_context, "hash", side_effect=MissingBackendError("argon2: no backends available"))
+
+        with pytest.raises(MissingBackendError):
+            with TestClient(app):
+                pass
+
+
+class TestPasswordHasherEndpoints:
+    """Test cases for pool saturation at the API"""
+
+    def test_login_returns_503_when_busy(self, client, created_user, sample_user_data, password_hasher, monkeypatch):
+        """Test that a saturated pool surfaces as 503 with Retry-After"""
+        monkeypatch.setattr(password_hasher, "workers", 1)
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+        response = client.post(
+            "/login",
+            json={"email": sample_user_data["email"], "password": sample_user_data["password"]},
+        )
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["Retry-After"] == "1"
+
+
+class TestPasswordRehash:
+    """Test cases for upgrading outdated password hashes at login"""
+
+    def test_outdated_cost_is_rehashed(self, client, db_session, weak_hash_user, sample_user_data):
+        """Test that a successful login replaces a hash below the configured rounds"""
+        old_hash = weak_hash_user.password_hash
+
+        assert login(client, sample_user_data).status_code == status.HTTP_200_OK
+
+        db_session.refresh(weak_hash_user)
+        assert weak_hash_user.password_hash != old_hash
+        assert weak_hash_user.password_hash.startswith("$2b$05$")
+        assert login(client, sample_user_data).status_code == status.HTTP_200_OK
+
+    def test_bcrypt_hash_moves_to_argon2(self, client, db_session, weak_hash_user, sample_user_data, monkeypatch):
+        """Test that switching PASSWORD_SCHEME migrates users as they log in"""
+        pytest.importorskip("argon2")
+        monkeypatch.setattr(security, "pwd_context", build_context("argon2", argon2_time_cost=1, argon2_memory_kib=1024))
+
+        assert login(client, sample_user_data).status_code == status.HTTP_200_OK
+
+        db_session.refresh(weak_hash_user)
+        assert weak_hash_user.password_hash.startswith("$argon2id$")
+        assert login(client, sample_user_data).status_code == status.HTTP_200_OK
+
+    def test_rehash_can_be_disabled(self, client, db_session, weak_hash_user, sample_user_data, monkeypatch):
+        """Test that PASSWORD_REHASH_ON_LOGIN=false leaves stored hashes alone"""
+        monkeypatch.setattr(Config(), "PASSWORD_REHASH_ON_LOGIN", False)
+        old_hash = weak_hash_user.password_hash
+
+        assert login(client, sample_user_data).status_code == status.HTTP_200_OK
+
+        db_session.refresh(weak_hash_user)
+        assert weak_hash_user.password_hash == old_hash
+
+    def test_rehash_loses_to_concurrent_password_change(self, db_session, weak_hash_user):
+        """Test that an upgrade computed from a stale hash does not overwrite a new password"""
+        db_session.execute(
+            update(AppUser).where(AppUser.id == weak_hash_user.id).values(password_hash="changed")
+            .execution_options(synchronize_session=False)
+        )
+
+        assert not UserRepository(db_session).replace_password_hash(weak_hash_user, "upgraded")
+
+        db_session.refresh(weak_hash_user)
+        assert weak_hash_user.password_hash == "changed"
+
+    def test_calibrate_picks_highest_cost_within_target(self, monkeypatch):
+        """Test that calibration stops at the first cost over the target"""
+        timings = iter([25.0, 50.0, 100.0, 200.0])
+        monkeypatch.setattr(cli, "measure_verify", lambda context, samples: next(timings))
+
+        result = cli.calibrate("bcrypt", target_ms=120)
+
+        assert result["recommendation"] == {"PASSWORD_SCHEME": "bcrypt", "PASSWORD_BCRYPT_ROUNDS": 12}
+        assert [step["cost"] for step in result["measured"]] == [10, 11, 12, 13]
+        assert result["verifies_per_second_per_worker"] == 10.0
@@ -0,0 +1,97 @@
+# ============================================================================
+# test_logging.py - Logging Pipeline Tests
+# ============================================================================
+import json
+import logging
+import queue
+import pytest
+from app.logging_config import DeferredQueueHandler, JsonFormatter, RateLimitFilter
+
+
+def make_record(msg, *args, level=logging.INFO, name="app.services"):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class TestRateLimitFilter:
+    """Test cases for per-template sampling"""
+
+    def test_limits_per_template_not_per_message(self):
+        """Test that different users logging in share one budget"""
+        rate_filter = RateLimitFilter(per_second=3)
+
+        passed = [
+            rate_filter.filter(make_record("Authentication successful: User %s", f"user{i}@example.com"))
+            for i in range(10)
+        ]
+
+        assert passed.count(True) == 3
+        assert rate_filter.filter(make_record("Logout successful")) is True
+
+    def test_warnings_always_pass(self):
+        """Test that WARNING and above are never sampled"""
+        rate_filter = RateLimitFilter(per_second=1)
+
+        results = [rate_filter.filter(make_record("Failed login for %s", "x", level=logging.WARNING)) for _ in range(5)]
+
+        assert all(results)
+
+    def test_reports_suppressed_count(self, monkeypatch):
+        """Test that the next emitted record carries the number dropped"""
+        clock = [100.0]
+        monkeypatch.setattr("app.logging_config.time.monotonic", lambda: clock[0])
+        rate_filter = RateLimitFilter(per_second=1)
+
+        for _ in range(4):
+            rate_filter.filter(make_record("Session validated"))
+        clock[0] += 1.5
+        record = make_record("Session validated")
+
+        assert rate_filter.filter(record) is True
+        assert record.sampled_out == 3
+
+    def test_zero_disables_sampling(self):
+        """Test that a limit of 0 lets everything through"""
+        rate_filter = RateLimitFilter(per_second=0)
+
+        assert all(rate_filter.filter(make_record("Session validated")) for _ in range(100))
+
+
+class TestFormattingAndQueue:
+    """Test cases for JSON output and the non-blocking queue handler"""
+
+    def test_json_formatter(self):
+        """Test one JSON object per record including extra fields"""
+        record = make_record("User %s logged in", "vet@example.com")
+        record.request_id = "abc123"
+        record.sampled_out = 7
+
+        entry = json.loads(JsonFormatter().format(record))
+
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "app.services"
+        assert entry["message"] == "User vet@example.com logged in"
+        assert entry["request_id"] == "abc123"
+        assert entry["sampled_out"] == 7
+
+    def test_message_is_not_formatted_on_caller_thread(self):
+        """Test that the handler enqueues the raw record"""
+        log_queue = queue.Queue()
+        handler = DeferredQueueHandler(log_queue)
+        record = make_record("User %s logged in", "vet@example.com")
+
+        handler.handle(record)
+        queued = log_queue.get_nowait()
+
+        assert queued is record
+        assert queued.msg == "User %s logged in"
+        assert queued.args == ("vet@example.com",)
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test that a saturated queue drops and counts records"""
+        handler = DeferredQueueHandler(queue.Queue(maxsize=2))
+
+        for _ in range(5):
+            handler.handle(make_record("Session validated"))
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 3
@@ -0,0 +1,119 @@
+# ============================================================================
+# test_metrics.py - Prometheus Metrics Tests
+# ============================================================================
+import time
+import pytest
+from fastapi import status
+from app.metrics import (
+    LOGIN_ATTEMPTS,
+    REPOSITORY_LATENCY,
+    REQUEST_LATENCY,
+    Counter,
+    Histogram,
+    client_type_label,
+    method_label,
+)
+
+
+class TestMetricTypes:
+    """Test cases for the metric primitives"""
+
+    def test_histogram_render(self):
+        """Test cumulative buckets, sum and count in exposition format"""
+        histogram = Histogram("test_seconds", "Test histogram", ("route",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "/a")
+        histogram.observe(0.5, "/a")
+        histogram.observe(5.0, "/a")
+
+        lines = list(histogram.render())
+
+        assert "# TYPE test_seconds histogram" in lines
+        assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{route="/a",le="1"} 2' in lines
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+        assert 'test_seconds_sum{route="/a"} 5.55' in lines
+        assert 'test_seconds_count{route="/a"} 3' in lines
+
+    def test_counter_escapes_labels(self):
+        """Test that label values are escaped"""
+        counter = Counter("test_total", "Test counter", ("client_type",))
+        counter.inc('we"ird')
+
+        assert 'test_total{client_type="we\\"ird"} 1' in list(counter.render())
+
+    def test_client_type_cardinality_is_capped(self, monkeypatch):
+        """Test that unbounded header values fold into "other" """
+        monkeypatch.setattr("app.metrics._client_types", set())
+        monkeypatch.setattr("app.metrics.MAX_CLIENT_TYPES", 2)
+
+        assert client_type_label("web") == "web"
+        assert client_type_label("mobile") == "mobile"
+        assert client_type_label("curl") == "other"
+        assert client_type_label("web") == "web"
+
+    def test_unknown_methods_fold_into_other(self):
+        """Test that only standard HTTP methods are used as labels"""
+        assert method_label("GET") == "GET"
+        assert method_label("PATCH") == "PATCH"
+        assert method_label("FOOBAR") == "other"
+        assert method_label("get") == "other"
+
+    def test_observe_overhead(self):
+        """Test that an observation costs microseconds, not milliseconds"""
+        histogram = Histogram("overhead_seconds", "Overhead", ("route",))
+        iterations = 20000
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            histogram.observe(0.003, "/me")
+        per_call = (time.perf_counter() - start) / iterations
+
+        assert per_call < 20e-6
+
+
+class TestMetricsEndpoint:
+    """Test cases for the /metrics endpoint and instrumentation"""
+
+    def test_request_and_repository_latency(self, client, valid_session):
+        """Test that a /me call shows up under its route template and repository method"""
+        before = REQUEST_LATENCY.count("GET", "/me", "200")
+        repo_before = REPOSITORY_LATENCY.count("AsyncSessionRepository", "find_principal")
+
+        client.get("/me", headers={"Authorization": f"Bearer {valid_session['raw_token']}"})
+        response = client.get("/metrics")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        assert REQUEST_LATENCY.count("GET", "/me", "200") == before + 1
+        assert REPOSITORY_LATENCY.count("AsyncSessionRepository", "find_principal") == repo_before + 1
+        assert 'vettrack_http_request_duration_seconds_count{method="GET",route="/me",status="200"}' in response.text
+        assert 'vettrack_db_pool_checked_out{engine="sync"}' in response.text
+
+    def test_custom_method_recorded_as_other(self, client):
+        """Test that a request with a made-up method is not given its own series"""
+        before = REQUEST_LATENCY.count("other", "/me", "405")
+
+        client.request("FOOBAR1", "/me")
+        client.request("FOOBAR2", "/me")
+
+        assert REQUEST_LATENCY.count("FOOBAR1", "/me", "405") == 0
+        assert REQUEST_LATENCY.count("other", "/me", "405") == before + 2
+
+    def test_login_attempts_by_client_type(self, client, created_user, sample_user_data):
+        """Test login outcome counters"""
+        success_before = LOGIN_ATTEMPTS.value("web", "success")
+        failure_before = LOGIN_ATTEMPTS.value("web", "invalid_credentials")
+
+        client.post(
+            "/login",
+            json={"email": sample_user_data["email"], "password": sample_user_data["password"]},
+            headers={"X-Client-Type": "web"},
+        )
+        client.post(
+            "/login",
+            json={"email": sample_user_data["email"], "password": "WrongPassword123!"},
+            headers={"X-Client-Type": "web"},
+        )
+
+        assert LOGIN_ATTEMPTS.value("web", "success") == success_before + 1
+        assert LOGIN_ATTEMPTS.value("web", "invalid_credentials") == failure_before + 1
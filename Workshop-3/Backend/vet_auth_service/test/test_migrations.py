@@ -0,0 +1,72 @@
+# ============================================================================
+# test_migrations.py - Alembic Migration Tests
+# ============================================================================
+import os
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config as AlembicConfig
+from alembic.migration import MigrationContext
+from sqlalchemy import text
+from app.database import Base
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = "migration_test"
+
+
+@pytest.fixture
+def migration_connection(test_engine):
+    """A connection whose search_path points at an empty schema"""
+    with test_engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}, public"))
+        connection.commit()
+        try:
+            yield connection
+        finally:
+            connection.rollback()
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            connection.execute(text("SET search_path TO public"))
+            connection.commit()
+
+
+def alembic_config(connection):
+    config = AlembicConfig(os.path.join(SERVICE_ROOT, "alembic.ini"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def index_names(connection):
+    return set(connection.execute(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = :schema AND tablename = 'user_session'"),
+        {"schema": SCHEMA},
+    ).scalars())
+
+
+class TestMigrations:
+    """Test cases for the auth schema migrations"""
+
+    def test_head_matches_models(self, migration_connection):
+        """Test that upgrading an empty schema produces what app.models declares"""
+        command.upgrade(alembic_config(migration_connection), "head")
+        migration_connection.commit()
+
+        context = MigrationContext.configure(
+            migration_connection,
+            opts={"include_object": lambda obj, name, type_, *_: type_ != "table" or name in Base.metadata.tables},
+        )
+
+        assert compare_metadata(context, Base.metadata) == []
+
+    def test_index_migration_round_trip(self, migration_connection):
+        """Test that 0002 swaps the plain token index for the partial ones and back"""
+        config = alembic_config(migration_connection)
+
+        command.upgrade(config, "head")
+        assert {"uq_user_session_active_token", "idx_user_session_active_by_user"} <= index_names(migration_connection)
+        assert "idx_user_session_token_hash" not in index_names(migration_connection)
+
+        command.downgrade(config, "0001")
+        assert "idx_user_session_token_hash" in index_names(migration_connection)
+        assert "uq_user_session_active_token" not in index_names(migration_connection)
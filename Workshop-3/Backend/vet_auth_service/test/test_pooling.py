@@ -0,0 +1,160 @@
+# ============================================================================
+# test_pooling.py - Connection Pool Policy Tests
+# ============================================================================
+import os
+import pytest
+from fastapi import status
+from sqlalchemy import text
+from app.config import Config
+from app.metrics import InstrumentedNullPool, InstrumentedQueuePool, RecentSamples
+from app.pooling import create_pooled_async_engine, create_pooled_engine, pool_report
+
+
+@pytest.fixture
+def pool_config(monkeypatch):
+    """The Config singleton, with pool settings restored after the test"""
+    config = Config()
+    for name in (
+        "DATABASE_POOL_SIZE",
+        "DATABASE_POOL_PRE_PING",
+        "DATABASE_POOL_PRE_PING_IDLE_SECONDS",
+        "DATABASE_PGBOUNCER",
+    ):
+        monkeypatch.setattr(config, name, getattr(config, name))
+    return config
+
+
+def checkout(engine):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+
+class TestRecentSamples:
+    """Test cases for recent checkout-wait percentiles"""
+
+    def test_percentiles_over_last_samples(self):
+        """Test that only the newest `size` observations count"""
+        samples = RecentSamples(size=100)
+        for value in range(200):
+            samples.add("sync", float(value))
+
+        result = samples.percentiles("sync")
+
+        assert result == {"p50": 150.0, "p95": 195.0, "p99": 199.0, "max": 199.0, "samples": 100}
+        assert samples.percentiles("other") == {"samples": 0}
+
+
+class TestPoolPolicy:
+    """Test cases for engines built from the pool settings"""
+
+    def test_configured_queue_pool(self, pool_config):
+        """Test that size and label come from Config"""
+        pool_config.DATABASE_POOL_SIZE = 3
+        engine = create_pooled_engine(os.environ["DATABASE_URL"], "test")
+        try:
+            checkout(engine)
+
+            assert isinstance(engine.pool, InstrumentedQueuePool)
+            assert engine.pool.size() == 3
+            assert engine.pool.engine_label == "test"
+            report = pool_report("test", engine.pool)
+            assert report["checked_in"] == 1
+            assert report["checkout_wait_seconds"]["samples"] >= 1
+        finally:
+            engine.dispose()
+
+    def test_idle_pre_ping_skips_busy_connections(self, pool_config, mocker):
+        """Test that a connection reused right away is not pinged"""
+        pool_config.DATABASE_POOL_PRE_PING = "idle"
+        pool_config.DATABASE_POOL_PRE_PING_IDLE_SECONDS = 3600
+        engine = create_pooled_engine(os.environ["DATABASE_URL"], "test")
+        do_ping = mocker.spy(engine.dialect, "do_ping")
+        try:
+            checkout(engine)
+            checkout(engine)
+
+            assert do_ping.call_count == 0
+        finally:
+            engine.dispose()
+
+    def test_idle_pre_ping_replaces_dead_connection(self, pool_config, mocker):
+        """Test that an idle connection failing its ping is swapped for a new one"""
+        pool_config.DATABASE_POOL_PRE_PING = "idle"
+        pool_config.DATABASE_POOL_PRE_PING_IDLE_SECONDS = 0
+        engine = create_pooled_engine(os.environ["DATABASE_URL"], "test")
+        try:
+            checkout(engine)
+            do_ping = mocker.patch.object(engine.dialect, "do_ping", side_effect=Exception("gone"))
+
+            checkout(engine)
+
+            assert do_ping.call_count == 1
+            assert engine.pool.checkedin() == 1
+        finally:
+            engine.dispose()
+
+    def test_pgbouncer_mode_uses_null_pool(self, pool_config):
+        """Test that PgBouncer mode keeps no connections of its own"""
+        pool_config.DATABASE_PGBOUNCER = True
+        engine = create_pooled_engine(os.environ["DATABASE_URL"], "test")
+        try:
+            checkout(engine)
+
+            assert isinstance(engine.pool, InstrumentedNullPool)
+            assert "size" not in pool_report("test", engine.pool)
+        finally:
+            engine.dispose()
+
+    def test_direct_engine_pooled_in_pgbouncer_mode(self, pool_config, monkeypatch):
+        """Test that the direct engine keeps the configured pool when the main URL goes through PgBouncer"""
+        from app.database import DatabaseManager
+        pool_config.DATABASE_PGBOUNCER = True
+        pool_config.DATABASE_POOL_SIZE = 3
+        monkeypatch.setattr(pool_config, "DATABASE_DIRECT_URL", os.environ["DATABASE_URL"])
+        db_manager = DatabaseManager()
+        monkeypatch.setattr(db_manager, "_direct_engine", None)
+        engine = db_manager.direct_engine
+        try:
+            checkout(engine)
+
+            assert isinstance(engine.pool, InstrumentedQueuePool)
+            assert engine.pool.size() == 3
+            assert engine.pool.engine_label == "direct"
+        finally:
+            engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_pgbouncer_mode_async_without_statement_cache(self, pool_config):
+        """Test that the asyncpg engine runs with prepared statement caching off"""
+        pool_config.DATABASE_PGBOUNCER = True
+        engine = create_pooled_async_engine(os.environ["DATABASE_URL"], "test_async")
+        try:
+            for _ in range(2):
+                async with engine.connect() as connection:
+                    assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+                    raw = await connection.get_raw_connection()
+                    assert raw.driver_connection._stmt_cache.get_max_size() == 0
+        finally:
+            await engine.dispose()
+
+
+class TestPoolEndpoint:
+    """Test cases for GET /admin/pool"""
+
+    def test_admin_pool(self, client, admin_session):
+        """Test that every pool is reported with its settings"""
+        headers = {"Authorization": f"Bearer {admin_session['raw_token']}"}
+
+        response = client.get("/admin/pool", headers=headers)
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["config"]["pre_ping"] == Config().DATABASE_POOL_PRE_PING
+        assert "size" in data["pools"]["sync"]
+        assert "samples" in data["pools"]["sync"]["checkout_wait_seconds"]
+
+    def test_admin_pool_requires_admin(self, client, valid_session):
+        """Test that regular users cannot read pool statistics"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+
+        assert client.get("/admin/pool", headers=headers).status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,161 @@
+# ============================================================================
+# test_provisioning.py - Bulk User Provisioning Tests
+# ============================================================================
+import json
+import pytest
+from fastapi import status
+from app import cli
+from app.models import AppUser
+from app.provisioning import parse_users
+from app.repositories import UserRepository
+from app.security import verify_password
+
+CSV_BODY = (
+    "name,email,password\n"
+    "Ana Vet,ana@clinic.example,SecurePass123!\n"
+    "Ben Vet,ben@clinic.example,short\n"
+    "\n"
+    "Ana Again,ANA@clinic.example,SecurePass123!\n"
+    "John Doe,john.doe@example.com,SecurePass123!\n"
+    "Cleo Vet,cleo@clinic.example,SecurePass456!\n"
+)
+
+
+def admin_headers(admin_session, content_type):
+    return {
+        "Authorization": f"Bearer {admin_session['raw_token']}",
+        "Content-Type": content_type,
+    }
+
+
+class TestParseUsers:
+    """Test cases for reading provisioning files"""
+
+    def test_csv_rows_keep_their_line(self):
+        """Test that valid and invalid CSV records are both returned, blank lines skipped"""
+        rows = parse_users(CSV_BODY, "csv")
+
+        assert [row.line for row in rows] == [2, 3, 5, 6, 7]
+        assert rows[0].request.email == "ana@clinic.example"
+        assert rows[1].request is None
+        assert "password" in rows[1].error
+
+    def test_csv_requires_header(self):
+        """Test that a file without the expected columns is rejected as a whole"""
+        with pytest.raises(ValueError):
+            parse_users("ana@clinic.example,SecurePass123!\n", "csv")
+
+    def test_ndjson_bad_lines(self):
+        """Test that unreadable NDJSON lines become error rows"""
+        body = '{"name": "Ana", "email": "ana@clinic.example", "password": "SecurePass123!"}\n{oops\n[1]\n'
+
+        rows = parse_users(body, "ndjson")
+
+        assert rows[0].request is not None
+        assert rows[1].error.startswith("Invalid JSON")
+        assert rows[2].error == "Expected a JSON object"
+
+
+class TestProvisionUsers:
+    """Test cases for AuthService.provision_users"""
+
+    def test_reports_each_row(self, auth_service, created_user, db_session):
+        """Test created, duplicate and invalid rows in one batch"""
+        results = auth_service.provision_users(parse_users(CSV_BODY, "csv"))
+
+        assert [result.status for result in results] == ["created", "invalid", "duplicate", "duplicate", "created"]
+        assert "earlier in this batch" in results[2].error
+        assert "already exists" in results[3].error
+        user = db_session.query(AppUser).filter(AppUser.email == "cleo@clinic.example").one()
+        assert user.id == results[4].id
+        assert verify_password("SecurePass456!", user.password_hash)
+
+    def test_existing_emails_are_not_hashed(self, auth_service, created_user, mocker):
+        """Test that known duplicates cost no password hashing"""
+        hash_many = mocker.spy(auth_service.password_hasher, "hash_many")
+
+        auth_service.provision_users(parse_users(CSV_BODY, "csv"))
+
+        assert len(hash_many.call_args.args[0]) == 2
+
+    def test_concurrent_registration_is_a_duplicate(self, auth_service, db_session, mocker):
+        """Test that an email taken between the lookup and the insert does not fail the batch"""
+        mocker.patch.object(UserRepository, "find_existing_emails", return_value=set())
+        UserRepository(db_session).create("Early Bird", "ana@clinic.example", "x")
+
+        results = auth_service.provision_users(parse_users(CSV_BODY, "csv"))
+
+        assert results[0].status == "duplicate"
+        assert results[4].status == "created"
+
+
+class TestProvisionEndpoint:
+    """Test cases for POST /admin/users:bulk"""
+
+    def test_csv_upload(self, client, admin_session):
+        """Test a CSV upload with a per-row report"""
+        response = client.post("/admin/users:bulk", content=CSV_BODY, headers=admin_headers(admin_session, "text/csv"))
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data["created"], data["duplicates"], data["invalid"]) == (3, 1, 1)
+        assert data["results"][1]["line"] == 3
+
+    def test_ndjson_upload(self, client, admin_session):
+        """Test an NDJSON upload"""
+        body = "\n".join(json.dumps(
+            {"name": f"Vet {index}", "email": f"vet{index}@clinic.example", "password": "SecurePass123!"}
+        ) for index in range(3))
+
+        response = client.post(
+            "/admin/users:bulk", content=body,
+            headers=admin_headers(admin_session, "application/x-ndjson"),
+        )
+
+        assert response.json()["created"] == 3
+
+    def test_unsupported_content_type(self, client, admin_session):
+        """Test that other formats are refused"""
+        response = client.post("/admin/users:bulk", content="{}", headers=admin_headers(admin_session, "application/json"))
+
+        assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+    def test_too_many_rows(self, client, admin_session, monkeypatch):
+        """Test that uploads above the configured limit are rejected"""
+        from app.config import Config
+        monkeypatch.setattr(Config(), "PROVISION_BATCH_MAX", 2)
+
+        response = client.post("/admin/users:bulk", content=CSV_BODY, headers=admin_headers(admin_session, "text/csv"))
+
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_CONTENT
+
+    def test_requires_admin(self, client, valid_session):
+        """Test that regular users cannot provision accounts"""
+        response = client.post(
+            "/admin/users:bulk", content=CSV_BODY,
+            headers={"Authorization": f"Bearer {valid_session['raw_token']}", "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+class TestProvisionCommand:
+    """Test cases for python -m app.cli provision"""
+
+    def test_provision_file(self, db_session, tmp_path):
+        """Test provisioning from a file, format taken from the extension"""
+        path = tmp_path / "clinic.csv"
+        path.write_text(CSV_BODY)
+
+        summary = cli.provision(str(path), db=db_session)
+
+        assert (summary["created"], summary["duplicates"], summary["invalid"]) == (3, 1, 1)
+        assert [problem["line"] for problem in summary["problems"]] == [3, 5]
+
+    def test_unknown_extension(self, tmp_path):
+        """Test that the format must be given when the extension does not tell it"""
+        path = tmp_path / "clinic.txt"
+        path.write_text(CSV_BODY)
+
+        with pytest.raises(ValueError):
+            cli.provision(str(path))
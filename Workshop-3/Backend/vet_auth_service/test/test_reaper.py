@@ -0,0 +1,216 @@
+# ============================================================================
+# test_reaper.py - Session Reaper Tests
+# ============================================================================
+import logging
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import delete, event, func, select, text
+from sqlalchemy.orm import Session
+from app.models import AppUser, UserSession
+from app.metrics import SESSION_PARTITIONS_DROPPED, SESSION_REAPER_ROWS
+from app import partitions
+from app.partitions import DEFAULT_PARTITION, create_partitions, existing_partitions, partition_name
+from app.reaper import REAPER_LOCK_KEY, SessionReaper
+from app.repositories import SessionRepository
+
+
+@pytest.fixture
+def reaper_user(test_engine):
+    """A committed user; the reaper works on its own connection, outside the test transaction"""
+    with Session(test_engine) as db:
+        user = AppUser(name="Reaper User", email=f"reaper-{uuid4().hex[:8]}@example.com", password_hash="x")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    yield user_id
+    with Session(test_engine) as db:
+        db.execute(delete(AppUser).where(AppUser.id == user_id))
+        db.commit()
+
+
+def add_sessions(engine, user_id, count, expires_at, revoked_at=None):
+    with Session(engine) as db:
+        db.add_all(
+            UserSession(user_id=user_id, token_hash=uuid4().hex, expires_at=expires_at, revoked_at=revoked_at)
+            for _ in range(count)
+        )
+        db.commit()
+
+
+def table_exists(engine, name):
+    with engine.connect() as connection:
+        return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar()
+
+
+def day_start(day):
+    return datetime.combine(day, datetime.min.time(), timezone.utc)
+
+
+def count_sessions(engine, user_id):
+    with engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(UserSession).where(UserSession.user_id == user_id)
+        ).scalar()
+
+
+class TestSessionReaper:
+    """Test cases for deleting expired and revoked sessions"""
+
+    def test_reaps_past_retention_only(self, test_engine, reaper_user):
+        """Test that valid and recently expired sessions survive"""
+        now = datetime.now(timezone.utc)
+        add_sessions(test_engine, reaper_user, 3, now - timedelta(days=3))
+        add_sessions(test_engine, reaper_user, 2, now + timedelta(hours=8), revoked_at=now - timedelta(days=2))
+        add_sessions(test_engine, reaper_user, 1, now - timedelta(hours=1))
+        add_sessions(test_engine, reaper_user, 4, now + timedelta(hours=8))
+        runs_before = SESSION_REAPER_ROWS.count()
+
+        deleted = SessionReaper(test_engine).run_once()
+
+        assert deleted == 5
+        assert count_sessions(test_engine, reaper_user) == 5
+        assert SESSION_REAPER_ROWS.count() == runs_before + 1
+
+    def test_deletes_in_batches(self, test_engine, reaper_user, mocker):
+        """Test that a large backlog is deleted in batch_size chunks"""
+        add_sessions(test_engine, reaper_user, 7, datetime.now(timezone.utc) - timedelta(days=3))
+        reaper = SessionReaper(test_engine)
+        reaper.batch_size = 3
+        reaper.max_rows_per_second = 0
+        delete_reapable = mocker.spy(SessionRepository, "delete_reapable")
+
+        assert reaper.run_once() == 7
+        assert delete_reapable.call_count == 3
+        assert count_sessions(test_engine, reaper_user) == 0
+
+    def test_paces_batches(self, mocker):
+        """Test that full batches sleep to respect the row rate limit"""
+        reaper = SessionReaper()
+        reaper.max_rows_per_second = 1000
+        wait = mocker.patch.object(reaper._stop, "wait")
+
+        reaper._pace(500, 0.1)
+
+        assert wait.call_args.args[0] == pytest.approx(0.4)
+
+    def test_skips_when_another_worker_holds_the_lock(self, test_engine, reaper_user):
+        """Test that only one worker reaps at a time"""
+        add_sessions(test_engine, reaper_user, 2, datetime.now(timezone.utc) - timedelta(days=3))
+
+        with test_engine.connect() as other_worker:
+            other_worker.execute(text("SELECT pg_advisory_lock(:key)"), {"key": REAPER_LOCK_KEY})
+            try:
+                assert SessionReaper(test_engine).run_once() is None
+            finally:
+                other_worker.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REAPER_LOCK_KEY})
+                other_worker.commit()
+
+        assert count_sessions(test_engine, reaper_user) == 2
+
+
+class TestSessionPartitions:
+    """Test cases for daily user_session partitions"""
+
+    def test_rows_route_to_daily_partitions(self, test_engine, reaper_user):
+        """Test that a new session lands in the partition for its expiry day"""
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=8)
+        add_sessions(test_engine, reaper_user, 1, expires_at)
+
+        with test_engine.connect() as connection:
+            table = connection.execute(
+                text("SELECT tableoid::regclass::text FROM user_session WHERE user_id = :user_id"),
+                {"user_id": reaper_user},
+            ).scalar()
+
+        assert table == partition_name(expires_at.date())
+
+    def test_validation_query_prunes_expired_partitions(self, test_engine):
+        """Test that expires_at > now keeps past partitions out of the plan"""
+        now = datetime.now(timezone.utc)
+        with test_engine.connect() as connection:
+            plan = "\n".join(connection.execute(
+                text("EXPLAIN SELECT id FROM user_session WHERE token_hash = :token_hash AND expires_at > :now"),
+                {"token_hash": "x", "now": now},
+            ).scalars())
+
+        assert partition_name(now.date() - timedelta(days=1)) not in plan
+        assert partition_name(now.date() + timedelta(days=1)) in plan
+
+    def test_reaper_drops_aged_out_partitions(self, test_engine, reaper_user):
+        """Test that a partition past retention is dropped whole"""
+        old_day = datetime.now(timezone.utc).date() - timedelta(days=10)
+        with test_engine.connect() as connection:
+            create_partitions(connection, old_day, old_day)
+        add_sessions(test_engine, reaper_user, 3, datetime.combine(old_day, datetime.min.time(), timezone.utc) + timedelta(hours=12))
+        dropped_before = SESSION_PARTITIONS_DROPPED.value()
+
+        SessionReaper(test_engine).run_once()
+
+        with test_engine.connect() as connection:
+            assert old_day not in existing_partitions(connection)
+        assert not table_exists(test_engine, partition_name(old_day))
+        assert count_sessions(test_engine, reaper_user) == 0
+        assert SESSION_PARTITIONS_DROPPED.value() == dropped_before + 1
+
+    def test_detaches_concurrently_without_default_partition(self, test_engine, reaper_user):
+        """Test that aged-out partitions are detached concurrently, then dropped, when there is no default partition"""
+        old_day = datetime.now(timezone.utc).date() - timedelta(days=10)
+        with test_engine.connect() as connection:
+            create_partitions(connection, old_day, old_day)
+        add_sessions(test_engine, reaper_user, 2, day_start(old_day) + timedelta(hours=12))
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with test_engine.connect() as connection:
+            connection.execute(text(f"ALTER TABLE user_session DETACH PARTITION {DEFAULT_PARTITION}"))
+            connection.commit()
+        event.listen(test_engine, "before_cursor_execute", record)
+        try:
+            reaper = SessionReaper(test_engine)
+            reaper.default_partition = False
+            reaper.run_once()
+        finally:
+            event.remove(test_engine, "before_cursor_execute", record)
+            with test_engine.connect() as connection:
+                connection.execute(text(f"ALTER TABLE user_session ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+                connection.commit()
+
+        name = partition_name(old_day)
+        assert f"ALTER TABLE user_session DETACH PARTITION {name} CONCURRENTLY" in statements
+        assert f"DROP TABLE IF EXISTS {name}" in statements
+        assert not table_exists(test_engine, name)
+        assert count_sessions(test_engine, reaper_user) == 0
+
+    def test_drops_partition_left_detached(self, test_engine):
+        """Test that a partition detached by an interrupted run is still dropped"""
+        old_day = datetime.now(timezone.utc).date() - timedelta(days=10)
+        name = partition_name(old_day)
+        with test_engine.connect() as connection:
+            create_partitions(connection, old_day, old_day)
+            connection.execute(text(f"ALTER TABLE user_session DETACH PARTITION {name}"))
+            connection.commit()
+
+        SessionReaper(test_engine).run_once()
+
+        assert not table_exists(test_engine, name)
+
+    def test_default_partition_conflict_logged_once(self, test_engine, reaper_user, caplog):
+        """Test that a day blocked by rows in the default partition is reported once, with the row count"""
+        day = datetime.now(timezone.utc).date() + timedelta(days=30)
+        add_sessions(test_engine, reaper_user, 3, day_start(day) + timedelta(hours=6))
+        caplog.set_level(logging.WARNING, logger="app.partitions")
+        try:
+            with test_engine.connect() as connection:
+                assert create_partitions(connection, day, day) == []
+                assert create_partitions(connection, day, day) == []
+        finally:
+            partitions._reported_conflicts.discard(day)
+
+        errors = [r for r in caplog.records if r.levelno == logging.ERROR]
+        assert len(errors) == 1
+        assert partition_name(day) in errors[0].getMessage()
+        assert "3 rows" in errors[0].getMessage()
+        assert not [r for r in caplog.records if r.levelno == logging.WARNING]
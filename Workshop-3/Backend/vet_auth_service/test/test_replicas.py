@@ -0,0 +1,163 @@
+# ============================================================================
+# test_replicas.py - Read Replica Routing Tests
+# ============================================================================
+import json
+import os
+import pytest
+from fastapi import status
+from app.database import DatabaseManager
+from app.replicas import ReplicaRouter
+from app.revocation import apply_revocation_event
+from app.services import AsyncAuthService, TokenService
+from test.test_cache import make_principal
+
+
+@pytest.fixture
+def replica_router():
+    """A router whose only "replica" is the test database itself (never in recovery, so lag 0)"""
+    router = ReplicaRouter([os.environ["DATABASE_URL"]], max_lag_seconds=2, check_interval_seconds=1)
+    yield router
+    router.stop()
+    router.engine(0).dispose()
+
+
+@pytest.fixture
+def async_db(db_session):
+    from app.database import SyncSessionAdapter
+    return SyncSessionAdapter(db_session)
+
+
+class TestReplicaRouter:
+    """Test cases for lag-aware replica selection"""
+
+    def test_picks_replica_within_lag_budget(self, replica_router):
+        """Test that a measured replica is used once its lag is known and small"""
+        assert replica_router.pick() is None
+
+        assert replica_router.check_lag() == [0.0]
+        assert replica_router.pick() == 0
+
+    def test_skips_lagging_replica(self, replica_router):
+        """Test that a replica behind by more than max_lag_seconds is not used"""
+        replica_router.max_lag_seconds = -1
+        replica_router.check_lag()
+
+        assert replica_router.pick() is None
+
+    def test_skips_unreachable_replica(self):
+        """Test that a replica that cannot be reached sends reads to the primary"""
+        router = ReplicaRouter(["postgresql://nobody:x@127.0.0.1:1/none"], 2, 1)
+
+        assert router.check_lag() == [None]
+        assert router.pick() is None
+
+
+class TestReplicaReads:
+    """Test cases for validation reads through a replica"""
+
+    @pytest.mark.asyncio
+    async def test_replica_hit_skips_primary(self, async_db, valid_session, mocker):
+        """Test that a session found on the replica is not looked up again"""
+        from app.repositories import AsyncSessionRepository
+        primary = AsyncSessionRepository(async_db)
+        replica = AsyncSessionRepository(async_db)
+        primary_lookup = mocker.spy(primary, "find_principal")
+        service = AsyncAuthService(mocker.Mock(), primary, replica_session_repo=replica)
+
+        principal = await service.validate_session(valid_session["raw_token"])
+
+        assert principal.session_id == valid_session["session"].id
+        assert primary_lookup.call_count == 0
+
+    @pytest.mark.asyncio
+    async def test_replica_miss_falls_back_to_primary(self, async_db, valid_session, mocker):
+        """Test that a login the replica has not replayed yet is still valid"""
+        from app.repositories import AsyncSessionRepository
+        replica = mocker.Mock()
+        replica.find_principal = mocker.AsyncMock(return_value=None)
+        service = AsyncAuthService(mocker.Mock(), AsyncSessionRepository(async_db), replica_session_repo=replica)
+
+        principal = await service.validate_session(valid_session["raw_token"])
+
+        assert principal.session_id == valid_session["session"].id
+        replica.find_principal.assert_awaited_once()
+
+    def test_me_with_unreplayed_session(self, client, valid_session, replica_router, monkeypatch, mocker):
+        """Test /me end to end when the replica cannot see the (uncommitted) session"""
+        replica_router.check_lag()
+        monkeypatch.setattr(DatabaseManager(), "replicas", replica_router)
+        monkeypatch.setattr(DatabaseManager(), "async_enabled", False)
+        replica_session = mocker.spy(replica_router, "get_session")
+
+        response = client.get("/me", headers={"Authorization": f"Bearer {valid_session['raw_token']}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == valid_session["user"].email
+        assert replica_session.call_count == 1
+
+
+class TestReplicaStaleness:
+    """Test cases for revocations a replica has not replayed yet"""
+
+    def test_revoked_token_is_rejected_locally(self, rejected_tokens):
+        """Test that a token revocation event blocks the token regardless of replica state"""
+        token_hash = TokenService.hash_token("revoked")
+
+        apply_revocation_event(json.dumps({"type": "token", "token_hash": token_hash}))
+
+        assert rejected_tokens.contains(token_hash)
+
+    def test_user_revocation_fences_cache(self, session_cache, monkeypatch):
+        """Test that a revoked user's principals are not re-cached while replicas catch up"""
+        monkeypatch.setattr(session_cache, "invalidation_fence_seconds", 60)
+        principal = make_principal()
+
+        session_cache.invalidate_user(principal.id)
+        session_cache.put("stale", principal)
+
+        assert session_cache.get("stale") is None
+
+    def test_user_revocation_not_served_by_stale_replica(self, client, db_session, valid_session, session_cache, monkeypatch, mocker):
+        """Test that a replica that has not replayed a user-wide revocation cannot revive the session"""
+        from app.database import get_async_read_db
+        from app.main import app
+        from app.repositories import AsyncSessionRepository, SessionRepository
+        monkeypatch.setattr(session_cache, "invalidation_fence_seconds", 60)
+        user_id = valid_session["user"].id
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        stale = SessionRepository(db_session).find_principal(token_hash)
+        SessionRepository(db_session).revoke_all_user_sessions(user_id)
+        apply_revocation_event(json.dumps({"type": "user", "user_id": str(user_id)}))
+
+        replica_db = object()
+        primary_lookup = AsyncSessionRepository.find_principal
+
+        async def find_principal(repository, token_hash):
+            if repository.db is replica_db:
+                return stale
+            return await primary_lookup(repository, token_hash)
+
+        async def override_get_async_read_db():
+            yield replica_db
+
+        mocker.patch.object(AsyncSessionRepository, "find_principal", find_principal)
+        app.dependency_overrides[get_async_read_db] = override_get_async_read_db
+
+        response = client.get("/me", headers={"Authorization": f"Bearer {valid_session['raw_token']}"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert session_cache.get(token_hash) is None
+
+    @pytest.mark.asyncio
+    async def test_replica_principal_ttl_capped(self, async_db, valid_session, session_cache, monkeypatch, mocker):
+        """Test that a principal read from a replica is cached no longer than the replica lag budget"""
+        from app.config import Config
+        from app.repositories import AsyncSessionRepository
+        monkeypatch.setattr(Config(), "DATABASE_REPLICA_MAX_LAG_SECONDS", 2)
+        put = mocker.spy(session_cache, "put")
+        repository = AsyncSessionRepository(async_db)
+        service = AsyncAuthService(mocker.Mock(), repository, replica_session_repo=repository)
+
+        await service.validate_session(valid_session["raw_token"])
+
+        assert put.call_args.args[2] == 2
@@ -107,11 +107,105 @@ class TestSessionRepository:
         
         assert session.id is not None
         assert session.user_id == created_user.id
-        assert session.token_hash == token_hash
+        assert session.token_hash_hex == token_hash
         assert session.user_agent == "test-client"
         assert session.ip_address == "127.0.0.1"
         assert session.revoked_at is None
     
+    def test_create_session_compact_row(self, session_repository, created_user, token_service):
+        """Test that new sessions store a 32-byte digest and share client_agent rows"""
+        from datetime import datetime, timedelta, timezone
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=8)
+        
+        first = session_repository.create(created_user.id, token_service.generate_session_token()[1], expires_at, "web")
+        second = session_repository.create(created_user.id, token_service.generate_session_token()[1], expires_at, "web")
+        
+        assert len(first.token_digest) == 32
+        assert first.token_hash is None
+        assert first.legacy_user_agent is None
+        assert first.client_agent_id == second.client_agent_id
+        assert second.user_agent == "web"
+    
+    def test_create_session_legacy_row(self, db_session, created_user, token_service, monkeypatch):
+        """Test SESSION_ROW_FORMAT=legacy for rolling deploys"""
+        from datetime import datetime, timedelta, timezone
+        from app.config import Config
+        from app.repositories import SessionRepository
+        monkeypatch.setattr(Config(), "SESSION_ROW_FORMAT", "legacy")
+        _, token_hash = token_service.generate_session_token()
+        
+        session = SessionRepository(db_session).create(
+            created_user.id, token_hash, datetime.now(timezone.utc) + timedelta(hours=8), "web",
+        )
+        
+        assert session.token_hash == token_hash
+        assert session.token_digest is None
+        assert session.user_agent == "web"
+        assert SessionRepository(db_session).find_principal(token_hash).id == created_user.id
+    
+    def test_create_for_login_one_statement(self, session_repository, created_user, token_service, db_session, test_engine):
+        """Test that the login insert and the last_login_at stamp are a single statement"""
+        from datetime import datetime, timedelta, timezone
+        from sqlalchemy import event
+        from app.models import UserSession
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=8)
+        login_at = datetime.now(timezone.utc)
+        session_repository.create(created_user.id, token_service.generate_session_token()[1], expires_at, "web")
+        user_id, token_hash = created_user.id, token_service.generate_session_token()[1]
+        statements = []
+    
+        def capture(conn, cursor, statement, *args):
+            statements.append(statement)
+    
+        event.listen(test_engine, "before_cursor_execute", capture)
+        try:
+            session_id, returned_expiry = session_repository.create_for_login(
+                user_id, token_hash, expires_at, "web", "127.0.0.1", last_login_at=login_at,
+            )
+        finally:
+            event.remove(test_engine, "before_cursor_execute", capture)
+    
+        assert len(statements) == 1
+        assert returned_expiry == expires_at
+        db_session.refresh(created_user)
+        assert created_user.last_login_at == login_at
+        session = db_session.query(UserSession).filter(UserSession.id == session_id).one()
+        assert (session.user_agent, session.ip_address) == ("web", "127.0.0.1")
+    
+    def test_create_for_login_keeps_newer_login(self, session_repository, created_user, token_service, db_session):
+        """Test that a slower login does not move last_login_at backwards"""
+        from datetime import datetime, timedelta, timezone
+        now = datetime.now(timezone.utc)
+        for login_at in (now, now - timedelta(minutes=5)):
+            session_repository.create_for_login(
+                created_user.id, token_service.generate_session_token()[1], now + timedelta(hours=8),
+                last_login_at=login_at,
+            )
+    
+        db_session.refresh(created_user)
+        assert created_user.last_login_at == now
+    
+    def test_legacy_rows_need_legacy_reads(self, db_session, created_user, token_service, monkeypatch):
+        """Test the dual-read fallback for sessions written before the compact format"""
+        from datetime import datetime, timedelta, timezone
+        from app.config import Config
+        from app.models import UserSession
+        from app.repositories import SessionRepository
+        raw_token, token_hash = token_service.generate_session_token()
+        db_session.add(UserSession(
+            user_id=created_user.id,
+            token_hash=token_hash,
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=8),
+        ))
+        db_session.commit()
+        
+        assert SessionRepository(db_session).find_principal(token_hash).id == created_user.id
+        assert SessionRepository(db_session).find_valid_session(token_hash) is not None
+        
+        monkeypatch.setattr(Config(), "SESSION_LEGACY_READS", False)
+        assert SessionRepository(db_session).find_principal(token_hash) is None
+        assert SessionRepository(db_session).find_valid_session(token_hash) is None
+    
     def test_find_valid_session_success(self, session_repository, valid_session):
         """Test finding a valid session"""
         token_hash = TokenService.hash_token(valid_session["raw_token"])
@@ -139,6 +233,63 @@ class TestSessionRepository:
         session = session_repository.find_valid_session(token_hash)
         assert session is None
     
+    def test_find_principal_single_query(self, session_repository, valid_session, db_session):
+        """Test that the principal comes back in one round trip, as a tuple not an ORM object"""
+        from sqlalchemy import event
+        from app.principal import AuthenticatedUser
+        statements = []
+        event.listen(
+            db_session.connection(), "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        
+        principal = session_repository.find_principal(token_hash)
+        
+        assert len(statements) == 1
+        assert isinstance(principal, AuthenticatedUser)
+        assert principal.email == valid_session["user"].email
+        assert principal.session_id == valid_session["session"].id
+    
+    def test_validation_query_is_index_only(self, valid_session, db_session):
+        """Test that the token lookup reads user_session through the covering partial index only"""
+        from datetime import datetime, timezone
+        from sqlalchemy import text
+        from app.repositories import _principal_by_token
+        compiled = _principal_by_token("token_digest").compile(dialect=db_session.bind.dialect)
+        params = {
+            **compiled.params,
+            "token": valid_session["session"].token_digest,
+            "now": datetime.now(timezone.utc),
+        }
+        # Rows in every partition, the default one included, so the plan reflects production rather than empty tables
+        db_session.execute(
+            text(
+                "INSERT INTO user_session (user_id, token_digest, expires_at) "
+                "SELECT :user_id, sha256(i::text::bytea), now() + (i % 240) * interval '1 hour' "
+                "FROM generate_series(1, 5000) AS i"
+            ),
+            {"user_id": valid_session["user"].id},
+        )
+        db_session.execute(text("ANALYZE user_session"))
+        db_session.execute(text("SET LOCAL enable_seqscan = off"))
+        db_session.execute(text("SET LOCAL enable_bitmapscan = off"))
+        
+        plan = db_session.connection().exec_driver_sql(f"EXPLAIN {compiled}", params).scalars().all()
+        
+        session_scans = [line for line in plan if " on user_session" in line]
+        assert session_scans
+        assert all("Index Only Scan using" in line for line in session_scans)
+    
+    def test_find_principal_revoked(self, session_repository, valid_session, db_session):
+        """Test that revoked sessions resolve to no principal"""
+        from datetime import datetime, timezone
+        valid_session["session"].revoked_at = datetime.now(timezone.utc)
+        db_session.commit()
+        
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        assert session_repository.find_principal(token_hash) is None
+    
     def test_revoke_session(self, session_repository, valid_session, db_session):
         """Test revoking a session"""
         session = valid_session["session"]
@@ -171,4 +322,148 @@ class TestSessionRepository:
         ).all()
         
         for session in sessions:
-            assert session.revoked_at is not None
\ No newline at end of file
+            assert session.revoked_at is not None
+
+    @pytest.fixture
+    def incident_sessions(self, session_repository, created_user, token_service):
+        """Sessions from two subnets and two client types"""
+        from datetime import datetime, timedelta, timezone
+        
+        sessions = {}
+        for name, ip_address, client_type in (
+            ("laptop", "10.20.0.5", "web"),
+            ("tablet", "10.20.1.9", "ios"),
+            ("office", "192.168.1.10", "web"),
+        ):
+            _, token_hash = token_service.generate_session_token()
+            expires_at = datetime.now(timezone.utc) + timedelta(hours=8)
+            sessions[name] = session_repository.create(
+                created_user.id, token_hash, expires_at, user_agent=client_type, ip_address=ip_address,
+            )
+        return sessions
+    
+    def test_revoke_matching_network(self, session_repository, incident_sessions, db_session):
+        """Test revoking the sessions of one subnet with a single UPDATE"""
+        revoked = session_repository.revoke_matching(networks=["10.20.0.0/16"])
+        
+        assert {token_hash for token_hash, _ in revoked} == {
+            incident_sessions["laptop"].token_hash_hex,
+            incident_sessions["tablet"].token_hash_hex,
+        }
+        db_session.refresh(incident_sessions["office"])
+        assert incident_sessions["office"].revoked_at is None
+    
+    def test_revoke_matching_combines_criteria(self, session_repository, incident_sessions, created_user):
+        """Test that every given criterion has to match"""
+        from datetime import datetime, timedelta, timezone
+        
+        revoked = session_repository.revoke_matching(
+            user_ids=[created_user.id],
+            client_types=["web"],
+            created_before=datetime.now(timezone.utc) + timedelta(minutes=1),
+        )
+        
+        assert len(revoked) == 2
+        assert session_repository.revoke_matching(client_types=["web"]) == []
+    
+    def test_revoke_matching_requires_criterion(self, session_repository):
+        """Test that an unfiltered revocation is refused"""
+        with pytest.raises(ValueError):
+            session_repository.revoke_matching()
+
+class TestAsyncRepositories:
+    """Test cases for the async repositories (sync session behind SyncSessionAdapter)"""
+    
+    @pytest.fixture
+    def async_db(self, db_session):
+        from app.database import SyncSessionAdapter
+        return SyncSessionAdapter(db_session)
+    
+    @pytest.mark.asyncio
+    async def test_find_by_email(self, async_db, created_user):
+        """Test finding a user by email"""
+        from app.repositories import AsyncUserRepository
+        user = await AsyncUserRepository(async_db).find_by_email(created_user.email)
+        
+        assert user is not None
+        assert user.id == created_user.id
+    
+    @pytest.mark.asyncio
+    async def test_find_valid_session_loads_user(self, async_db, valid_session):
+        """Test that the session comes back with its user already loaded"""
+        from app.repositories import AsyncSessionRepository
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        session = await AsyncSessionRepository(async_db).find_valid_session(token_hash)
+        
+        assert session is not None
+        assert session.id == valid_session["session"].id
+        assert "user" in session.__dict__
+        assert session.user.email == valid_session["user"].email
+    
+    @pytest.mark.asyncio
+    async def test_find_principal(self, async_db, valid_session):
+        """Test resolving a token hash straight to a principal"""
+        from app.principal import AuthenticatedUser
+        from app.repositories import AsyncSessionRepository
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        
+        principal = await AsyncSessionRepository(async_db).find_principal(token_hash)
+        
+        assert isinstance(principal, AuthenticatedUser)
+        assert principal.id == valid_session["user"].id
+        assert principal.session_id == valid_session["session"].id
+        assert await AsyncSessionRepository(async_db).find_principal("missing") is None
+    
+    @pytest.mark.asyncio
+    async def test_find_principals(self, async_db, valid_session, db_session, monkeypatch):
+        """Test resolving several token hashes with one = ANY query"""
+        from sqlalchemy import event
+        from app.config import Config
+        from app.repositories import AsyncSessionRepository
+        monkeypatch.setattr(Config(), "SESSION_LEGACY_READS", False)
+        statements = []
+        event.listen(
+            db_session.connection(), "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        
+        principals = await AsyncSessionRepository(async_db).find_principals([token_hash, "missing"])
+        
+        assert len(statements) == 1
+        assert "ANY" in statements[0]
+        assert list(principals) == [token_hash]
+        assert principals[token_hash].email == valid_session["user"].email
+    
+    @pytest.mark.asyncio
+    async def test_revoke(self, async_db, valid_session, db_session):
+        """Test revoking a session"""
+        from app.repositories import AsyncSessionRepository
+        repo = AsyncSessionRepository(async_db)
+        token_hash = TokenService.hash_token(valid_session["raw_token"])
+        
+        await repo.revoke(await repo.find_valid_session(token_hash))
+        
+        assert await repo.find_valid_session(token_hash) is None
+    
+    @pytest.mark.asyncio
+    async def test_revoke_all_user_sessions(self, async_db, valid_session):
+        """Test revoking all sessions for a user"""
+        from app.repositories import AsyncSessionRepository
+        count = await AsyncSessionRepository(async_db).revoke_all_user_sessions(valid_session["user"].id)
+        
+        assert count == 1
+    
+    @pytest.mark.asyncio
+    async def test_asyncpg_engine(self, test_engine):
+        """Test the asyncpg-backed session against the real database"""
+        from app.database import DatabaseManager
+        from app.repositories import AsyncSessionRepository
+        db_manager = DatabaseManager()
+        try:
+            async with db_manager.get_async_session() as db:
+                assert await AsyncSessionRepository(db).find_valid_session("missing") is None
+                assert await AsyncSessionRepository(db).find_principal("missing") is None
+                assert await AsyncSessionRepository(db).find_principals(["a", "b"]) == {}
+        finally:
+            await db_manager.async_engine.dispose()
@@ -0,0 +1,157 @@
+# ============================================================================
+# test_revocation.py - Revocation Broadcast Tests
+# ============================================================================
+import json
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import text
+from app.config import Config
+from app.principal import AuthenticatedUser
+from app.revocation import RevocationListener, apply_revocation_event
+from app.services import TokenService
+
+
+def make_principal(user_id=None):
+    """Build a principal for revocation tests"""
+    return AuthenticatedUser(
+        id=user_id or uuid4(),
+        name="Cached User",
+        email="cached@example.com",
+        role="vet",
+        session_id=uuid4(),
+        expires_at=datetime.now(timezone.utc) + timedelta(hours=8),
+    )
+
+
+class TestRevocationEvents:
+    """Test cases for applying revocation events"""
+
+    def test_token_event(self, session_cache):
+        """Test that a token event drops one session"""
+        session_cache.put("hash-1", make_principal())
+        session_cache.put("hash-2", make_principal())
+
+        removed = apply_revocation_event(json.dumps({"type": "token", "token_hash": "hash-1"}))
+
+        assert removed == 1
+        assert session_cache.get("hash-1") is None
+        assert session_cache.get("hash-2") is not None
+
+    def test_user_event(self, session_cache):
+        """Test that a user event drops all of the user's sessions"""
+        user_id = uuid4()
+        session_cache.put("hash-1", make_principal(user_id))
+        session_cache.put("hash-2", make_principal(user_id))
+
+        removed = apply_revocation_event(json.dumps({"type": "user", "user_id": str(user_id)}))
+
+        assert removed == 2
+
+    def test_tokens_event(self, session_cache, rejected_tokens):
+        """Test that a tokens event drops and rejects every listed session"""
+        session_cache.put("hash-1", make_principal())
+        session_cache.put("hash-2", make_principal())
+
+        removed = apply_revocation_event(json.dumps({"type": "tokens", "token_hashes": ["hash-1", "hash-2", "hash-3"]}))
+
+        assert removed == 2
+        assert rejected_tokens.contains("hash-3")
+
+    def test_malformed_event_is_ignored(self, session_cache):
+        """Test that garbage payloads do not raise"""
+        assert apply_revocation_event("not json") == 0
+        assert apply_revocation_event(json.dumps({"type": "user", "user_id": "nope"})) == 0
+        assert apply_revocation_event(json.dumps({"type": "other"})) == 0
+
+
+class TestRevocationPublishing:
+    """Test cases for publishing revocations from repositories"""
+
+    def test_revoke_publishes_token_event(self, session_repository, valid_session, mocker):
+        """Test that revoking a session publishes its token hash"""
+        publish = mocker.patch("app.repositories.publish_token_revocation")
+
+        session_repository.revoke(valid_session["session"])
+
+        publish.assert_called_once_with(session_repository.db, valid_session["session"].token_hash_hex)
+
+    def test_revoke_all_publishes_user_event(self, session_repository, created_user, mocker):
+        """Test that revoking all sessions publishes a user event"""
+        publish = mocker.patch("app.repositories.publish_user_revocation")
+
+        session_repository.revoke_all_user_sessions(created_user.id)
+
+        publish.assert_called_once_with(session_repository.db, created_user.id)
+
+    def test_bulk_revocation_publishes_token_events(self, session_repository, created_user, token_service, monkeypatch, mocker):
+        """Test that a bulk revocation publishes its token hashes in bounded chunks"""
+        from app import revocation
+        monkeypatch.setattr(revocation, "TOKENS_PER_EVENT", 2)
+        for _ in range(3):
+            _, token_hash = token_service.generate_session_token()
+            session_repository.create(created_user.id, token_hash, TokenService.calculate_expiry())
+        execute = mocker.spy(session_repository.db, "execute")
+
+        revoked = session_repository.revoke_matching(user_ids=[created_user.id])
+
+        events = [json.loads(params["payload"]) for params in execute.call_args_list[-1].args[1]]
+        assert [len(event["token_hashes"]) for event in events] == [2, 1]
+        assert {token_hash for event in events for token_hash in event["token_hashes"]} == {
+            token_hash for token_hash, _ in revoked
+        }
+
+    def test_deactivation_publishes_user_event(self, user_repository, created_user, mocker):
+        """Test that deactivating a user publishes a user event"""
+        publish = mocker.patch("app.repositories.publish_user_revocation")
+
+        user_repository.update_status(created_user, False)
+
+        publish.assert_called_once_with(user_repository.db, created_user.id)
+
+    def test_revoke_issues_notify(self, session_repository, valid_session, db_session):
+        """Test that the NOTIFY runs in the revoking transaction"""
+        statements = []
+        from sqlalchemy import event
+        connection = db_session.connection()
+
+        @event.listens_for(connection, "before_cursor_execute")
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        session_repository.revoke(valid_session["session"])
+
+        assert any("pg_notify" in statement for statement in statements)
+
+
+class TestRevocationListener:
+    """Test cases for the LISTEN/NOTIFY background listener"""
+
+    def test_listener_applies_notifications(self, test_engine, session_cache):
+        """Test that a committed NOTIFY evicts the cached session"""
+        token_hash = TokenService.hash_token("listener-token")
+        listener = RevocationListener(session_cache)
+        listener.start()
+        try:
+            assert listener.wait_until_listening(timeout=5)
+            session_cache.put(token_hash, make_principal())
+
+            with test_engine.connect() as connection:
+                connection.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {
+                        "channel": Config().REVOCATION_CHANNEL,
+                        "payload": json.dumps({"type": "token", "token_hash": token_hash}),
+                    },
+                )
+                connection.commit()
+
+            deadline = time.monotonic() + 5
+            while session_cache.stats()["entries"] and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            assert session_cache.get(token_hash) is None
+            assert listener.events_received == 1
+        finally:
+            listener.stop()
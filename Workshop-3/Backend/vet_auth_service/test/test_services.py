@@ -7,6 +7,7 @@ from app.exceptions import (
     InvalidCredentialsError,
     AccountDeactivatedError,
     InvalidSessionError,
+    UserNotFoundError,
 )
 
 class TestTokenService:
@@ -165,4 +166,62 @@ class TestAuthService:
                 user=created_user,
                 current_password="wrong_password",
                 new_password="NewPassword123!",
-            )
\ No newline at end of file
+            )    
+    def test_validate_session_uses_cache(self, auth_service, valid_session, session_cache):
+        """Test that repeated validations are served from the cache"""
+        first = auth_service.validate_session(valid_session["raw_token"])
+        second = auth_service.validate_session(valid_session["raw_token"])
+        
+        assert first == second
+        assert first.session_id == valid_session["session"].id
+        assert session_cache.stats()["hits"] == 1
+    
+    def test_rejected_token_skips_database(self, auth_service, valid_session, rejected_tokens, mocker):
+        """Test that retrying a dead token is answered from the rejected token cache"""
+        find_principal = mocker.spy(auth_service.session_repo, "find_principal")
+        
+        for _ in range(3):
+            with pytest.raises(InvalidSessionError):
+                auth_service.validate_session("stale_token")
+        
+        assert find_principal.call_count == 1
+        assert rejected_tokens.stats()["hits"] == 2
+        assert auth_service.validate_session(valid_session["raw_token"]).session_id == valid_session["session"].id
+    
+    def test_logout_evicts_cached_session(self, auth_service, valid_session, session_cache):
+        """Test that logout removes the session from the cache"""
+        auth_service.validate_session(valid_session["raw_token"])
+        auth_service.logout(valid_session["raw_token"])
+        
+        with pytest.raises(InvalidSessionError):
+            auth_service.validate_session(valid_session["raw_token"])
+    
+    def test_change_password_evicts_cached_sessions(self, auth_service, valid_session, sample_user_data):
+        """Test that a password change removes the user's cached sessions"""
+        principal = auth_service.validate_session(valid_session["raw_token"])
+        auth_service.change_password(
+            user=principal,
+            current_password=sample_user_data["password"],
+            new_password="NewPassword123!",
+        )
+        
+        with pytest.raises(InvalidSessionError):
+            auth_service.validate_session(valid_session["raw_token"])
+    
+    def test_deactivate_user(self, auth_service, valid_session, db_session):
+        """Test that deactivation revokes and evicts every session"""
+        auth_service.validate_session(valid_session["raw_token"])
+        
+        count = auth_service.deactivate_user(valid_session["user"].id)
+        
+        assert count == 1
+        db_session.refresh(valid_session["user"])
+        assert valid_session["user"].status is False
+        with pytest.raises(InvalidSessionError):
+            auth_service.validate_session(valid_session["raw_token"])
+    
+    def test_deactivate_unknown_user(self, auth_service):
+        """Test deactivating a user that does not exist"""
+        from uuid import uuid4
+        with pytest.raises(UserNotFoundError):
+            auth_service.deactivate_user(uuid4())
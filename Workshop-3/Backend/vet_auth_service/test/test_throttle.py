@@ -0,0 +1,123 @@
+# ============================================================================
+# test_throttle.py - Login Throttle Tests
+# ============================================================================
+import pytest
+from datetime import timedelta
+from fastapi import status
+from app import throttle as throttle_module
+from app.exceptions import LoginThrottledError
+from app.hashing import PasswordHasher
+from app.metrics import LOGIN_THROTTLED
+from app.repositories import LoginThrottleRepository
+from app.throttle import RateLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test advances by hand"""
+    now = [1000.0]
+    monkeypatch.setattr(throttle_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+class TestRateLimiter:
+    """Test cases for the in-process GCRA buckets"""
+
+    def test_allows_burst_then_rejects(self, clock):
+        """Test that a key gets burst attempts and then a retry delay"""
+        limiter = RateLimiter(burst=3, per_minute=60, max_keys=10)
+
+        assert [limiter.hit("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.hit("a") == pytest.approx(1.0)
+        assert limiter.hit("b") == 0.0
+        assert limiter.stats()["rejections"] == 1
+
+    def test_refills_over_time(self, clock):
+        """Test that one attempt comes back every 60/per_minute seconds"""
+        limiter = RateLimiter(burst=2, per_minute=6, max_keys=10)
+        limiter.hit("a")
+        limiter.hit("a")
+        assert limiter.hit("a") > 0
+
+        clock[0] += 10
+        assert limiter.hit("a") == 0.0
+        assert limiter.hit("a") > 0
+
+    def test_bounded_keys(self, clock):
+        """Test that the least recently used keys are evicted past max_keys"""
+        limiter = RateLimiter(burst=1, per_minute=1, max_keys=2)
+        limiter.hit("a")
+        limiter.hit("b")
+        limiter.hit("c")
+
+        assert limiter.stats() == {"keys": 2, "rejections": 0, "evictions": 1}
+        assert limiter.hit("a") == 0.0
+
+
+class TestLoginThrottle:
+    """Test cases for email and address limits"""
+
+    def test_email_limit_ignores_case(self, login_throttle, monkeypatch):
+        """Test that spelling an email differently does not buy more attempts"""
+        monkeypatch.setattr(login_throttle, "by_email", RateLimiter(burst=1, per_minute=1, max_keys=10))
+        throttled_before = LOGIN_THROTTLED.value("email")
+
+        login_throttle.check("vet@example.com", "10.0.0.1")
+        with pytest.raises(LoginThrottledError) as excinfo:
+            login_throttle.check(" VET@example.com", "10.0.0.2")
+
+        assert excinfo.value.retry_after > 0
+        assert LOGIN_THROTTLED.value("email") == throttled_before + 1
+
+    def test_ip_limit_spans_emails(self, login_throttle, monkeypatch):
+        """Test that one address cannot spray many accounts"""
+        monkeypatch.setattr(login_throttle, "by_ip", RateLimiter(burst=2, per_minute=1, max_keys=10))
+
+        login_throttle.check("a@example.com", "10.0.0.1")
+        login_throttle.check("b@example.com", "10.0.0.1")
+        with pytest.raises(LoginThrottledError):
+            login_throttle.check("c@example.com", "10.0.0.1")
+        login_throttle.check("c@example.com", "10.0.0.2")
+
+    def test_login_returns_429_before_password_check(self, client, created_user, sample_user_data, login_throttle, monkeypatch, mocker):
+        """Test that a throttled login is rejected with Retry-After and no bcrypt work"""
+        monkeypatch.setattr(login_throttle, "by_email", RateLimiter(burst=1, per_minute=0.5, max_keys=10))
+        payload = {"email": sample_user_data["email"], "password": "wrong_password"}
+        assert client.post("/login", json=payload).status_code == status.HTTP_401_UNAUTHORIZED
+        verify = mocker.spy(PasswordHasher, "verify_and_update")
+
+        response = client.post("/login", json=payload)
+
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 1 <= int(response.headers["Retry-After"]) <= 120
+        assert verify.call_count == 0
+
+
+class TestSharedLoginThrottle:
+    """Test cases for limits shared across replicas through Postgres"""
+
+    def test_shared_bucket(self, db_session):
+        """Test that the upsert allows the burst and then reports the delay"""
+        repo = LoginThrottleRepository(db_session)
+        interval, tolerance = timedelta(seconds=60), timedelta(seconds=120)
+
+        assert repo.hit("email:shared@example.com", interval, tolerance) == 0.0
+        assert repo.hit("email:shared@example.com", interval, tolerance) == 0.0
+        assert repo.hit("email:shared@example.com", interval, tolerance) == pytest.approx(60, abs=1)
+        assert repo.hit("email:other@example.com", interval, tolerance) == 0.0
+
+    def test_shared_limit_applies_after_local(self, db_session, login_throttle, monkeypatch):
+        """Test that another replica's attempts count against this one"""
+        monkeypatch.setattr(login_throttle, "shared", True)
+        monkeypatch.setattr(login_throttle, "by_email", RateLimiter(burst=2, per_minute=1, max_keys=10))
+        repo = LoginThrottleRepository(db_session)
+        limiter = login_throttle.by_email
+        for _ in range(2):
+            repo.hit(
+                "email:busy@example.com",
+                timedelta(seconds=limiter.interval),
+                timedelta(seconds=limiter.tolerance),
+            )
+
+        with pytest.raises(LoginThrottledError):
+            login_throttle.check("busy@example.com", None, repo)
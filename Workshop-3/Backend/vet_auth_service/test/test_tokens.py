@@ -0,0 +1,236 @@
+# ============================================================================
+# test_tokens.py - Signed Access Token Tests
+# ============================================================================
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from fastapi import status
+from app.config import Config
+from app.exceptions import InvalidSessionError
+from app.principal import AuthenticatedUser
+from app.tokens import AccessTokenSigner
+
+
+def make_principal(expires_in=timedelta(hours=8)):
+    """Build a principal for token tests"""
+    return AuthenticatedUser(
+        id=uuid4(),
+        name="Token User",
+        email="token@example.com",
+        role="vet",
+        session_id=uuid4(),
+        expires_at=datetime.now(timezone.utc) + expires_in,
+    )
+
+
+@pytest.fixture
+def signed_mode(monkeypatch):
+    """Enable HS256 access tokens for the duration of a test"""
+    config = Config()
+    monkeypatch.setattr(config, "ACCESS_TOKEN_MODE", "signed")
+    monkeypatch.setattr(config, "ACCESS_TOKEN_ALGORITHM", "HS256")
+    monkeypatch.setattr(config, "ACCESS_TOKEN_SECRET", "test-secret-with-enough-entropy")
+    monkeypatch.setattr(AccessTokenSigner, "_instance", None)
+    return AccessTokenSigner()
+
+
+@pytest.fixture
+def eddsa_mode(monkeypatch, tmp_path):
+    """Enable EdDSA access tokens with a throwaway key"""
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+    key_file = tmp_path / "access_token_key.pem"
+    key_file.write_bytes(Ed25519PrivateKey.generate().private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ))
+    config = Config()
+    monkeypatch.setattr(config, "ACCESS_TOKEN_MODE", "signed")
+    monkeypatch.setattr(config, "ACCESS_TOKEN_ALGORITHM", "EdDSA")
+    monkeypatch.setattr(config, "ACCESS_TOKEN_PRIVATE_KEY_FILE", str(key_file))
+    monkeypatch.setattr(AccessTokenSigner, "_instance", None)
+    return AccessTokenSigner()
+
+
+class TestAccessTokenSigner:
+    """Test cases for AccessTokenSigner"""
+
+    def test_hs256_round_trip(self, signed_mode):
+        """Test that a signed token verifies back to the same principal"""
+        principal = make_principal()
+        token, expires_in = signed_mode.issue(principal)
+
+        verified = signed_mode.verify(token)
+
+        assert verified.id == principal.id
+        assert verified.session_id == principal.session_id
+        assert verified.role == principal.role
+        assert 0 < expires_in <= signed_mode.ttl_seconds
+
+    def test_expiry_capped_at_session_expiry(self, signed_mode):
+        """Test that the token never outlives its session"""
+        _, expires_in = signed_mode.issue(make_principal(expires_in=timedelta(seconds=30)))
+
+        assert expires_in <= 30
+
+    def test_tampered_token_rejected(self, signed_mode):
+        """Test that a modified payload fails signature verification"""
+        token, _ = signed_mode.issue(make_principal())
+        header, claims, signature = token.split(".")
+        forged = signed_mode.issue(make_principal())[0].split(".")[1]
+
+        with pytest.raises(InvalidSessionError):
+            signed_mode.verify(f"{header}.{forged}.{signature}")
+
+    def test_expired_token_rejected(self, signed_mode, monkeypatch):
+        """Test that expired tokens are rejected"""
+        token, _ = signed_mode.issue(make_principal())
+        monkeypatch.setattr(time, "time", lambda: 2 ** 40)
+
+        with pytest.raises(InvalidSessionError, match="expired"):
+            signed_mode.verify(token)
+
+    def test_algorithm_is_pinned(self, signed_mode):
+        """Test that a token claiming another algorithm is rejected"""
+        import base64
+        token, _ = signed_mode.issue(make_principal())
+        _, claims, signature = token.split(".")
+        none_header = base64.urlsafe_b64encode(b'{"alg":"none","kid":"v1"}').rstrip(b"=").decode()
+
+        with pytest.raises(InvalidSessionError):
+            signed_mode.verify(f"{none_header}.{claims}.{signature}")
+
+    def test_malformed_token_rejected(self, signed_mode):
+        """Test that garbage is rejected without raising anything else"""
+        with pytest.raises(InvalidSessionError):
+            signed_mode.verify("a.b.c")
+
+    def test_eddsa_round_trip_and_jwks(self, eddsa_mode):
+        """Test Ed25519 signing and key publication"""
+        principal = make_principal()
+        token, _ = eddsa_mode.issue(principal)
+
+        assert eddsa_mode.verify(token).id == principal.id
+        keys = eddsa_mode.jwks()["keys"]
+        assert keys[0]["kty"] == "OKP"
+        assert keys[0]["kid"] == eddsa_mode.key_id
+
+    def test_hs256_requires_secret(self, monkeypatch):
+        """Test that signed mode refuses to start without a key"""
+        config = Config()
+        monkeypatch.setattr(config, "ACCESS_TOKEN_MODE", "signed")
+        monkeypatch.setattr(config, "ACCESS_TOKEN_ALGORITHM", "HS256")
+        monkeypatch.setattr(config, "ACCESS_TOKEN_SECRET", None)
+        monkeypatch.setattr(AccessTokenSigner, "_instance", None)
+
+        with pytest.raises(RuntimeError):
+            AccessTokenSigner()
+
+
+    def test_eddsa_requires_cryptography(self, monkeypatch, tmp_path):
+        """Test that EdDSA without its backend fails when the signer is built"""
+        from app import tokens
+        config = Config()
+        monkeypatch.setattr(config, "ACCESS_TOKEN_MODE", "signed")
+        monkeypatch.setattr(config, "ACCESS_TOKEN_ALGORITHM", "EdDSA")
+        monkeypatch.setattr(config, "ACCESS_TOKEN_PRIVATE_KEY_FILE", str(tmp_path / "key.pem"))
+        monkeypatch.setattr(tokens, "Ed25519PrivateKey", None)
+        monkeypatch.setattr(AccessTokenSigner, "_instance", None)
+
+        with pytest.raises(RuntimeError, match="cryptography"):
+            AccessTokenSigner()
+
+    def test_unusable_key_fails_at_startup(self, eddsa_mode, monkeypatch, mocker):
+        """Test that a key that cannot sign is caught by the startup probe"""
+        mocker.patch.object(AccessTokenSigner, "_sign", side_effect=ValueError("unsupported"))
+        monkeypatch.setattr(AccessTokenSigner, "_instance", None)
+
+        with pytest.raises(RuntimeError, match="signing does not work"):
+            AccessTokenSigner()
+
+
+class TestAccessTokenEndpoints:
+    """Test cases for signed-token login, refresh and key publication"""
+
+    def test_login_issues_access_token(self, client, created_user, sample_user_data, signed_mode):
+        """Test that login returns an access token next to the session token"""
+        response = client.post(
+            "/login",
+            json={"email": sample_user_data["email"], "password": sample_user_data["password"]},
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["access_token"].count(".") == 2
+        assert data["expires_in"] > 0
+
+    def test_me_with_access_token_skips_database(self, client, valid_session, signed_mode, mocker):
+        """Test that /me is answered from the token alone"""
+        refresh = client.post(
+            "/token/refresh",
+            headers={"Authorization": f"Bearer {valid_session['raw_token']}"},
+        )
+        access_token = refresh.json()["access_token"]
+        lookup = mocker.patch("app.repositories.AsyncSessionRepository.find_principal")
+
+        response = client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email"] == valid_session["user"].email
+        lookup.assert_not_called()
+
+    def test_access_token_valid_in_batch(self, client, valid_session, signed_mode, mocker):
+        """Test that an access token accepted by /me is also valid in a batch, without a lookup"""
+        refresh = client.post(
+            "/token/refresh",
+            headers={"Authorization": f"Bearer {valid_session['raw_token']}"},
+        )
+        access_token = refresh.json()["access_token"]
+        expired, _ = signed_mode.issue(make_principal(expires_in=timedelta(seconds=-1)))
+        lookup = mocker.patch("app.repositories.AsyncSessionRepository.find_principals")
+
+        me = client.get("/me", headers={"Authorization": f"Bearer {access_token}"})
+        response = client.post("/sessions/validate:batch", json={"tokens": [access_token, expired]})
+
+        assert me.status_code == status.HTTP_200_OK
+        results = response.json()["results"]
+        assert [result["valid"] for result in results] == [True, False]
+        assert results[0]["user"]["email"] == valid_session["user"].email
+        lookup.assert_not_called()
+
+    def test_refresh_rejects_access_token(self, client, signed_mode):
+        """Test that an access token cannot renew itself"""
+        access_token, _ = signed_mode.issue(make_principal())
+
+        response = client.post("/token/refresh", headers={"Authorization": f"Bearer {access_token}"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refresh_rejects_revoked_session(self, client, valid_session, signed_mode):
+        """Test that a logged-out session cannot mint access tokens"""
+        headers = {"Authorization": f"Bearer {valid_session['raw_token']}"}
+        client.post("/logout", headers=headers)
+
+        response = client.post("/token/refresh", headers=headers)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refresh_disabled_in_opaque_mode(self, client, valid_session):
+        """Test that refresh is unavailable unless signed mode is on"""
+        response = client.post(
+            "/token/refresh",
+            headers={"Authorization": f"Bearer {valid_session['raw_token']}"},
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_jwks(self, client, signed_mode):
+        """Test that HS256 publishes no keys"""
+        response = client.get("/.well-known/jwks.json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"keys": []}
@@ -40,16 +40,23 @@ CREATE TABLE app_user (
   updated_at       TIMESTAMPTZ NOT NULL DEFAULT now()
 );
 
+-- Range-partitioned by expiry: the auth service creates one partition per UTC day
+-- ahead of time and drops whole partitions once they pass the retention window.
+-- The partition key has to be part of the primary key.
 CREATE TABLE user_session (
-  id             UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  id             UUID NOT NULL DEFAULT gen_random_uuid(),
   user_id        UUID NOT NULL REFERENCES app_user(id) ON DELETE CASCADE,
   token_hash     TEXT NOT NULL,
   created_at     TIMESTAMPTZ NOT NULL DEFAULT now(),
   expires_at     TIMESTAMPTZ NOT NULL,
   revoked_at     TIMESTAMPTZ,
   user_agent     TEXT,
-  ip_address     INET
-);
+  ip_address     INET,
+  PRIMARY KEY (id, expires_at)
+) PARTITION BY RANGE (expires_at);
+
+-- Catches rows outside every daily partition (e.g. before the service has started)
+CREATE TABLE user_session_default PARTITION OF user_session DEFAULT;
 
 CREATE TABLE owner (
   id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -212,11 +219,8 @@ CREATE TABLE audit_log (
 
 -- Case-insensitive email already handled by CITEXT uniqueness
 
--- User sessions
-CREATE INDEX IF NOT EXISTS idx_user_session_user_id
-  ON user_session(user_id);
-CREATE INDEX IF NOT EXISTS idx_user_session_token_hash
-  ON user_session(token_hash);
+-- User sessions: indexes are managed by the auth service's Alembic migrations
+-- (Backend/vet_auth_service/migrations), applied when the service starts
 
 -- Patient search
 CREATE INDEX IF NOT EXISTS idx_patient_name_trgm